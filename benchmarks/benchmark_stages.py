@@ -0,0 +1,342 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module times the stages of a scenario run.
+
+It runs synthetic scenarios (see synthetic_scenarios.py) for a set of run
+lengths and amounts of locations and times each of the following stages
+separately:
+1. define.declare_all_instances
+2. mobility.make_mobility_data
+3. consumption.get_consumption_data
+4. charging.charging_amounts_in_charging_sessions
+5. charging.get_charging_profile
+6. profiles.make_profile_display_dataframe
+7. writing.extra_end_outputs
+
+The results are saved in a JSON file, which can be compared with the
+results of another commit with compare_benchmarks.py.
+
+Usage (from the repository root):
+python benchmarks/benchmark_stages.py --run-lengths week month
+--location-counts 2 4 --repeats 3 --output benchmarks/results/my_run.json
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing as ty
+
+import numpy as np
+import pandas as pd
+from box import Box
+from ETS_CookBook import ETS_CookBook as cook
+
+REPOSITORY_ROOT: str = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))
+)
+sys.path.insert(0, os.path.join(REPOSITORY_ROOT, 'src', 'ChaProEV'))
+
+import charging  # type: ignore # noqa: E402
+import consumption  # type: ignore # noqa: E402
+import define  # type: ignore # noqa: E402
+import mobility  # type: ignore # noqa: E402
+import profiles  # type: ignore # noqa: E402
+import run_time  # type: ignore # noqa: E402
+import writing  # type: ignore # noqa: E402
+from synthetic_scenarios import (  # noqa: E402
+    RUN_LENGTHS,
+    make_synthetic_scenario,
+)
+
+BENCHMARK_CASE_NAME: str = 'benchmark'
+STAGE_NAMES: list[str] = [
+    'define.declare_all_instances',
+    'mobility.make_mobility_data',
+    'consumption.get_consumption_data',
+    'charging.charging_amounts_in_charging_sessions',
+    'charging.get_charging_profile',
+    'profiles.make_profile_display_dataframe',
+    'writing.extra_end_outputs',
+]
+
+
+def timed(
+    stage_timings: dict[str, float],
+    stage_name: str,
+    stage_function: ty.Callable,
+    *stage_arguments: ty.Any,
+) -> ty.Any:
+    '''
+    Runs a stage and stores its wall time (in seconds).
+    '''
+    stage_start: float = time.perf_counter()
+    stage_outputs: ty.Any = stage_function(*stage_arguments)
+    stage_timings[stage_name] = time.perf_counter() - stage_start
+    return stage_outputs
+
+
+def get_benchmark_general_parameters(output_root: str) -> Box:
+    '''
+    Gets the general parameters for the benchmarks, with outputs in
+    a given (temporary) folder and without progress bars or parallel
+    processing (so that the timings only contain the stages).
+    '''
+    general_parameters: Box = Box(
+        cook.parameters_from_TOML(
+            os.path.join(REPOSITORY_ROOT, 'ChaProEV.toml')
+        )
+    )
+    general_parameters.files.output_root = output_root
+    # The reference day cache (if used) starts empty for each repeat
+    general_parameters.reference_day_cache.folder = (
+        f'{output_root}/reference_day_cache'
+    )
+    general_parameters.sessions.produce = True
+    general_parameters.standard_profiles.produce = True
+    parallel_processing: Box = general_parameters.parallel_processing
+    parallel_processing.do_parallel_processing_for_pickle_saves = False
+    general_parameters.progress_bars.display_saving_pool_run = False
+    return general_parameters
+
+
+def clear_memos() -> None:
+    '''
+    Empties the memos of the run_time module, so that a repeat does not
+    reuse the time ranges and day types computed by the previous ones
+    (which would make the first repeat the only one that computes them).
+    '''
+    run_time.time_ranges_memo.clear()
+    run_time.day_types_memo.clear()
+
+
+def time_stages(scenario: Box, general_parameters: Box) -> dict[str, float]:
+    '''
+    Runs the stages of a scenario (in the same way as
+    scenarios_module.run_scenario) and gives their wall times.
+    '''
+    case_name: str = BENCHMARK_CASE_NAME
+    cook.check_if_folder_exists(
+        f'{general_parameters.files.output_root}/{case_name}'
+    )
+    stage_timings: dict[str, float] = {}
+
+    (
+        location_connections,
+        legs,
+        locations,
+        trips,
+    ) = timed(
+        stage_timings,
+        'define.declare_all_instances',
+        define.declare_all_instances,
+        scenario,
+        case_name,
+        general_parameters,
+    )
+
+    (
+        run_mobility_matrix,
+        location_split,
+        maximal_delivered_power_per_location,
+        maximal_delivered_power,
+        connectivity_per_location,
+        maximal_received_power_per_location,
+        vehicle_discharge_power_per_location,
+        discharge_power_to_network_per_location,
+        run_next_leg_kilometers,
+        run_next_leg_kilometers_cumulative,
+        run_next_leg_charge_from_network,
+        run_next_leg_charge_to_vehicle,
+        run_charging_sessions_dataframe,
+    ) = timed(
+        stage_timings,
+        'mobility.make_mobility_data',
+        mobility.make_mobility_data,
+        location_connections,
+        legs,
+        locations,
+        trips,
+        scenario,
+        case_name,
+        general_parameters,
+    )
+
+    timed(
+        stage_timings,
+        'consumption.get_consumption_data',
+        consumption.get_consumption_data,
+        run_mobility_matrix,
+        run_next_leg_kilometers,
+        run_next_leg_kilometers_cumulative,
+        scenario,
+        case_name,
+        general_parameters,
+    )
+
+    timed(
+        stage_timings,
+        'charging.charging_amounts_in_charging_sessions',
+        charging.charging_amounts_in_charging_sessions,
+        run_charging_sessions_dataframe,
+        scenario,
+        general_parameters,
+        case_name,
+    )
+
+    (
+        battery_spaces,
+        total_battery_space_per_location,
+        charge_drawn_by_vehicles,
+        charge_drawn_from_network,
+        charging_costs,
+    ) = timed(
+        stage_timings,
+        'charging.get_charging_profile',
+        charging.get_charging_profile,
+        location_split,
+        run_mobility_matrix,
+        maximal_delivered_power_per_location,
+        maximal_delivered_power,
+        scenario,
+        case_name,
+        general_parameters,
+    )
+
+    timed(
+        stage_timings,
+        'profiles.make_profile_display_dataframe',
+        profiles.make_profile_display_dataframe,
+        location_split,
+        total_battery_space_per_location,
+        charge_drawn_from_network,
+        run_next_leg_charge_from_network,
+        run_next_leg_charge_to_vehicle,
+        connectivity_per_location,
+        maximal_delivered_power_per_location,
+        maximal_received_power_per_location,
+        vehicle_discharge_power_per_location,
+        discharge_power_to_network_per_location,
+        scenario,
+        general_parameters,
+        case_name,
+    )
+
+    timed(
+        stage_timings,
+        'writing.extra_end_outputs',
+        writing.extra_end_outputs,
+        case_name,
+        general_parameters,
+    )
+
+    return stage_timings
+
+
+def get_commit() -> str | None:
+    '''
+    Gets the current commit of the repository (if it is a git repository).
+    '''
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    run_lengths: list[str], location_counts: list[int], repeats: int
+) -> dict:
+    '''
+    Times the stages for all combinations of run lengths and
+    amounts of locations, repeating each run a given amount of times.
+    '''
+    benchmark_results: list[dict] = []
+    for run_length in run_lengths:
+        for location_count in location_counts:
+            scenario: Box = make_synthetic_scenario(run_length, location_count)
+            stage_repeat_timings: dict[str, list[float]] = {
+                stage_name: [] for stage_name in STAGE_NAMES
+            }
+            for repeat in range(repeats):
+                # Each repeat starts from empty outputs (as
+                # extra_end_outputs converts all the files in the output
+                # folder), memos and reference day cache
+                clear_memos()
+                with tempfile.TemporaryDirectory() as output_root:
+                    general_parameters: Box = get_benchmark_general_parameters(
+                        output_root
+                    )
+                    stage_timings: dict[str, float] = time_stages(
+                        scenario, general_parameters
+                    )
+                for stage_name, stage_timing in stage_timings.items():
+                    stage_repeat_timings[stage_name].append(stage_timing)
+            for stage_name, stage_times in stage_repeat_timings.items():
+                benchmark_results.append(
+                    {
+                        'run_length': run_length,
+                        'location_count': location_count,
+                        'stage': stage_name,
+                        'times': stage_times,
+                        'min': min(stage_times),
+                        'median': float(np.median(stage_times)),
+                    }
+                )
+                print(
+                    f'{run_length:>10} {location_count:>3} locations '
+                    f'{stage_name:<48} {min(stage_times):9.3f} s'
+                )
+
+    return {
+        'commit': get_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'repeats': repeats,
+        'results': benchmark_results,
+    }
+
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(
+        description='Times the stages of synthetic ChaProEV scenarios'
+    )
+    argument_parser.add_argument(
+        '--run-lengths',
+        nargs='+',
+        choices=list(RUN_LENGTHS),
+        default=list(RUN_LENGTHS),
+    )
+    argument_parser.add_argument(
+        '--location-counts', nargs='+', type=int, default=[2, 4]
+    )
+    argument_parser.add_argument('--repeats', type=int, default=1)
+    argument_parser.add_argument(
+        '--output',
+        default=os.path.join(
+            REPOSITORY_ROOT, 'benchmarks', 'results', 'benchmarks.json'
+        ),
+    )
+    arguments = argument_parser.parse_args()
+
+    benchmarks: dict = run_benchmarks(
+        arguments.run_lengths, arguments.location_counts, arguments.repeats
+    )
+    output_folder: str = os.path.dirname(os.path.abspath(arguments.output))
+    cook.check_if_folder_exists(output_folder)
+    with open(arguments.output, 'w') as output_file:
+        json.dump(benchmarks, output_file, indent=2)
+    print(f'Saved benchmark results to {arguments.output}')
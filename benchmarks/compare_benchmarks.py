@@ -0,0 +1,78 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module compares two benchmark result files (made with
+benchmark_stages.py), for example from two commits.
+
+For each run length, amount of locations and stage, it gives the
+ratio of the (minimal) times of the new and the reference results, and
+flags the stages that got slower than a given threshold.
+
+Usage (from the repository root):
+python benchmarks/compare_benchmarks.py reference.json new.json
+--threshold 1.1
+'''
+
+import argparse
+import json
+import sys
+
+
+def load_timings(results_file: str) -> dict[tuple[str, int, str], float]:
+    '''
+    Loads the (minimal) stage times of a benchmark results file,
+    with the run length, amount of locations and stage as keys.
+    '''
+    with open(results_file) as benchmark_file:
+        benchmarks: dict = json.load(benchmark_file)
+    return {
+        (result['run_length'], result['location_count'], result['stage']): (
+            result['min']
+        )
+        for result in benchmarks['results']
+    }
+
+
+def compare_benchmarks(
+    reference_file: str, new_file: str, threshold: float
+) -> list[tuple[str, int, str]]:
+    '''
+    Prints the time ratios of the new results compared to the reference
+    results and returns the benchmarks that got slower than the threshold.
+    '''
+    reference_timings: dict[tuple[str, int, str], float] = load_timings(
+        reference_file
+    )
+    new_timings: dict[tuple[str, int, str], float] = load_timings(new_file)
+    regressions: list[tuple[str, int, str]] = []
+    for benchmark_key, new_time in new_timings.items():
+        if benchmark_key not in reference_timings:
+            continue
+        reference_time: float = reference_timings[benchmark_key]
+        time_ratio: float = new_time / max(reference_time, 1e-9)
+        run_length, location_count, stage_name = benchmark_key
+        flag: str = ''
+        if time_ratio > threshold:
+            regressions.append(benchmark_key)
+            flag = ' <-- slower'
+        print(
+            f'{run_length:>10} {location_count:>3} locations '
+            f'{stage_name:<48} {reference_time:9.3f} s -> '
+            f'{new_time:9.3f} s ({time_ratio:5.2f}x){flag}'
+        )
+    return regressions
+
+
+if __name__ == '__main__':
+    argument_parser = argparse.ArgumentParser(
+        description='Compares two ChaProEV benchmark result files'
+    )
+    argument_parser.add_argument('reference_file')
+    argument_parser.add_argument('new_file')
+    argument_parser.add_argument('--threshold', type=float, default=1.1)
+    arguments = argument_parser.parse_args()
+
+    benchmark_regressions: list[tuple[str, int, str]] = compare_benchmarks(
+        arguments.reference_file, arguments.new_file, arguments.threshold
+    )
+    if benchmark_regressions:
+        sys.exit(1)
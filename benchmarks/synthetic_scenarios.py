@@ -0,0 +1,169 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module makes synthetic scenarios for the benchmarks.
+
+The synthetic scenarios are based on the truck scenario of the Mopo case
+(a hub and customer locations), with a parametrised run length and amount
+of locations. On weekdays, the trucks go from the hub to all customers
+in turn and then back to the hub. On weekends, they go to the
+first customer and back (twice). This keeps the mobility realistic
+(all locations get visited) while the run length and the amount of
+locations can be scaled independently.
+
+It contains the following functions:
+1. **make_synthetic_scenario:** Makes a synthetic scenario for a given
+run length and amount of locations.
+'''
+
+import copy
+import datetime
+import os
+
+import pandas as pd
+from box import Box
+from ETS_CookBook import ETS_CookBook as cook
+
+# The scenario the synthetic scenarios are based on
+TEMPLATE_SCENARIO_FILE: str = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'scenarios',
+    'Mopo',
+    'XX_truck.toml',
+)
+
+# The run lengths (as arguments of pd.DateOffset) the benchmarks can use
+RUN_LENGTHS: dict[str, dict[str, int]] = {
+    'week': {'weeks': 1},
+    'month': {'months': 1},
+    'year': {'years': 1},
+    'five_years': {'years': 5},
+}
+
+HUB_NAME: str = 'hub'
+CUSTOMER_ROOT: str = 'customer'
+WEEKDAY_TRIP_NAME: str = 'synthetic_weekday'
+WEEKEND_TRIP_NAME: str = 'synthetic_weekend'
+# The weekday trip has to fit in a day, so legs get shorter
+# when there are many locations
+MAXIMAL_WEEKDAY_TRIP_DRIVING_HOURS: float = 12
+TIME_BETWEEN_LEGS: float = 0.5  # hours
+
+
+def get_leg_name(start_location: str, end_location: str) -> str:
+    '''
+    Gives the name of the synthetic leg between two locations.
+    '''
+    return f'{start_location}_to_{end_location}'
+
+
+def make_synthetic_scenario(run_length: str, location_count: int) -> Box:
+    '''
+    Makes a synthetic scenario with a given run length (one of the
+    keys of RUN_LENGTHS) and amount of locations (at least two:
+    the hub and one customer).
+    '''
+    if run_length not in RUN_LENGTHS:
+        raise ValueError(
+            f'Unknown run length {run_length}, '
+            f'choose from {list(RUN_LENGTHS)}'
+        )
+    if location_count < 2:
+        raise ValueError('Synthetic scenarios need at least two locations')
+
+    template: Box = cook.parameters_from_TOML(TEMPLATE_SCENARIO_FILE)
+    scenario: Box = copy.deepcopy(template)
+    scenario.name = f'synthetic_{run_length}_{location_count}_locations'
+
+    display_start: datetime.datetime = datetime.datetime(
+        scenario.run.display_start.year,
+        scenario.run.display_start.month,
+        scenario.run.display_start.day,
+        scenario.run.display_start.hour,
+        scenario.run.display_start.minute,
+    )
+    run_end: datetime.datetime = display_start + pd.DateOffset(
+        **RUN_LENGTHS[run_length]
+    )
+    for end_parameters in [scenario.run.end, scenario.run.display_end]:
+        end_parameters.year = run_end.year
+        end_parameters.month = run_end.month
+        end_parameters.day = run_end.day
+        end_parameters.hour = run_end.hour
+        end_parameters.minute = run_end.minute
+
+    template_hub: Box = template.locations.truck_hub
+    template_customer: Box = template.locations.truck_customer
+    customer_names: list[str] = [
+        f'{CUSTOMER_ROOT}_{customer_index + 1}'
+        for customer_index in range(location_count - 1)
+    ]
+    scenario.locations = Box({HUB_NAME: copy.deepcopy(template_hub)})
+    for customer_name in customer_names:
+        customer: Box = copy.deepcopy(template_customer)
+        customer.percentage_in_location_at_run_start = 0
+        scenario.locations[customer_name] = customer
+    scenario.vehicle.base_location = HUB_NAME
+
+    weekday_route: list[str] = [HUB_NAME] + customer_names + [HUB_NAME]
+    weekday_legs: list[str] = [
+        get_leg_name(start_location, end_location)
+        for start_location, end_location in zip(
+            weekday_route[:-1], weekday_route[1:]
+        )
+    ]
+    weekend_legs: list[str] = [
+        get_leg_name(HUB_NAME, customer_names[0]),
+        get_leg_name(customer_names[0], HUB_NAME),
+    ]
+    template_leg: Box = template.legs.truck_to_customer
+    leg_duration: float = min(
+        template_leg.duration,
+        MAXIMAL_WEEKDAY_TRIP_DRIVING_HOURS / len(weekday_legs),
+    )
+    scenario.legs = Box()
+    for start_location, end_location in zip(
+        weekday_route[:-1], weekday_route[1:]
+    ):
+        leg_name: str = get_leg_name(start_location, end_location)
+        scenario.legs[leg_name] = copy.deepcopy(template_leg)
+        scenario.legs[leg_name].duration = leg_duration
+        scenario.legs[leg_name].locations.start = start_location
+        scenario.legs[leg_name].locations.end = end_location
+    for weekend_leg in weekend_legs:
+        if weekend_leg not in scenario.legs:
+            start_location, end_location = weekend_leg.split('_to_')
+            scenario.legs[weekend_leg] = copy.deepcopy(template_leg)
+            scenario.legs[weekend_leg].locations.start = start_location
+            scenario.legs[weekend_leg].locations.end = end_location
+
+    weekday_trip: Box = copy.deepcopy(template.trips.truck_weekday)
+    weekday_trip.legs = weekday_legs
+    weekday_trip.time_between_legs = [TIME_BETWEEN_LEGS] * (
+        len(weekday_legs) - 1
+    )
+    weekday_trip.repeated_sequence = []
+    weekday_trip.repetition_amounts = []
+    weekday_trip.time_between_repetitions = []
+    weekend_trip: Box = copy.deepcopy(template.trips.truck_weekend)
+    weekend_trip.legs = weekend_legs
+    weekend_trip.repeated_sequence = weekend_legs
+    scenario.trips = Box(
+        {WEEKDAY_TRIP_NAME: weekday_trip, WEEKEND_TRIP_NAME: weekend_trip}
+    )
+    scenario.mobility_module.trips_per_day_type.truck = [
+        (
+            WEEKDAY_TRIP_NAME
+            if trip_name == 'truck_weekday'
+            else WEEKEND_TRIP_NAME
+        )
+        for trip_name in template.mobility_module.trips_per_day_type.truck
+    ]
+
+    return scenario
+
+
+if __name__ == '__main__':
+    synthetic_scenario: Box = make_synthetic_scenario('week', 4)
+    print(synthetic_scenario.name)
+    print(list(synthetic_scenario.locations))
+    print(list(synthetic_scenario.legs))
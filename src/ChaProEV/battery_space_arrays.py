@@ -0,0 +1,167 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module writes the battery spaces of a location as an array file
+and reads them back.
+
+The battery spaces of a location are the largest outputs of long runs.
+Instead of a DataFrame, they can be saved as a (time tag × battery space)
+float32 array in a .npy file, with a small JSON sidecar file that has the
+battery spaces (in ascending order) and the time index (the start, the
+frequency and the hour numbers of the run). The array file is read as a
+memory map, so that readers only load the rows (time tags) and columns
+(battery spaces) that they slice.
+
+It contains the following functions:
+1. **write_battery_space_array:** Writes a battery space histogram to an
+    array file and its sidecar file.
+2. **load_battery_space_array:** Opens an array file (as a memory map)
+    and reads its sidecar file.
+3. **get_sidecar_index:** Gives the index of the battery spaces
+    (as in the battery spaces DataFrames) from the sidecar.
+4. **read_battery_spaces:** Reads a time range and some battery spaces of
+    an array file as a DataFrame.
+'''
+
+import json
+
+import numpy as np
+import pandas as pd
+from box import Box
+
+try:
+    import histograms  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import histograms  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+ARRAY_FILE_EXTENSION: str = 'npy'
+SIDECAR_FILE_EXTENSION: str = 'json'
+# The array is written in blocks of rows, so that only a block
+# is converted to float32 at a time
+WRITING_BLOCK_ROWS: int = 8760
+INDEX_NAMES: list[str] = ['Time Tag', 'Hour Number', 'SPINE_Hour_Number']
+
+
+def write_battery_space_array(
+    battery_space_histogram: histograms.BatterySpaceHistogram,
+    run_hour_numbers: list[int],
+    file_root: str,
+) -> None:
+    '''
+    Writes the values of a battery space histogram (with the run time tags
+    as index) as a float32 array (with the battery spaces in ascending
+    order) to file_root.npy, and the battery spaces and time index
+    to the file_root.json sidecar.
+    '''
+    time_tags: pd.DatetimeIndex = pd.DatetimeIndex(
+        battery_space_histogram.index
+    )
+    sorted_positions: np.ndarray = battery_space_histogram.sorted_positions
+    values: np.ndarray = battery_space_histogram.values
+    battery_space_array: np.memmap = np.lib.format.open_memmap(
+        f'{file_root}.{ARRAY_FILE_EXTENSION}',
+        mode='w+',
+        dtype=np.float32,
+        shape=(len(values), len(sorted_positions)),
+    )
+    for block_start in range(0, len(values), WRITING_BLOCK_ROWS):
+        block_end: int = block_start + WRITING_BLOCK_ROWS
+        battery_space_array[block_start:block_end] = values[
+            block_start:block_end
+        ][:, sorted_positions]
+    battery_space_array.flush()
+    del battery_space_array
+
+    sidecar: dict = {
+        'battery_spaces': battery_space_histogram.spaces.tolist(),
+        'time_start': time_tags[0].isoformat(),
+        'time_frequency': time_tags.freqstr or pd.infer_freq(time_tags),
+        'hour_numbers': [int(hour_number) for hour_number in run_hour_numbers],
+    }
+    with open(f'{file_root}.{SIDECAR_FILE_EXTENSION}', 'w') as sidecar_file:
+        json.dump(sidecar, sidecar_file)
+
+
+def load_battery_space_array(file_root: str) -> tuple[np.memmap, Box]:
+    '''
+    Opens the array file of battery spaces (as a read-only memory map,
+    so nothing is loaded yet) and reads its sidecar file.
+    '''
+    battery_space_array: np.memmap = np.load(
+        f'{file_root}.{ARRAY_FILE_EXTENSION}', mmap_mode='r'
+    )
+    with open(f'{file_root}.{SIDECAR_FILE_EXTENSION}') as sidecar_file:
+        sidecar: Box = Box(json.load(sidecar_file))
+    return battery_space_array, sidecar
+
+
+def get_sidecar_index(sidecar: Box) -> pd.MultiIndex:
+    '''
+    Gives the index of the battery spaces (time tags, hour numbers and
+    SPINE hour numbers, as in the battery spaces DataFrames)
+    from a sidecar.
+    '''
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        sidecar.time_start,
+        periods=len(sidecar.hour_numbers),
+        freq=sidecar.time_frequency,
+    )
+    return pd.MultiIndex.from_arrays(
+        [
+            time_tags,
+            sidecar.hour_numbers,
+            [f't{hour_number:04}' for hour_number in sidecar.hour_numbers],
+        ],
+        names=INDEX_NAMES,
+    )
+
+
+def read_battery_spaces(
+    file_root: str,
+    start: pd.Timestamp | str | None = None,
+    end: pd.Timestamp | str | None = None,
+    battery_spaces: list[float] | None = None,
+) -> pd.DataFrame:
+    '''
+    Reads the battery spaces of an array file as a DataFrame (with the
+    same index and column names as the battery spaces DataFrames), for
+    the time tags from the start and before the end (if given) and for
+    some battery spaces (all of them if None). Only these rows and
+    columns are read from the file.
+    '''
+    battery_space_array, sidecar = load_battery_space_array(file_root)
+    index: pd.MultiIndex = get_sidecar_index(sidecar)
+    time_tags: pd.Index = index.get_level_values('Time Tag')
+    first_row: int = 0
+    if start is not None:
+        first_row = int(time_tags.searchsorted(pd.Timestamp(start)))
+    end_row: int = len(time_tags)
+    if end is not None:
+        end_row = int(time_tags.searchsorted(pd.Timestamp(end)))
+    all_battery_spaces: np.ndarray = np.array(sidecar.battery_spaces)
+    if battery_spaces is None:
+        column_positions: np.ndarray = np.arange(len(all_battery_spaces))
+    else:
+        column_positions = np.searchsorted(all_battery_spaces, battery_spaces)
+        if not np.array_equal(
+            all_battery_spaces[
+                np.minimum(column_positions, len(all_battery_spaces) - 1)
+            ],
+            battery_spaces,
+        ):
+            raise ValueError(f'{file_root} does not have these battery spaces')
+    return pd.DataFrame(
+        battery_space_array[first_row:end_row, column_positions],
+        index=index[first_row:end_row],
+        columns=[
+            str(battery_space)
+            for battery_space in all_battery_spaces[column_positions].tolist()
+        ],
+    )
@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import os
 import typing as ty
 
 import numpy as np
@@ -21,6 +23,34 @@ except ModuleNotFoundError:
 # we are importing again
 
 
+try:
+    import histograms  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import histograms  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+
+try:
+    import kernels  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import kernels  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+
 try:
     import mobility  # type: ignore
 
@@ -34,6 +64,32 @@ except ModuleNotFoundError:
 # We need to add to type: ignore thing to avoid MypY thinking
 # we are importing again
 
+try:
+    import writing  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import writing  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+try:
+    import battery_space_arrays  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import battery_space_arrays  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
 
 def get_time_modulation(
     run_range: pd.DatetimeIndex, scenario: Box, general_parameters: Box
@@ -120,6 +176,27 @@ def get_charging_modulation(
     return charging_modulation
 
 
+def get_leg_tuple_array(
+    run_mobility_quantity: pd.Series,
+    mobility_location_tuples: list[tuple[str, str]],
+    run_range: pd.DatetimeIndex,
+) -> np.ndarray:
+    '''
+    Puts a quantity of the run mobility matrix into an array with
+    the leg tuples (origin/destination) as rows (in the order of the
+    mobility location tuples) and the time tags of the run as columns.
+    '''
+    return np.array(
+        [
+            run_mobility_quantity.loc[mobility_location_tuple]
+            .reindex(run_range)
+            .values
+            for mobility_location_tuple in mobility_location_tuples
+        ],
+        dtype=float,
+    ).reshape(len(mobility_location_tuples), len(run_range))
+
+
 def get_charging_framework(
     location_split: pd.DataFrame,
     run_mobility_matrix: pd.DataFrame,
@@ -127,16 +204,17 @@ def get_charging_framework(
     case_name: str,
     general_parameters: Box,
 ) -> tuple[
-    dict[str, pd.DataFrame],
+    dict[str, histograms.BatterySpaceHistogram],
     pd.DatetimeIndex,
     pd.DataFrame,
     pd.DataFrame,
     pd.DataFrame,
-    pd.Series,
-    pd.Series,
-    pd.Series,
-    pd.Series,
-    pd.DataFrame,
+    np.ndarray,
+    np.ndarray,
+    np.ndarray,
+    np.ndarray,
+    np.ndarray,
+    histograms.BatterySpaceHistogram,
     pd.DataFrame,
     pd.DataFrame,
 ]:
@@ -176,44 +254,25 @@ def get_charging_framework(
     # We create a dictionary of various battery spaces that are available
     # at each charging location (i.e. percent of vehicles with
     # a given battery space per location) (locations are keys and
-    # battery space dataframes are dictionary entries)
-    battery_spaces: dict[str, pd.DataFrame] = {}
+    # battery space histograms are dictionary entries)
+    # A non-zero resolution snaps the battery spaces to a grid (in kWh)
+    # to limit the amount of battery spaces
+    battery_space_resolution: float = scenario.charging.get(
+        'battery_space_resolution_kWh', 0
+    )
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram] = {}
     for location_name in location_names:
-        battery_spaces[location_name] = pd.DataFrame(
-            run_range, columns=['Time Tag']
+        battery_spaces[location_name] = histograms.BatterySpaceHistogram(
+            run_range.rename('Time Tag'), resolution=battery_space_resolution
+        )
+        battery_spaces[location_name].set(
+            0, float(0), location_split.loc[run_range[0]][location_name]
         )
-        # battery_spaces[0] float(0)
-        battery_spaces[location_name] = battery_spaces[
-            location_name
-        ].set_index(['Time Tag'])
-        battery_spaces[location_name][float(0)] = float(0)
-
-        battery_spaces[location_name].loc[
-            run_range[0], 0
-        ] = location_split.loc[run_range[0]][location_name]
     total_battery_space_per_location: pd.DataFrame = pd.DataFrame(
         index=run_range, columns=location_names
     )
     total_battery_space_per_location.index.name = 'Time Tag'
 
-    run_arrivals_impact: pd.Series = run_mobility_matrix[
-        'Arrivals impact'
-    ].copy()
-
-    run_arrivals_impact_gaps: pd.Series = pd.Series(
-        np.zeros(len(run_arrivals_impact.index)),
-        index=run_arrivals_impact.index,
-    )
-
-    run_departures_impact: pd.Series = run_mobility_matrix[
-        'Departures impact'
-    ].copy()
-
-    run_departures_impact_gaps: pd.Series = pd.Series(
-        np.zeros(len(run_departures_impact.index)),
-        index=run_departures_impact.index,
-    )
-
     # We create the Dataframes for the charge drawn
     charge_drawn_by_vehicles: pd.DataFrame = pd.DataFrame(
         np.zeros((len(run_range), len(location_names))),
@@ -234,10 +293,36 @@ def get_charging_framework(
     mobility_locations_index: pd.MultiIndex = pd.MultiIndex.from_tuples(
         mobility_location_tuples, names=['Origin', 'Destination']
     )
-    travelling_battery_spaces: pd.DataFrame = pd.DataFrame(
-        np.zeros([len(mobility_locations_index), 1]),
-        columns=[float(0)],
-        index=mobility_locations_index,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram = (
+        histograms.BatterySpaceHistogram(
+            mobility_locations_index, resolution=battery_space_resolution
+        )
+    )
+
+    # The impacts, their gaps and the leg distances are read at each
+    # time tag, so we put them in arrays with a row per leg tuple
+    # (in the same order as the rows of the travelling battery spaces)
+    # and a column per time tag
+    run_arrivals_impact: np.ndarray = get_leg_tuple_array(
+        run_mobility_matrix['Arrivals impact'],
+        mobility_location_tuples,
+        run_range,
+    )
+    run_arrivals_impact_gaps: np.ndarray = np.zeros(
+        np.shape(run_arrivals_impact)
+    )
+    run_departures_impact: np.ndarray = get_leg_tuple_array(
+        run_mobility_matrix['Departures impact'],
+        mobility_location_tuples,
+        run_range,
+    )
+    run_departures_impact_gaps: np.ndarray = np.zeros(
+        np.shape(run_departures_impact)
+    )
+    run_leg_distances: np.ndarray = get_leg_tuple_array(
+        run_mobility_matrix['Distance (km)'],
+        mobility_location_tuples,
+        run_range,
     )
     charging_modulation: pd.DataFrame = get_charging_modulation(
         run_range, scenario, general_parameters
@@ -253,6 +338,7 @@ def get_charging_framework(
         run_arrivals_impact_gaps,
         run_departures_impact,
         run_departures_impact_gaps,
+        run_leg_distances,
         travelling_battery_spaces,
         total_battery_space_per_location,
         charging_modulation,
@@ -262,22 +348,33 @@ def get_charging_framework(
 def impact_of_departures(
     scenario: Box,
     time_tag: datetime.datetime,
-    battery_spaces: dict[str, pd.DataFrame],
+    time_tag_index: int,
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     start_location: str,
     end_location: str,
-    run_departures_impact: pd.Series,
-    travelling_battery_spaces,  # it's a DataFarame but MyPy gives an error,
+    run_departures_impact: np.ndarray,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram,
     zero_threshold: float,
-    run_mobility_matrix,  # it's a DataFarame but MyPy gives an error,
-) -> tuple[dict[str, pd.DataFrame], pd.DataFrame, float]:
-    time_tag_departures_impact: float = run_departures_impact.loc[
-        start_location, end_location, time_tag
+    run_leg_distances: np.ndarray,
+    use_numba: bool = False,
+) -> tuple[
+    dict[str, histograms.BatterySpaceHistogram],
+    histograms.BatterySpaceHistogram,
+    float,
+]:
+    # The leg tuples are in the same order in the travelling battery spaces
+    # and in the impact arrays
+    leg_tuple_index: int = travelling_battery_spaces.row_position(
+        (start_location, end_location)
+    )
+    time_tag_departures_impact: float = run_departures_impact[
+        leg_tuple_index, time_tag_index
     ]
 
     departures_gap: float = max(
         0,
-        run_departures_impact.loc[start_location, end_location, time_tag]
-        - battery_spaces[start_location].sum(axis=1).loc[time_tag],
+        run_departures_impact[leg_tuple_index, time_tag_index]
+        - battery_spaces[start_location].row_sum(time_tag_index),
     )
 
     if time_tag_departures_impact > zero_threshold:
@@ -285,131 +382,174 @@ def impact_of_departures(
         # and sort them. The lowest battery spaces will be first.
         # These are the ones we assume are more likely to leave,
         # as others might want to charge first.
-        departing_battery_spaces: list[float] = sorted(
-            battery_spaces[start_location].columns.values
-        )
+        departing_battery_spaces: np.ndarray = battery_spaces[
+            start_location
+        ].spaces
+        departing_positions: np.ndarray = battery_spaces[
+            start_location
+        ].sorted_positions
+        # No battery spaces get added at the start location here,
+        # so we can work on its values directly
+        start_location_values: np.ndarray = battery_spaces[
+            start_location
+        ].values
 
-        # We iterate through the departing battery spaces
-        # (reminder, they are ordered from lowest to highest,
-        # as we assumed that the lower the battery space, the higher
-        # the likelihood to leave, as vehicleswith more battery space/
-        # less available battery capacity wll want to charge first).
-
-        for departing_battery_space in departing_battery_spaces:
-            # We will be removing the departures from the lower
-            # battery spaces from the pool, until we have reached
-            # all departures. For example, if we have 0.2 departures
-            # and 0.19 vehicles with space equal to zero, 0.2 vehicles
-            # with space 1, and 0.3 vehicles with space 1.6,
-            # then we will first take all the
-            # 0.19 vehicles with space 0,
-            # 0.01 vehicles with space 1,
-            # and 0 vehicles with space 1.6,
-            # leaving us with 0 vehicles wth space 0,
-            # 0.19 vehicles with
-            # space 1, and 0.3 vehicles with space 1.6
-            if time_tag_departures_impact > zero_threshold:
-                # We do this until there are no departures left
-
-                # We want to know how many departures will come from
-                # the battery space we are looking at. If there are
-                # more vehicles with the current space than remaining
-                # departures, then we take the remaining departures,
-                # otherwise we take all the vehicles with the current
-                # space and move to the next one
-                # This needs to be done separately for the current
-                # time slot and the next one
-                # (because of the issue of effective impact, as
-                # some vehicles stay some of the time)
-
-                this_battery_space_departures_impact_this_time: float = min(
-                    time_tag_departures_impact,
-                    battery_spaces[start_location].at[
-                        time_tag, departing_battery_space
-                    ],  # type: ignore
-                )
+        if use_numba:
+            # The kernel takes the departures from the lowest battery
+            # spaces (as in the loop below), and we then add them to
+            # the travelling battery spaces
+            (
+                departures_per_battery_space,
+                departing_battery_spaces_reached,
+            ) = kernels.take_from_lowest_battery_spaces(
+                start_location_values[time_tag_index],
+                departing_positions,
+                time_tag_departures_impact,
+                zero_threshold,
+            )
+            leg_consumption: float = (
+                run_leg_distances[leg_tuple_index, time_tag_index]
+                * scenario.vehicle['base_consumption_per_km'].electricity_kWh
+            )
+            for departing_battery_space, departures in zip(
+                departing_battery_spaces[:departing_battery_spaces_reached],
+                departures_per_battery_space[
+                    :departing_battery_spaces_reached
+                ],
+            ):
+                if departures > zero_threshold:
+                    travelling_battery_spaces.add(
+                        leg_tuple_index,
+                        departing_battery_space + leg_consumption,
+                        departures,
+                    )
+        else:
+            # We iterate through the departing battery spaces
+            # (reminder, they are ordered from lowest to highest,
+            # as we assumed that the lower the battery space, the higher
+            # the likelihood to leave, as vehicleswith more battery space/
+            # less available battery capacity wll want to charge first).
+
+            for departing_battery_space, departing_position in zip(
+                departing_battery_spaces, departing_positions
+            ):
+                # We will be removing the departures from the lower
+                # battery spaces from the pool, until we have reached
+                # all departures. For example, if we have 0.2 departures
+                # and 0.19 vehicles with space equal to zero, 0.2 vehicles
+                # with space 1, and 0.3 vehicles with space 1.6,
+                # then we will first take all the
+                # 0.19 vehicles with space 0,
+                # 0.01 vehicles with space 1,
+                # and 0 vehicles with space 1.6,
+                # leaving us with 0 vehicles wth space 0,
+                # 0.19 vehicles with
+                # space 1, and 0.3 vehicles with space 1.6
+                if time_tag_departures_impact > zero_threshold:
+                    # We do this until there are no departures left
+
+                    # We want to know how many departures will come from
+                    # the battery space we are looking at. If there are
+                    # more vehicles with the current space than remaining
+                    # departures, then we take the remaining departures,
+                    # otherwise we take all the vehicles with the current
+                    # space and move to the next one
+                    # This needs to be done separately for the current
+                    # time slot and the next one
+                    # (because of the issue of effective impact, as
+                    # some vehicles stay some of the time)
+
+                    this_battery_space_departures_impact_this_time: float = (
+                        min(
+                            time_tag_departures_impact,
+                            start_location_values[
+                                time_tag_index, departing_position
+                            ],
+                        )
+                    )
 
-                # We update the departures (i.e. how many remain
-                # for larger battery spaces)
-                time_tag_departures_impact -= (
-                    this_battery_space_departures_impact_this_time
-                )
+                    # We update the departures (i.e. how many remain
+                    # for larger battery spaces)
+                    time_tag_departures_impact -= (
+                        this_battery_space_departures_impact_this_time
+                    )
 
-                # We remove the departures from the start
-                # location for the current time slot
-                battery_spaces[start_location].loc[
-                    time_tag, departing_battery_space
-                ] = (
-                    battery_spaces[start_location].loc[time_tag][
-                        departing_battery_space
-                    ]
-                    - this_battery_space_departures_impact_this_time
-                )
+                    # We remove the departures from the start
+                    # location for the current time slot
+                    start_location_values[
+                        time_tag_index, departing_position
+                    ] = (
+                        start_location_values[
+                            time_tag_index, departing_position
+                        ]
+                        - this_battery_space_departures_impact_this_time
+                    )
 
-                # We also add these departures to the travelling battery spaces
+                    # We also add these departures to the travelling
+                    # battery spaces
 
-                # We we also need the consumption of the leg
-                leg_distance: float = run_mobility_matrix.loc[
-                    start_location, end_location, time_tag
-                ]['Distance (km)']
-                vehicle_electricity_consumption: float = scenario.vehicle[
-                    'base_consumption_per_km'
-                ].electricity_kWh
+                    # We we also need the consumption of the leg
+                    leg_distance: float = run_leg_distances[
+                        leg_tuple_index, time_tag_index
+                    ]
+                    vehicle_electricity_consumption: float = scenario.vehicle[
+                        'base_consumption_per_km'
+                    ].electricity_kWh
 
-                this_leg_consumption: float = (
-                    leg_distance * vehicle_electricity_consumption
-                )
-                travelling_battery_space: float = (
-                    departing_battery_space + this_leg_consumption
-                )
+                    this_leg_consumption: float = (
+                        leg_distance * vehicle_electricity_consumption
+                    )
+                    travelling_battery_space: float = (
+                        departing_battery_space + this_leg_consumption
+                    )
 
-                if (
-                    this_battery_space_departures_impact_this_time
-                    > zero_threshold
-                ):
                     if (
-                        travelling_battery_space
-                        not in travelling_battery_spaces.columns
+                        this_battery_space_departures_impact_this_time
+                        > zero_threshold
                     ):
-                        travelling_battery_spaces[
-                            float(travelling_battery_space)
-                        ] = float(0)
-
-                    travelling_battery_spaces.loc[
-                        (start_location, end_location),
-                        travelling_battery_space,
-                    ] = (
-                        travelling_battery_spaces.loc[
-                            start_location, end_location
-                        ][travelling_battery_space]
-                        + this_battery_space_departures_impact_this_time
-                    )
+                        travelling_battery_spaces.add(
+                            leg_tuple_index,
+                            travelling_battery_space,
+                            this_battery_space_departures_impact_this_time,
+                        )
 
     return battery_spaces, travelling_battery_spaces, departures_gap
 
 
 def impact_of_arrivals(
     time_tag: datetime.datetime,
-    battery_spaces: dict[str, pd.DataFrame],
+    time_tag_index: int,
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     start_location: str,
     end_location: str,
-    run_arrivals_impact: pd.Series,
-    travelling_battery_spaces,  #: It's a DataFrame, but MyPy gives an error (
-    # due to the MultiIndex)
+    run_arrivals_impact: np.ndarray,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram,
     zero_threshold: float,
-) -> tuple[dict[str, pd.DataFrame], pd.DataFrame, float]:
-    time_tag_arrivals_impact: float = run_arrivals_impact.loc[
-        start_location, end_location, time_tag
-    ]
-
-    battery_spaces_arriving_to_this_location = travelling_battery_spaces.loc[
+    use_numba: bool = False,
+) -> tuple[
+    dict[str, histograms.BatterySpaceHistogram],
+    histograms.BatterySpaceHistogram,
+    float,
+]:
+    # The leg tuples are in the same order in the travelling battery spaces
+    # and in the impact arrays
+    leg_tuple_index: int = travelling_battery_spaces.row_position(
         (start_location, end_location)
+    )
+    time_tag_arrivals_impact: float = run_arrivals_impact[
+        leg_tuple_index, time_tag_index
     ]
 
+    # No battery spaces get added to the travelling battery spaces here,
+    # so we can work on their values directly
+    battery_spaces_arriving_to_this_location: np.ndarray = (
+        travelling_battery_spaces.values[leg_tuple_index]
+    )
+
     arrivals_gap: float = max(
         0,
         time_tag_arrivals_impact
-        - sum(battery_spaces_arriving_to_this_location),
+        - battery_spaces_arriving_to_this_location.sum(),
     )
 
     if time_tag_arrivals_impact > zero_threshold:
@@ -417,84 +557,96 @@ def impact_of_arrivals(
         # location. We sort them by size, as the ones with a lower
         # battery space are more likely to have left their origin first
 
-        arriving_battery_spaces: list[float] = sorted(
-            travelling_battery_spaces.loc[start_location, end_location].index
+        arriving_battery_spaces: np.ndarray = travelling_battery_spaces.spaces
+        arriving_positions: np.ndarray = (
+            travelling_battery_spaces.sorted_positions
         )
 
-        # We iterate through the arriving battery spaces
-        # (reminder, they are ordered from lowest to highest,
-        # as we assumed that the lower the battery space, the higher
-        # the likelihood to leave, as vehicles with more battery space/
-        # less available battery capacity wll want to charge first).
-
-        for arriving_battery_space in arriving_battery_spaces:
-            # We will be removing the arrivals from the lower
-            # battery spaces from the pool, until we have reached
-            # all arrivals. For example, if we have 0.2 arrivals
-            # and 0.19 vehicles with space equal to zero, 0.2 vehicles
-            # with space 1, and 0.3 vehicles with space 1.6,
-            # then we will first take all the
-            # 0.19 vehicles with space 0,
-            # 0.01 vehicles with space 1,
-            # and 0 vehicles with space 1.6,
-            # leaving us with 0 vehicles wth space 0,
-            # 0.19 vehicles with
-            # space 1, and 0.3 vehicles with space 1.6
-            if time_tag_arrivals_impact > zero_threshold:
-                # We do this until there are no departures left
-                # We look at how much impact the travelling spaces
-                # can have (it cannot be more than the arrivals impact from
-                # the mobility matrix)
-                this_battery_space_arrivals_impact_this_time: float = min(
-                    time_tag_arrivals_impact,
-                    battery_spaces_arriving_to_this_location.loc[
-                        arriving_battery_space
-                    ],
+        if use_numba:
+            # The kernel takes the arrivals from the lowest travelling
+            # battery spaces (as in the loop below), and we then add them
+            # to the end location
+            (
+                arrivals_per_battery_space,
+                arriving_battery_spaces_reached,
+            ) = kernels.take_from_lowest_battery_spaces(
+                battery_spaces_arriving_to_this_location,
+                arriving_positions,
+                time_tag_arrivals_impact,
+                zero_threshold,
+            )
+            for arriving_battery_space, arrivals in zip(
+                arriving_battery_spaces[:arriving_battery_spaces_reached],
+                arrivals_per_battery_space[:arriving_battery_spaces_reached],
+            ):
+                battery_spaces[end_location].add(
+                    time_tag_index, arriving_battery_space, arrivals
                 )
+        else:
+            # We iterate through the arriving battery spaces
+            # (reminder, they are ordered from lowest to highest,
+            # as we assumed that the lower the battery space, the higher
+            # the likelihood to leave, as vehicles with more battery space/
+            # less available battery capacity wll want to charge first).
+
+            for arriving_battery_space, arriving_position in zip(
+                arriving_battery_spaces, arriving_positions
+            ):
+                # We will be removing the arrivals from the lower
+                # battery spaces from the pool, until we have reached
+                # all arrivals. For example, if we have 0.2 arrivals
+                # and 0.19 vehicles with space equal to zero, 0.2 vehicles
+                # with space 1, and 0.3 vehicles with space 1.6,
+                # then we will first take all the
+                # 0.19 vehicles with space 0,
+                # 0.01 vehicles with space 1,
+                # and 0 vehicles with space 1.6,
+                # leaving us with 0 vehicles wth space 0,
+                # 0.19 vehicles with
+                # space 1, and 0.3 vehicles with space 1.6
+                if time_tag_arrivals_impact > zero_threshold:
+                    # We do this until there are no departures left
+                    # We look at how much impact the travelling spaces
+                    # can have (it cannot be more than the arrivals impact from
+                    # the mobility matrix)
+                    this_battery_space_arrivals_impact_this_time: float = min(
+                        time_tag_arrivals_impact,
+                        battery_spaces_arriving_to_this_location[
+                            arriving_position
+                        ],
+                    )
 
-                # We update the arrivals:
-                time_tag_arrivals_impact -= (
-                    this_battery_space_arrivals_impact_this_time
-                )
-                # We update the battery spaces:
-                if (
-                    arriving_battery_space
-                    not in battery_spaces[end_location].columns.values
-                ):
-                    battery_spaces[end_location][
-                        arriving_battery_space
-                    ] = float(0)
-
-                battery_spaces[end_location].loc[
-                    time_tag, arriving_battery_space
-                ] = (
-                    battery_spaces[end_location].loc[time_tag][
-                        arriving_battery_space
-                    ]
-                    + this_battery_space_arrivals_impact_this_time
-                )
+                    # We update the arrivals:
+                    time_tag_arrivals_impact -= (
+                        this_battery_space_arrivals_impact_this_time
+                    )
+                    # We update the battery spaces:
+                    battery_spaces[end_location].add(
+                        time_tag_index,
+                        arriving_battery_space,
+                        this_battery_space_arrivals_impact_this_time,
+                    )
 
-                # We alo update the travelling battery spaces (as they have
-                # arrived)
-                travelling_battery_spaces.loc[
-                    (start_location, end_location), arriving_battery_space
-                ] = (
-                    travelling_battery_spaces.loc[
-                        start_location, end_location
-                    ][arriving_battery_space]
-                    - this_battery_space_arrivals_impact_this_time
-                )
+                    # We alo update the travelling battery spaces (as they have
+                    # arrived)
+                    battery_spaces_arriving_to_this_location[
+                        arriving_position
+                    ] = (
+                        battery_spaces_arriving_to_this_location[
+                            arriving_position
+                        ]
+                        - this_battery_space_arrivals_impact_this_time
+                    )
 
     return battery_spaces, travelling_battery_spaces, arrivals_gap
 
 
 def travel_space_occupation(
     scenario: Box,
-    battery_spaces: dict[str, pd.DataFrame],
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     time_tag: datetime.datetime,
     time_tag_index: int,
-    run_mobility_matrix,  # This is a DataFrame, but MyPy has issues with it
-    # These issues might have to do with MultiIndex,
+    run_leg_distances: np.ndarray,
     zero_threshold: float,
     location_names: list[str],
     possible_destinations: dict[str, list[str]],
@@ -502,23 +654,36 @@ def travel_space_occupation(
     use_day_types_in_charge_computing: bool,
     day_start_hour: int,
     location_split: pd.DataFrame,
-    run_arrivals_impact: pd.Series,
-    run_arrivals_impact_gaps: pd.Series,
-    run_departures_impact: pd.Series,
-    run_departures_impact_gaps: pd.Series,
+    run_arrivals_impact: np.ndarray,
+    run_arrivals_impact_gaps: np.ndarray,
+    run_departures_impact: np.ndarray,
+    run_departures_impact_gaps: np.ndarray,
     run_range: pd.DatetimeIndex,
-    travelling_battery_spaces: pd.DataFrame,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram,
     use_spillover: bool = False,
-) -> dict[str, pd.DataFrame]:
+    use_numba: bool = False,
+) -> dict[str, histograms.BatterySpaceHistogram]:
+    # We keep track of the gaps per location for this time tag
+    # as we add them, so that we do not need to aggregate the gaps
+    # of all legs afterwards
+    departures_gaps_per_location: dict[str, float] = {
+        location_name: float(0) for location_name in location_names
+    }
+    arrivals_gaps_per_location: dict[str, float] = {
+        location_name: float(0) for location_name in location_names
+    }
     for location_to_compute in location_names:
         if time_tag_index > 0:
             # We add the values from the previous time tag to
             # the battery space. We do so because travels can propagate to
             # future time tags. I f we just copied the value from
             # the previous time tag, we would delete these
-            battery_spaces[location_to_compute].iloc[time_tag_index] = (
-                battery_spaces[location_to_compute].iloc[time_tag_index]
-                + battery_spaces[location_to_compute].iloc[time_tag_index - 1]
+            location_battery_spaces: np.ndarray = battery_spaces[
+                location_to_compute
+            ].values
+            location_battery_spaces[time_tag_index] = (
+                location_battery_spaces[time_tag_index]
+                + location_battery_spaces[time_tag_index - 1]
             )
 
         if (
@@ -526,9 +691,11 @@ def travel_space_occupation(
             and (time_tag.hour == day_start_hour)
             and not use_spillover
         ):
-            battery_spaces[location_to_compute].loc[
-                time_tag, 0
-            ] = location_split.loc[time_tag][location_to_compute]
+            battery_spaces[location_to_compute].set(
+                time_tag_index,
+                float(0),
+                location_split.loc[time_tag][location_to_compute],
+            )
 
         # We need to look at the impact of arrivals first
         # because if we look at departures first, we might go wrong,
@@ -542,17 +709,23 @@ def travel_space_occupation(
                 arrivals_gap,
             ) = impact_of_arrivals(
                 time_tag,
+                time_tag_index,
                 battery_spaces,
                 start_location,
                 location_to_compute,
                 run_arrivals_impact,
                 travelling_battery_spaces,
                 zero_threshold,
+                use_numba,
             )
 
-            run_arrivals_impact_gaps.loc[
-                start_location, location_to_compute, time_tag
+            run_arrivals_impact_gaps[
+                travelling_battery_spaces.row_position(
+                    (start_location, location_to_compute)
+                ),
+                time_tag_index,
             ] += arrivals_gap
+            arrivals_gaps_per_location[location_to_compute] += arrivals_gap
 
         for end_location in possible_destinations[location_to_compute]:
             (
@@ -562,30 +735,32 @@ def travel_space_occupation(
             ) = impact_of_departures(
                 scenario,
                 time_tag,
+                time_tag_index,
                 battery_spaces,
                 location_to_compute,
                 end_location,
                 run_departures_impact,
                 travelling_battery_spaces,
                 zero_threshold,
-                run_mobility_matrix,
+                run_leg_distances,
+                use_numba,
             )
 
-            run_departures_impact_gaps.loc[
-                location_to_compute, end_location, time_tag
+            run_departures_impact_gaps[
+                travelling_battery_spaces.row_position(
+                    (location_to_compute, end_location)
+                ),
+                time_tag_index,
             ] += departures_gap
+            departures_gaps_per_location[location_to_compute] += departures_gap
 
     for location_to_compute in location_names:
-        this_time_tag_departures_gap: float = (
-            run_departures_impact_gaps.groupby(['From', 'Time Tag'])
-            .sum()
-            .loc[location_to_compute, time_tag]
-        )
-        this_time_tag_arrivals_gap: float = (
-            run_arrivals_impact_gaps.groupby(['To', 'Time Tag'])
-            .sum()
-            .loc[location_to_compute, time_tag]
-        )
+        this_time_tag_departures_gap: float = departures_gaps_per_location[
+            location_to_compute
+        ]
+        this_time_tag_arrivals_gap: float = arrivals_gaps_per_location[
+            location_to_compute
+        ]
 
         if (
             max(this_time_tag_arrivals_gap, this_time_tag_departures_gap)
@@ -602,12 +777,14 @@ def travel_space_occupation(
                     arrivals_gap,
                 ) = impact_of_arrivals(
                     time_tag,
+                    time_tag_index,
                     battery_spaces,
                     start_location,
                     location_to_compute,
                     run_arrivals_impact_gaps,
                     travelling_battery_spaces,
                     zero_threshold,
+                    use_numba,
                 )
 
             for end_location in possible_destinations[location_to_compute]:
@@ -618,145 +795,152 @@ def travel_space_occupation(
                 ) = impact_of_departures(
                     scenario,
                     time_tag,
+                    time_tag_index,
                     battery_spaces,
                     location_to_compute,
                     end_location,
                     run_departures_impact_gaps,
                     travelling_battery_spaces,
                     zero_threshold,
-                    run_mobility_matrix,
+                    run_leg_distances,
+                    use_numba,
                 )
 
     return battery_spaces
 
 
 def compute_charging_events(
-    battery_spaces: dict[str, pd.DataFrame],
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     charge_drawn_by_vehicles: pd.DataFrame,
     charge_drawn_from_network: pd.DataFrame,
     time_tag: datetime.datetime,
+    time_tag_index: int,
     scenario: Box,
     general_parameters: Box,
     location_names: list[str],
     charging_modulation: pd.DataFrame,
-) -> tuple[dict[str, pd.DataFrame], pd.DataFrame, pd.DataFrame]:
+) -> tuple[
+    dict[str, histograms.BatterySpaceHistogram], pd.DataFrame, pd.DataFrame
+]:
     zero_threshold: float = general_parameters.numbers.zero_threshold
     location_parameters: Box = scenario.locations
 
-    for charging_location in location_names:
-        charging_location_parameters: Box = location_parameters[
-            charging_location
-        ]
-
-        charger_efficiency: float = (
-            charging_location_parameters.charger_efficiency
+    charger_efficiencies: np.ndarray = np.array(
+        [
+            location_parameters[charging_location].charger_efficiency
+            for charging_location in location_names
+        ],
+        dtype=float,
+    )
+    percent_charging: np.ndarray = np.array(
+        [
+            location_parameters[charging_location].connectivity
+            for charging_location in location_names
+        ],
+        dtype=float,
+    )
+    location_charging_powers: np.ndarray = np.array(
+        [
+            location_parameters[charging_location].charging_power
+            for charging_location in location_names
+        ],
+        dtype=float,
+    )
+    location_modulated_charging_powers: np.ndarray = (
+        location_charging_powers
+        * charging_modulation.loc[time_tag, location_names].values.astype(
+            float
         )
+    )
 
-        percent_charging: float = charging_location_parameters.connectivity
-        location_charging_power: float = float(
-            charging_location_parameters.charging_power
+    # We put the battery spaces of all locations (in ascending order
+    # for each location) after one another, and keep track of
+    # the location each of them belongs to
+    location_battery_spaces: list[np.ndarray] = []
+    location_vehicles: list[np.ndarray] = []
+    for charging_location in location_names:
+        location_battery_spaces.append(
+            battery_spaces[charging_location].spaces
         )
-        location_modulated_charging_power: float = location_charging_power * float(
-            charging_modulation.loc[time_tag][
-                charging_location
-            ]  # type: ignore
-        )  # type: ignore
-
-        # This variable is useful if new battery spaces
-        # are added within this charging procedure
-        original_battery_spaces: np.ndarray = battery_spaces[
-            charging_location
-        ].columns.values
-        charge_drawn_per_charging_vehicle: np.ndarray = np.array(
-            [
-                min(this_battery_space, location_modulated_charging_power)
-                for this_battery_space in original_battery_spaces
+        location_vehicles.append(
+            battery_spaces[charging_location].values[
+                time_tag_index,
+                battery_spaces[charging_location].sorted_positions,
             ]
         )
-        network_charge_drawn_per_charging_vehicle: np.ndarray = (
-            charge_drawn_per_charging_vehicle / charger_efficiency
-        )
+    location_ids: np.ndarray = np.repeat(
+        np.arange(len(location_names)),
+        [
+            len(this_location_battery_spaces)
+            for this_location_battery_spaces in location_battery_spaces
+        ],
+    )
+    original_battery_spaces: np.ndarray = np.concatenate(
+        location_battery_spaces
+    )
 
-        vehicles_charging: ty.Any = (
-            percent_charging * battery_spaces[charging_location].loc[time_tag]
-        )  # It is a float, but MyPy does not get it
-
-        charge_drawn_by_vehicles_this_time_tag_per_battery_space: (
-            pd.Series[float] | pd.DataFrame
-        ) = (vehicles_charging * charge_drawn_per_charging_vehicle)
-        charge_drawn_by_vehicles_this_time_tag: float | pd.Series[float] = (
-            charge_drawn_by_vehicles_this_time_tag_per_battery_space
-        ).sum()
-
-        network_charge_drawn_by_vehicles_this_time_tag_per_battery_space: (
-            pd.Series[float] | pd.DataFrame
-        ) = (vehicles_charging * network_charge_drawn_per_charging_vehicle)
-        network_charge_drawn_by_vehicles_this_time_tag: (
-            float | pd.Series[float]
-        ) = (
-            network_charge_drawn_by_vehicles_this_time_tag_per_battery_space
-        ).sum()
-
-        # We only do the charge computations if there is a charge to be drawn
-        if (
-            charge_drawn_by_vehicles_this_time_tag > zero_threshold
-        ):  # type: ignore
-            charge_drawn_by_vehicles.loc[time_tag, charging_location] = (
-                charge_drawn_by_vehicles.loc[time_tag][charging_location]
-                + charge_drawn_by_vehicles_this_time_tag
-            )
+    charge_drawn_per_charging_vehicle: np.ndarray = np.minimum(
+        original_battery_spaces,
+        location_modulated_charging_powers[location_ids],
+    )
+    network_charge_drawn_per_charging_vehicle: np.ndarray = (
+        charge_drawn_per_charging_vehicle / charger_efficiencies[location_ids]
+    )
+    vehicles_charging: np.ndarray = percent_charging[
+        location_ids
+    ] * np.concatenate(location_vehicles)
+
+    charge_drawn_by_vehicles_this_time_tag: np.ndarray = np.bincount(
+        location_ids,
+        weights=vehicles_charging * charge_drawn_per_charging_vehicle,
+        minlength=len(location_names),
+    )
+    network_charge_drawn_by_vehicles_this_time_tag: np.ndarray = np.bincount(
+        location_ids,
+        weights=vehicles_charging * network_charge_drawn_per_charging_vehicle,
+        minlength=len(location_names),
+    )
 
-            charge_drawn_from_network.loc[time_tag, charging_location] = (
-                charge_drawn_from_network.loc[time_tag][charging_location]
-                + network_charge_drawn_by_vehicles_this_time_tag
-            )
+    # We only do the charge computations if there is a charge to be drawn
+    locations_with_charge: np.ndarray = (
+        charge_drawn_by_vehicles_this_time_tag > zero_threshold
+    )
+    charge_drawn_by_vehicles.loc[time_tag, location_names] = (
+        charge_drawn_by_vehicles.loc[time_tag, location_names].values
+        + np.where(
+            locations_with_charge, charge_drawn_by_vehicles_this_time_tag, 0
+        )
+    )
+    charge_drawn_from_network.loc[time_tag, location_names] = (
+        charge_drawn_from_network.loc[time_tag, location_names].values
+        + np.where(
+            locations_with_charge,
+            network_charge_drawn_by_vehicles_this_time_tag,
+            0,
+        )
+    )
 
-            battery_spaces_after_charging: np.ndarray = (
-                battery_spaces[charging_location].columns.values
-                - charge_drawn_per_charging_vehicle
+    # The vehicles that charge move to a lower battery space
+    # (we skip the ones that are already full, to avoid
+    # unnecessary calculations)
+    battery_spaces_after_charging: np.ndarray = (
+        original_battery_spaces - charge_drawn_per_charging_vehicle
+    )
+    moving_battery_spaces: np.ndarray = (
+        locations_with_charge[location_ids]
+        & (vehicles_charging > zero_threshold)
+        & (original_battery_spaces > zero_threshold)
+    )
+    for location_index, charging_location in enumerate(location_names):
+        if locations_with_charge[location_index]:
+            location_moving_battery_spaces: np.ndarray = (
+                moving_battery_spaces & (location_ids == location_index)
             )
-
-            for (
-                battery_space_after_charging,
-                original_battery_space,
-                vehicles_that_get_to_this_space,
-            ) in zip(
-                battery_spaces_after_charging,
-                original_battery_spaces,
-                vehicles_charging,
-            ):
-                # To avoid unnecessary calculations
-                if vehicles_that_get_to_this_space > zero_threshold:
-                    if original_battery_space > zero_threshold:
-                        if battery_space_after_charging not in (
-                            battery_spaces[charging_location].columns.values
-                        ):
-                            battery_spaces[charging_location][
-                                battery_space_after_charging
-                            ] = float(0)
-
-                        battery_spaces[charging_location].loc[
-                            time_tag, battery_space_after_charging
-                        ] = (
-                            battery_spaces[charging_location].loc[time_tag][
-                                battery_space_after_charging
-                            ]
-                            + vehicles_that_get_to_this_space
-                        )
-
-                        battery_spaces[charging_location].loc[
-                            time_tag, original_battery_space
-                        ] = (
-                            battery_spaces[charging_location].loc[time_tag][
-                                original_battery_space
-                            ]
-                            - vehicles_that_get_to_this_space
-                        )
-
-            battery_spaces[charging_location] = battery_spaces[
-                charging_location
-            ].reindex(
-                sorted(battery_spaces[charging_location].columns), axis=1
+            battery_spaces[charging_location].move(
+                time_tag_index,
+                original_battery_spaces[location_moving_battery_spaces],
+                battery_spaces_after_charging[location_moving_battery_spaces],
+                vehicles_charging[location_moving_battery_spaces],
             )
 
     return battery_spaces, charge_drawn_by_vehicles, charge_drawn_from_network
@@ -769,7 +953,7 @@ def copy_day_type_profiles_to_whole_run(
     reference_day_type_time_tags: dict[str, list[datetime.datetime]],
     location_split: pd.DataFrame,
     run_mobility_matrix: pd.DataFrame,
-    battery_spaces: dict[str, pd.DataFrame],
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     day_end_hour: int,
     zero_threshold: float,
     possible_destinations: dict[str, list[str]],
@@ -778,6 +962,9 @@ def copy_day_type_profiles_to_whole_run(
     general_parameters: Box,
     charge_drawn_by_vehicles: pd.DataFrame,
     charge_drawn_from_network: pd.DataFrame,
+    run_departures_impact: np.ndarray,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram,
+    charging_modulation: pd.DataFrame,
 ) -> None:
     '''
     This copies the day type runs to whe whole run
@@ -790,14 +977,11 @@ def copy_day_type_profiles_to_whole_run(
         for time_tag in run_range
     ]
 
-    run_day_types: list[str] = [
-        run_time.get_day_type(
-            time_tag - datetime.timedelta(hours=day_start_hour),
-            scenario,
-            general_parameters,
-        )
-        for time_tag in run_range
-    ]
+    run_day_types: list[str] = run_time.get_day_types(
+        run_range - datetime.timedelta(hours=day_start_hour),
+        scenario,
+        general_parameters,
+    ).tolist()
 
     vehicle_parameters: Box = scenario.vehicle
     vehicle_name: str = vehicle_parameters.name
@@ -825,48 +1009,40 @@ def copy_day_type_profiles_to_whole_run(
     )
     location_names = list(location_nodes.index.values)
 
-    filter_dataframe: pd.DataFrame = pd.DataFrame(
-        run_day_types, columns=['Day Type'], index=run_range
-    )
-
-    filter_dataframe['Hours from day start'] = run_hours_from_day_start
-    # The battery space DataFrame has another index:
-    filter_for_battery_spaces: pd.DataFrame = pd.DataFrame(
-        run_day_types,
-        columns=['Day Type'],
-        index=battery_spaces[location_names[0]].index,
+    # Each time tag of the run gets the values of the time tag
+    # with the same hour from day start in the reference day of its
+    # day type. We put the positions of these reference time tags
+    # in an index array, so that we can copy all values in one go.
+    reference_time_tag_positions: dict[tuple[str, int], int] = {
+        (day_type, hour_index): run_range.get_loc(reference_time_tag)
+        for day_type, reference_time_tags in (
+            reference_day_type_time_tags.items()
+        )
+        for hour_index, reference_time_tag in enumerate(reference_time_tags)
+    }
+    reference_time_tag_indices: np.ndarray = np.array(
+        [
+            reference_time_tag_positions[(run_day_type, hour_from_day_start)]
+            for run_day_type, hour_from_day_start in zip(
+                run_day_types, run_hours_from_day_start
+            )
+        ],
+        dtype=int,
     )
-    filter_for_battery_spaces[
-        'Hours from day start'
-    ] = run_hours_from_day_start
-    day_types: list[str] = scenario.mobility_module.day_types
 
-    for day_type in day_types:
-        for hour_index in range(HOURS_IN_A_DAY):
-            charge_drawn_from_network.loc[
-                (filter_dataframe['Day Type'] == day_type)
-                & (filter_dataframe['Hours from day start'] == hour_index)
-            ] = charge_drawn_from_network.loc[
-                reference_day_type_time_tags[day_type][hour_index]
-            ].values
-            charge_drawn_by_vehicles.loc[
-                (filter_dataframe['Day Type'] == day_type)
-                & (filter_dataframe['Hours from day start'] == hour_index)
-            ] = charge_drawn_by_vehicles.loc[
-                reference_day_type_time_tags[day_type][hour_index]
-            ].values
-            for location_name in location_names:
-                battery_spaces[location_name].loc[
-                    (filter_for_battery_spaces['Day Type'] == day_type)
-                    & (
-                        filter_for_battery_spaces['Hours from day start']
-                        == hour_index
-                    )
-                ] = (
-                    battery_spaces[location_name]
-                    .loc[reference_day_type_time_tags[day_type][hour_index]]
-                    .values
-                )
+    charge_drawn_from_network.iloc[:, :] = charge_drawn_from_network.values[
+        reference_time_tag_indices
+    ]
+    charge_drawn_by_vehicles.iloc[:, :] = charge_drawn_by_vehicles.values[
+        reference_time_tag_indices
+    ]
+    for location_name in location_names:
+        location_battery_spaces: np.ndarray = battery_spaces[
+            location_name
+        ].values
+        location_battery_spaces[:] = location_battery_spaces[
+            reference_time_tag_indices
+        ]
 
     # The per day type approach has possible issues with cases where
     # a shift occurs over several days (such as holiday departures or
@@ -876,295 +1052,251 @@ def copy_day_type_profiles_to_whole_run(
     # space with 0 kWh.
 
     for location_name in location_names:
-        totals_from_battery_space: pd.DataFrame | pd.Series = battery_spaces[
+        totals_from_battery_space: np.ndarray = battery_spaces[
             location_name
-        ].sum(axis=1)
+        ].values.sum(axis=1)
 
-        target_location_split: pd.DataFrame | pd.Series = location_split[
-            location_name
-        ]
+        target_location_split: np.ndarray = (
+            location_split[location_name].astype(float).values
+        )
 
-        location_correction: pd.DataFrame | pd.Series = (
+        location_correction: np.ndarray = (
             target_location_split - totals_from_battery_space
-        ).astype(
-            float
-        )  # astype to keep type
+        )
 
-        battery_spaces[location_name][0] = (
-            battery_spaces[location_name][0] + location_correction
+        empty_battery_position: int = battery_spaces[
+            location_name
+        ].get_position(float(0))
+        location_battery_spaces = battery_spaces[location_name].values
+        location_battery_spaces[:, empty_battery_position] = (
+            location_battery_spaces[:, empty_battery_position]
+            + location_correction
         )
 
     # Some trips result in charging events spilling over into the next day
 
-    (
-        spillover_battery_spaces,
-        run_range,
-        run_mobility_matrix,
-        spillover_charge_drawn_by_vehicles,
-        spillover_charge_drawn_from_network,
-        run_arrivals_impact,
-        run_arrivals_impact_gaps,
-        run_departures_impact,
-        run_departures_impact_gaps,
-        spillover_travelling_battery_spaces,
-        total_battery_space_per_location,
-        charging_modulation,
-    ) = get_charging_framework(
-        location_split,
-        run_mobility_matrix,
-        scenario,
-        case_name,
-        general_parameters,
-    )
-
     # We first get all the days (day end time tags) that end with a spillover
-    # at each of the locations
-    day_ends_with_spillover_battery_spaces: dict = {}
+    # at each of the locations, with their battery spaces
+    # (we get these before the spillover changes the battery spaces)
+    day_end_filter: np.ndarray = run_range.hour == day_end_hour
+    day_ends_with_spillover: dict[str, np.ndarray] = {}
+    day_end_spillover_amounts: dict[str, dict[int, pd.Series]] = {}
     for location_name in location_names:
-        day_end_battery_spaces: pd.DataFrame = battery_spaces[
+        non_empty_battery_spaces: np.ndarray = battery_spaces[
             location_name
-        ].loc[run_range.hour == day_end_hour]
-        non_empty_day_end_battery_spaces: pd.DataFrame = (
-            day_end_battery_spaces.drop(columns=float(0))
+        ].spaces
+        non_empty_battery_spaces = non_empty_battery_spaces[
+            non_empty_battery_spaces != float(0)
+        ]
+        non_empty_positions: np.ndarray = np.array(
+            [
+                battery_spaces[location_name].get_position(battery_space)
+                for battery_space in non_empty_battery_spaces
+            ],
+            dtype=int,
         )
-        day_ends_with_spillover_battery_spaces[
+        day_end_battery_spaces: np.ndarray = battery_spaces[
             location_name
-        ] = non_empty_day_end_battery_spaces.loc[
-            non_empty_day_end_battery_spaces.sum(axis=1) > zero_threshold
-        ].index.get_level_values(
-            'Time Tag'
-        )
+        ].values[day_end_filter][:, non_empty_positions]
+        day_ends_with_spillover[location_name] = np.flatnonzero(
+            day_end_filter
+        )[day_end_battery_spaces.sum(axis=1) > zero_threshold]
+        day_end_spillover_amounts[location_name] = {
+            day_end_index: pd.Series(
+                battery_spaces[location_name].values[
+                    day_end_index, non_empty_positions
+                ],
+                index=non_empty_battery_spaces,
+            )
+            for day_end_index in day_ends_with_spillover[location_name]
+        }
+
+    battery_space_resolution: float = scenario.charging.get(
+        'battery_space_resolution_kWh', 0
+    )
+    last_time_tag_index: int = len(run_range) - 1
 
-    # We look at the battery spillover spaces
+    # We look at the battery spillover spaces. For each location, we go
+    # forward through the run once, adding the spillover of each day end
+    # when we reach it (if the spillover of an earlier day end is still
+    # charging at that point, they are combined).
     for spillover_location in location_names:
-        # The get charging framework created a spillover Dataframe
-        # with battery spaces starting aat the inital location split.
-        # We don't need it for spillover (as it is zero)
-        spillover_battery_spaces[
-            spillover_location
-        ] = spillover_battery_spaces[spillover_location].drop(float(0), axis=1)
-
-        for day_end_time_tag in day_ends_with_spillover_battery_spaces[
-            spillover_location
-        ]:
-            spillover_time_tag_index: int = list(run_range).index(
-                day_end_time_tag
+        spillover_battery_spaces: histograms.BatterySpaceHistogram = (
+            histograms.BatterySpaceHistogram(
+                run_range, resolution=battery_space_resolution
             )
-            spillover_amounts_per_battery_space: pd.Series = (
-                battery_spaces[spillover_location]
-                .drop(columns=float(0))
-                .loc[day_end_time_tag]
+        )
+        # We don't need the empty battery space for spillover
+        spillover_battery_spaces.drop(float(0))
+        departure_leg_tuple_indices: list[int] = [
+            travelling_battery_spaces.row_position(
+                (spillover_location, end_location)
             )
+            for end_location in possible_destinations[spillover_location]
+        ]
 
-            amount_in_spillover: float = (
-                spillover_amounts_per_battery_space.sum()
-            )
+        remaining_day_ends: list[int] = list(
+            day_ends_with_spillover[spillover_location]
+        )
+        spillover_time_tag_index: int = -1
+        amount_in_spillover: float = 0
+        while True:
+            if len(remaining_day_ends) > 0 and (
+                amount_in_spillover <= zero_threshold
+                or spillover_time_tag_index == remaining_day_ends[0]
+            ):
+                # We add the spillover of the next day end
+                spillover_time_tag_index = remaining_day_ends.pop(0)
+                spillover_amounts_per_battery_space: pd.Series = (
+                    day_end_spillover_amounts[spillover_location][
+                        spillover_time_tag_index
+                    ]
+                )
+                for (
+                    spillover_battery_space,
+                    spillover_amount,
+                ) in spillover_amounts_per_battery_space.items():
+                    spillover_battery_spaces.add(
+                        spillover_time_tag_index,
+                        spillover_battery_space,
+                        spillover_amount,
+                    )
+                amount_in_spillover = spillover_battery_spaces.row_sum(
+                    spillover_time_tag_index
+                )
+                continue
 
-            while amount_in_spillover > zero_threshold:
-                spillover_time_tag_index += 1
+            if amount_in_spillover <= zero_threshold:
+                break
 
-                if spillover_time_tag_index >= len(run_range) - 1:
-                    amount_in_spillover = 0
-                    # Does not matter, as the run is then over
+            if spillover_time_tag_index >= last_time_tag_index:
+                # Does not matter, as the run is then over
+                amount_in_spillover = 0
+                continue
 
-                spillover_time_tag: ty.Any = run_range[
-                    spillover_time_tag_index
-                ]
+            spillover_time_tag_index += 1
+            spillover_time_tag: ty.Any = run_range[spillover_time_tag_index]
 
-                battery_spaces[spillover_location].loc[
-                    spillover_time_tag, float(0)
-                ] = (
-                    battery_spaces[spillover_location].loc[spillover_time_tag][
-                        float(0)
-                    ]
-                    - amount_in_spillover
-                )
-                occupied_spillover_battery_spaces: list[float] = []
-                for (
-                    test_battery_space
-                ) in spillover_amounts_per_battery_space.index:
-                    if (
-                        spillover_amounts_per_battery_space[test_battery_space]
-                        > zero_threshold
-                    ):  # type: ignore
-                        occupied_spillover_battery_spaces.append(
-                            test_battery_space
-                        )
-
-                for (
-                    occupied_spillover_battery_space
-                ) in occupied_spillover_battery_spaces:
-                    battery_spaces[spillover_location].loc[
-                        spillover_time_tag,
-                        occupied_spillover_battery_space,
-                    ] = (
-                        battery_spaces[spillover_location].loc[
-                            spillover_time_tag
-                        ][occupied_spillover_battery_space]
-                        + spillover_amounts_per_battery_space[
-                            occupied_spillover_battery_space
-                        ]
-                    )
-                    if (
-                        occupied_spillover_battery_space
-                        not in spillover_battery_spaces[
-                            spillover_location
-                        ].columns
-                    ):
-                        spillover_battery_spaces[spillover_location][
-                            occupied_spillover_battery_space
-                        ] = float(0)
-                    spillover_battery_spaces[spillover_location].loc[
-                        spillover_time_tag,
-                        float(occupied_spillover_battery_space),
-                    ] = (
-                        spillover_battery_spaces[spillover_location].loc[
-                            spillover_time_tag
-                        ][occupied_spillover_battery_space]
-                        + spillover_amounts_per_battery_space[
-                            occupied_spillover_battery_space
-                        ]
-                    )
-
-                fully_charged_vehicles: float = battery_spaces[
-                    spillover_location
-                ].iloc[spillover_time_tag_index - 1][float(0)]
+            # The spillover vehicles that have not finished charging
+            # are still there at this time tag
+            spillover_values: np.ndarray = spillover_battery_spaces.values
+            spillover_values[spillover_time_tag_index] = spillover_values[
+                spillover_time_tag_index - 1
+            ]
 
-                time_tag_departures_impact: float = run_departures_impact.loc[
-                    spillover_location,
-                    possible_destinations[spillover_location],
-                    spillover_time_tag,
-                ].sum()
+            fully_charged_vehicles: float = battery_spaces[
+                spillover_location
+            ].get(spillover_time_tag_index - 1, float(0))
 
-                if (
-                    time_tag_departures_impact - fully_charged_vehicles
-                    > zero_threshold
-                ):
-                    print(spillover_time_tag)
-                    print(spillover_location)
-                    print(
-                        battery_spaces[spillover_location]
-                        .loc[spillover_time_tag]
-                        .sum()
-                    )
-                    print(time_tag_departures_impact)
-                    print(fully_charged_vehicles)
-                    print('Do a procedure for this')
-                    exit()
-
-                spillover_battery_spaces_before_charging: pd.Series = (
-                    spillover_battery_spaces[spillover_location]
-                    .loc[spillover_time_tag]
-                    .copy()
-                    # The copy is needed because
-                    # the spillover battery spaces can change, which
-                    # affects spillover_battery_spaces_before_charging
-                    # (but apparently only if there is only one value)
-                )
+            time_tag_departures_impact: float = run_departures_impact[
+                departure_leg_tuple_indices, spillover_time_tag_index
+            ].sum()
 
-                (
-                    spillover_battery_spaces,
-                    spillover_charge_drawn_by_vehicles,
-                    spillover_charge_drawn_from_network,
-                ) = compute_charging_events(
-                    spillover_battery_spaces,
-                    spillover_charge_drawn_by_vehicles,
-                    spillover_charge_drawn_from_network,
-                    spillover_time_tag,
-                    scenario,
-                    general_parameters,
-                    location_names,
-                    charging_modulation,
+            departing_spillover: float = (
+                time_tag_departures_impact - fully_charged_vehicles
+            )
+            if departing_spillover > zero_threshold:
+                # There are not enough fully charged vehicles for the
+                # departures, so some of the vehicles that are still
+                # charging leave before they are done (the ones with the
+                # lowest battery space first, as for other departures).
+                # The departures were already removed from the empty battery
+                # space when copying the day type profiles, so these vehicles
+                # are simply no longer part of the spillover.
+                print(
+                    f'{spillover_location} at {spillover_time_tag}: '
+                    f'{departing_spillover} vehicles leave before '
+                    'their spillover charging is done'
                 )
-
-                spillover_battery_spaces_after_charging: pd.Series = (
-                    spillover_battery_spaces[spillover_location].loc[
-                        spillover_time_tag
-                    ]
+                kernels.take_from_lowest_battery_spaces(
+                    spillover_values[spillover_time_tag_index],
+                    spillover_battery_spaces.sorted_positions,
+                    departing_spillover,
+                    zero_threshold,
                 )
 
-                spillover_battery_spaces_change: pd.Series = (
-                    spillover_battery_spaces_after_charging.add(
-                        -spillover_battery_spaces_before_charging, fill_value=0
+            # The spillover vehicles were counted as fully charged
+            # in the day type profiles, so we move them from the empty
+            # battery space to their actual battery spaces
+            amount_in_spillover = spillover_battery_spaces.row_sum(
+                spillover_time_tag_index
+            )
+            battery_spaces[spillover_location].add(
+                spillover_time_tag_index, float(0), -amount_in_spillover
+            )
+            spillover_row: np.ndarray = spillover_values[
+                spillover_time_tag_index
+            ]
+            spillover_row[spillover_row <= zero_threshold] = 0
+            for (
+                occupied_spillover_battery_space,
+                occupied_spillover_amount,
+            ) in spillover_battery_spaces.row_series(
+                spillover_time_tag_index
+            ).items():
+                if occupied_spillover_amount > 0:
+                    battery_spaces[spillover_location].add(
+                        spillover_time_tag_index,
+                        occupied_spillover_battery_space,
+                        occupied_spillover_amount,
                     )
-                )
 
-                # We put the fully charged spillover vehicles
-                # into the battery spaces and remove them from
-                # the spillover battery spaces
-
-                if spillover_time_tag_index < len(run_range) - 1:
-                    for (
-                        modified_battery_space
-                    ) in spillover_battery_spaces_change.index:
-                        if (
-                            modified_battery_space
-                            not in battery_spaces[spillover_location].columns
-                        ):
-                            battery_spaces[spillover_location][
-                                modified_battery_space
-                            ] = float(0)
-                            # We sort the battery spaces for consistency
-                            battery_spaces[
-                                spillover_location
-                            ] = battery_spaces[spillover_location].reindex(
-                                sorted(
-                                    battery_spaces[spillover_location].columns
-                                ),
-                                axis=1,
-                            )
-                        battery_spaces[spillover_location].loc[
-                            spillover_time_tag, modified_battery_space
-                        ] = (
-                            battery_spaces[spillover_location].loc[
-                                spillover_time_tag
-                            ][modified_battery_space]
-                            + spillover_battery_spaces_change[
-                                modified_battery_space
-                            ]
-                        )
+            spillover_battery_spaces_before_charging: pd.Series = (
+                spillover_battery_spaces.row_series(spillover_time_tag_index)
+            )
 
-                if (
-                    float(0)
-                    in spillover_battery_spaces[spillover_location].columns
-                ):
-                    spillover_battery_spaces[
-                        spillover_location
-                    ] = spillover_battery_spaces[spillover_location].drop(
-                        float(0), axis=1
-                    )
+            # The charge drawn by the spillover vehicles gets added
+            # to the charge drawn at the location
+            (
+                spillover_battery_spaces_per_location,
+                charge_drawn_by_vehicles,
+                charge_drawn_from_network,
+            ) = compute_charging_events(
+                {spillover_location: spillover_battery_spaces},
+                charge_drawn_by_vehicles,
+                charge_drawn_from_network,
+                spillover_time_tag,
+                spillover_time_tag_index,
+                scenario,
+                general_parameters,
+                [spillover_location],
+                charging_modulation,
+            )
 
-                charge_drawn_by_vehicles.loc[
-                    spillover_time_tag, spillover_location
-                ] = (
-                    charge_drawn_by_vehicles.loc[spillover_time_tag][
-                        spillover_location
-                    ]
-                    + spillover_charge_drawn_by_vehicles.loc[
-                        spillover_time_tag
-                    ][spillover_location]
-                )
+            spillover_battery_spaces_after_charging: pd.Series = (
+                spillover_battery_spaces.row_series(spillover_time_tag_index)
+            )
 
-                charge_drawn_from_network.loc[
-                    spillover_time_tag, spillover_location
-                ] = (
-                    charge_drawn_from_network.loc[spillover_time_tag][
-                        spillover_location
-                    ]
-                    + spillover_charge_drawn_from_network.loc[
-                        spillover_time_tag
-                    ][spillover_location]
+            spillover_battery_spaces_change: pd.Series = (
+                spillover_battery_spaces_after_charging.add(
+                    -spillover_battery_spaces_before_charging, fill_value=0
                 )
+            )
 
-                spillover_amounts_per_battery_space = spillover_battery_spaces[
-                    spillover_location
-                ].loc[spillover_time_tag]
+            # We put the fully charged spillover vehicles
+            # into the battery spaces and remove them from
+            # the spillover battery spaces
 
-                amount_in_spillover = spillover_amounts_per_battery_space.sum()
+            if spillover_time_tag_index < last_time_tag_index:
+                for (
+                    modified_battery_space,
+                    battery_space_change,
+                ) in spillover_battery_spaces_change.items():
+                    battery_spaces[spillover_location].add(
+                        spillover_time_tag_index,
+                        modified_battery_space,
+                        battery_space_change,
+                    )
+
+            spillover_battery_spaces.drop(float(0))
+
+            amount_in_spillover = spillover_battery_spaces.row_sum(
+                spillover_time_tag_index
+            )
 
 
 def write_output(
-    battery_spaces: dict[str, pd.DataFrame],
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
     total_battery_space_per_location: pd.DataFrame,
     charge_drawn_by_vehicles: pd.DataFrame,
     charge_drawn_from_network: pd.DataFrame,
@@ -1199,23 +1331,60 @@ def write_output(
     file_parameters: Box = general_parameters.files
     output_folder: str = f'{file_parameters.output_root}/{case_name}'
 
+    battery_spaces_formats: list[str] = (
+        general_parameters.interim_files.battery_spaces_formats
+    )
+    sums_of_battery_spaces: dict[str, np.ndarray] = {}
     for location_name in location_names:
-        battery_spaces[location_name].columns = battery_spaces[
-            location_name
-        ].columns.astype(str)
-        battery_spaces[location_name] = battery_spaces[
-            location_name
-        ].reset_index()
-        battery_spaces[location_name]['Hour Number'] = run_hour_numbers
-        battery_spaces[location_name]['SPINE_Hour_Number'] = SPINE_hour_numbers
-        battery_spaces[location_name] = battery_spaces[
-            location_name
-        ].set_index(['Time Tag', 'Hour Number', 'SPINE_Hour_Number'])
-        if pickle_interim_files:
-            battery_spaces[location_name].to_pickle(
-                f'{output_folder}/{scenario.name}_'
-                f'{location_name}_battery_spaces.pkl'
+        battery_spaces_table_name: str = (
+            f'{scenario.name}_{location_name}_battery_spaces'
+        )
+        # The array files are written from the histograms directly
+        if 'array' in battery_spaces_formats and (
+            writing.is_table_in_manifest(
+                battery_spaces_table_name, general_parameters
             )
+        ):
+            battery_space_arrays.write_battery_space_array(
+                battery_spaces[location_name],
+                run_hour_numbers,
+                f'{output_folder}/{battery_spaces_table_name}',
+            )
+        if 'pickle' in battery_spaces_formats and (
+            writing.is_interim_table_requested(
+                battery_spaces_table_name, general_parameters
+            )
+        ):
+            # The battery spaces are only converted to a DataFrame here
+            # (the battery spaces given back by get_charging_profile stay
+            # histograms)
+            location_battery_spaces: pd.DataFrame = battery_spaces[
+                location_name
+            ].to_dataframe()
+            location_battery_spaces.columns = (
+                location_battery_spaces.columns.astype(str)
+            )
+            location_battery_spaces = location_battery_spaces.reset_index()
+            location_battery_spaces['Hour Number'] = run_hour_numbers
+            location_battery_spaces['SPINE_Hour_Number'] = SPINE_hour_numbers
+            location_battery_spaces = location_battery_spaces.set_index(
+                ['Time Tag', 'Hour Number', 'SPINE_Hour_Number']
+            )
+            writing.save_interim_table(
+                location_battery_spaces,
+                f'{output_folder}/{battery_spaces_table_name}.pkl',
+                general_parameters,
+            )
+            sums_of_battery_spaces[location_name] = (
+                location_battery_spaces.sum(axis=1).values
+            )
+        else:
+            # The battery spaces of this location are not pickled,
+            # so they are not converted to a DataFrame (this would copy
+            # the largest output for nothing)
+            sums_of_battery_spaces[location_name] = battery_spaces[
+                location_name
+            ].sums()
     charge_drawn_from_network = charge_drawn_from_network.reset_index()
     charge_drawn_from_network['Hour number'] = run_hour_numbers
     charge_drawn_from_network['SPINE hour number'] = SPINE_hour_numbers
@@ -1223,11 +1392,15 @@ def write_output(
         ['Time Tag', 'Hour number', 'SPINE hour number']
     )
     if pickle_interim_files:
-        charge_drawn_from_network.to_pickle(
-            f'{output_folder}/{scenario.name}_charge_drawn_from_network.pkl'
+        writing.save_interim_table(
+            charge_drawn_from_network,
+            f'{output_folder}/{scenario.name}_charge_drawn_from_network.pkl',
+            general_parameters,
         )
-        charging_costs.to_pickle(
-            f'{output_folder}/{scenario.name}_charging_costs.pkl'
+        writing.save_interim_table(
+            charging_costs,
+            f'{output_folder}/{scenario.name}_charging_costs.pkl',
+            general_parameters,
         )
 
     charge_drawn_from_network_total: pd.DataFrame = pd.DataFrame(
@@ -1242,18 +1415,24 @@ def write_output(
         pd.DataFrame(index=charge_drawn_from_network.index)
     )
     if pickle_interim_files:
-        charge_drawn_from_network_total.to_pickle(
+        writing.save_interim_table(
+            charge_drawn_from_network_total,
             f'{output_folder}/{scenario.name}_'
-            'charge_drawn_from_network_total.pkl'
+            'charge_drawn_from_network_total.pkl',
+            general_parameters,
         )
-        charging_costs_total.to_pickle(
-            f'{output_folder}/{scenario.name}_total_charging_costs.pkl'
+        writing.save_interim_table(
+            charging_costs_total,
+            f'{output_folder}/{scenario.name}_total_charging_costs.pkl',
+            general_parameters,
         )
 
     if pickle_interim_files:
-        total_battery_space_per_location.to_pickle(
+        writing.save_interim_table(
+            total_battery_space_per_location,
             f'{output_folder}/{scenario.name}_'
-            'total_battery_space_per_location.pkl'
+            'total_battery_space_per_location.pkl',
+            general_parameters,
         )
 
     for location_name in location_names:
@@ -1271,9 +1450,11 @@ def write_output(
             )
         ]
     if pickle_interim_files:
-        percentage_of_maximal_delivered_power_used_per_location.to_pickle(
+        writing.save_interim_table(
+            percentage_of_maximal_delivered_power_used_per_location,
             f'{output_folder}/{scenario.name}_'
-            f'percentage_of_maximal_delivered_power_used_per_location.pkl'
+            f'percentage_of_maximal_delivered_power_used_per_location.pkl',
+            general_parameters,
         )
 
     percentage_of_maximal_delivered_power_used: pd.DataFrame = pd.DataFrame(
@@ -1294,9 +1475,11 @@ def write_output(
         )
     ]
     if pickle_interim_files:
-        percentage_of_maximal_delivered_power_used.to_pickle(
+        writing.save_interim_table(
+            percentage_of_maximal_delivered_power_used,
             f'{output_folder}/{scenario.name}'
-            f'_percentage_of_maximal_delivered_power_used.pkl'
+            f'_percentage_of_maximal_delivered_power_used.pkl',
+            general_parameters,
         )
 
     charge_drawn_by_vehicles = charge_drawn_by_vehicles.reset_index()
@@ -1306,8 +1489,10 @@ def write_output(
         ['Time Tag', 'Hour number', 'SPINE hour number']
     )
     if pickle_interim_files:
-        charge_drawn_by_vehicles.to_pickle(
-            f'{output_folder}/{scenario.name}_charge_drawn_by_vehicles.pkl'
+        writing.save_interim_table(
+            charge_drawn_by_vehicles,
+            f'{output_folder}/{scenario.name}_charge_drawn_by_vehicles.pkl',
+            general_parameters,
         )
 
     charge_drawn_by_vehicles_total: pd.DataFrame = pd.DataFrame(
@@ -1320,9 +1505,11 @@ def write_output(
         index=charge_drawn_by_vehicles.index
     )
     if pickle_interim_files:
-        charge_drawn_by_vehicles_total.to_pickle(
+        writing.save_interim_table(
+            charge_drawn_by_vehicles_total,
             f'{output_folder}/{scenario.name}'
-            '_charge_drawn_by_vehicles_total.pkl'
+            '_charge_drawn_by_vehicles_total.pkl',
+            general_parameters,
         )
 
     sum_of_battery_spaces: pd.DataFrame = pd.DataFrame(
@@ -1332,18 +1519,185 @@ def write_output(
     sum_of_battery_spaces.index.name = 'Time Tag'
 
     for location_name in location_names:
-        sum_of_battery_spaces_this_location: pd.Series[float] = battery_spaces[
-            location_name
-        ].sum(axis=1)
-        sum_of_battery_spaces[
+        sum_of_battery_spaces[location_name] = sums_of_battery_spaces[
             location_name
-        ] = sum_of_battery_spaces_this_location.values
+        ]
     if pickle_interim_files:
-        sum_of_battery_spaces.to_pickle(
-            f'{output_folder}/{scenario.name}_sum_of_battery_spaces.pkl'
+        writing.save_interim_table(
+            sum_of_battery_spaces,
+            f'{output_folder}/{scenario.name}_sum_of_battery_spaces.pkl',
+            general_parameters,
         )
 
 
+# The version of the reference day cache files. Change it when the
+# computation of the reference days changes, so that older cache files
+# (with the same inputs) do not get used
+REFERENCE_DAY_CACHE_VERSION: int = 1
+
+
+def get_reference_day_cache_key(
+    run_range: pd.DatetimeIndex,
+    run_day_types: list[str],
+    location_names: list[str],
+    location_split: pd.DataFrame,
+    run_arrivals_impact: np.ndarray,
+    run_departures_impact: np.ndarray,
+    run_leg_distances: np.ndarray,
+    travelling_battery_spaces: histograms.BatterySpaceHistogram,
+    charging_modulation: pd.DataFrame,
+    scenario: Box,
+    general_parameters: Box,
+) -> str:
+    '''
+    Gives a hash of all the inputs that affect the reference days
+    of the charging profile computation (and only these, so that
+    scenarios that differ in other parameters, such as fleet size,
+    get the same key).
+    '''
+    location_parameters: Box = scenario.locations
+    cache_key_parameters: list = [
+        REFERENCE_DAY_CACHE_VERSION,
+        location_names,
+        run_day_types,
+        list(travelling_battery_spaces.index),
+        scenario.mobility_module.day_start_hour,
+        scenario.mobility_module.day_types,
+        scenario.vehicle.base_consumption_per_km.electricity_kWh,
+        scenario.charging.get('battery_space_resolution_kWh', 0),
+        general_parameters.numbers.zero_threshold,
+        general_parameters.time.HOURS_IN_A_DAY,
+        [
+            (
+                location_parameters[location_name].connectivity,
+                location_parameters[location_name].charging_power,
+                location_parameters[location_name].charger_efficiency,
+            )
+            for location_name in location_names
+        ],
+    ]
+    cache_key_hash = hashlib.sha256(repr(cache_key_parameters).encode())
+    cache_key_arrays: list[np.ndarray] = [
+        run_range.asi8,
+        location_split[location_names].values.astype(float),
+        run_arrivals_impact,
+        run_departures_impact,
+        run_leg_distances,
+        charging_modulation[location_names].values.astype(float),
+    ]
+    for cache_key_array in cache_key_arrays:
+        cache_key_hash.update(np.ascontiguousarray(cache_key_array).tobytes())
+
+    return cache_key_hash.hexdigest()
+
+
+def save_reference_days(
+    reference_day_cache_file: str,
+    reference_day_type_time_tags: dict[str, list[datetime.datetime]],
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
+    charge_drawn_by_vehicles: pd.DataFrame,
+    charge_drawn_from_network: pd.DataFrame,
+    run_range: pd.DatetimeIndex,
+    location_names: list[str],
+) -> None:
+    '''
+    Saves the reference day results (the values at the reference day
+    time tags, which are the ones that get copied to the whole run)
+    to the reference day cache.
+    '''
+    reference_time_tag_indices: np.ndarray = np.array(
+        [
+            run_range.get_loc(reference_time_tag)
+            for reference_time_tags in reference_day_type_time_tags.values()
+            for reference_time_tag in reference_time_tags
+        ],
+        dtype=int,
+    )
+    reference_days: dict = {
+        'reference_day_type_time_tags': reference_day_type_time_tags,
+        'reference_time_tag_indices': reference_time_tag_indices,
+        # The battery spaces are stored in the order of their columns,
+        # so that loading them gives the same column order (and thus
+        # the same sums) as computing them
+        'battery_spaces': {
+            location_name: (
+                battery_spaces[location_name].spaces[
+                    np.argsort(battery_spaces[location_name].sorted_positions)
+                ],
+                battery_spaces[location_name].values[
+                    reference_time_tag_indices
+                ],
+            )
+            for location_name in location_names
+        },
+        'charge_drawn_by_vehicles': charge_drawn_by_vehicles[location_names]
+        .values[reference_time_tag_indices]
+        .copy(),
+        'charge_drawn_from_network': charge_drawn_from_network[
+            location_names
+        ]
+        .values[reference_time_tag_indices]
+        .copy(),
+    }
+    # Scenarios (in parallel) share the cache, so we write to a temporary
+    # file and then move it into place, so that no other scenario
+    # can read a partly written file
+    temporary_cache_file: str = f'{reference_day_cache_file}.{os.getpid()}.tmp'
+    pd.to_pickle(reference_days, temporary_cache_file)
+    os.replace(temporary_cache_file, reference_day_cache_file)
+
+
+def load_reference_days(
+    reference_day_cache_file: str,
+    battery_spaces: dict[str, histograms.BatterySpaceHistogram],
+    charge_drawn_by_vehicles: pd.DataFrame,
+    charge_drawn_from_network: pd.DataFrame,
+    location_names: list[str],
+) -> dict[str, list[datetime.datetime]] | None:
+    '''
+    Puts the reference day results from the reference day cache into
+    the battery spaces and charge drawn tables and returns the reference
+    day type time tags. Returns None (a cache miss) if the cache file
+    does not exist or cannot be read.
+    '''
+    try:
+        reference_days: dict = pd.read_pickle(reference_day_cache_file)
+    except Exception:
+        # A missing, truncated or otherwise unreadable file is a cache
+        # miss (the reference days are then computed and saved again)
+        return None
+    reference_time_tag_indices: np.ndarray = reference_days[
+        'reference_time_tag_indices'
+    ]
+    for location_name in location_names:
+        reference_battery_spaces, reference_values = reference_days[
+            'battery_spaces'
+        ][location_name]
+        reference_positions: list[int] = [
+            battery_spaces[location_name].get_position(reference_battery_space)
+            for reference_battery_space in reference_battery_spaces
+        ]
+        location_battery_spaces: np.ndarray = battery_spaces[
+            location_name
+        ].values
+        location_battery_spaces[
+            np.ix_(reference_time_tag_indices, reference_positions)
+        ] = reference_values
+
+    location_columns: list[int] = [
+        charge_drawn_by_vehicles.columns.get_loc(location_name)
+        for location_name in location_names
+    ]
+    charge_drawn_by_vehicles.iloc[
+        reference_time_tag_indices, location_columns
+    ] = reference_days['charge_drawn_by_vehicles']
+    charge_drawn_from_network.iloc[
+        reference_time_tag_indices, location_columns
+    ] = reference_days['charge_drawn_from_network']
+
+    return reference_days['reference_day_type_time_tags']
+
+
 # @cook.function_timer
 def get_charging_profile(
     location_split: pd.DataFrame,
@@ -1354,7 +1708,7 @@ def get_charging_profile(
     case_name: str,
     general_parameters: Box,
 ) -> tuple[
-    dict[str, pd.DataFrame],
+    dict[str, histograms.BatterySpaceHistogram],
     pd.DataFrame,
     pd.DataFrame,
     pd.DataFrame,
@@ -1375,6 +1729,7 @@ def get_charging_profile(
         run_arrivals_impact_gaps,
         run_departures_impact,
         run_departures_impact_gaps,
+        run_leg_distances,
         travelling_battery_spaces,
         total_battery_space_per_location,
         charging_modulation,
@@ -1403,16 +1758,20 @@ def get_charging_profile(
     day_start_hour: int = scenario.mobility_module.day_start_hour
     HOURS_IN_A_DAY: int = general_parameters.time.HOURS_IN_A_DAY
     day_end_hour: int = (day_start_hour - 1) % HOURS_IN_A_DAY
-    run_day_types: list[str] = [
-        run_time.get_day_type(
-            time_tag - datetime.timedelta(hours=day_start_hour),
-            scenario,
-            general_parameters,
-        )
-        for time_tag in run_range
-    ]
+    run_day_types: list[str] = run_time.get_day_types(
+        run_range - datetime.timedelta(hours=day_start_hour),
+        scenario,
+        general_parameters,
+    ).tolist()
 
     zero_threshold: float = general_parameters.numbers.zero_threshold
+    # The numba engine uses array kernels for the arrivals and departures
+    # of the battery space loop. Without Numba, these kernels are slower
+    # (as pure Python) than the pandas loop, so we use the latter
+    use_numba: bool = (
+        scenario.charging.get('engine', 'pandas') == 'numba'
+        and kernels.NUMBA_AVAILABLE
+    )
     vehicle_parameters: Box = scenario.vehicle
     vehicle_name: str = vehicle_parameters.name
 
@@ -1444,89 +1803,142 @@ def get_charging_profile(
         possible_origins,
     ) = mobility.get_possible_destinations_and_origins(scenario)
 
-    for time_tag_index, (time_tag, run_day_type) in enumerate(
-        zip(run_range, run_day_types)
-    ):
-        if (
-            use_day_types_in_charge_computing
-            and (time_tag.hour == day_start_hour)
-            and (run_day_type in day_types_to_compute)  # type: ignore
+    # With day types, the reference days can come from the cache
+    # (if a scenario or run with the same inputs computed them before)
+    use_reference_day_cache: bool = (
+        use_day_types_in_charge_computing
+        and general_parameters.reference_day_cache.use
+    )
+    reference_days_from_cache: bool = False
+    if use_reference_day_cache:
+        reference_day_cache_folder: str = (
+            general_parameters.reference_day_cache.folder
+        )
+        cook.check_if_folder_exists(reference_day_cache_folder)
+        reference_day_cache_key: str = get_reference_day_cache_key(
+            run_range,
+            run_day_types,
+            location_names,
+            location_split,
+            run_arrivals_impact,
+            run_departures_impact,
+            run_leg_distances,
+            travelling_battery_spaces,
+            charging_modulation,
+            scenario,
+            general_parameters,
+        )
+        reference_day_cache_file: str = (
+            f'{reference_day_cache_folder}/{reference_day_cache_key}.pkl'
+        )
+        cached_reference_day_type_time_tags: (
+            dict[str, list[datetime.datetime]] | None
+        ) = load_reference_days(
+            reference_day_cache_file,
+            battery_spaces,
+            charge_drawn_by_vehicles,
+            charge_drawn_from_network,
+            location_names,
+        )
+        if cached_reference_day_type_time_tags is not None:
+            reference_day_type_time_tags = cached_reference_day_type_time_tags
+            reference_days_from_cache = True
+
+    if not reference_days_from_cache:
+        for time_tag_index, (time_tag, run_day_type) in enumerate(
+            zip(run_range, run_day_types)
         ):
-            # For the da to be representative, it cannot have
-            # charging from the prior day (this spillover issue
-            # will be dealt with later)
-            weighted_residual_battery_spaces: float = 0
-            for charging_location_to_test in location_names:
-                location_residual_battery_spaces: pd.Series = battery_spaces[
-                    charging_location_to_test
-                ].iloc[time_tag_index - 1]
-                location_weighted_residual_battery_spaces: float = (
-                    location_residual_battery_spaces.index.values
-                    * location_residual_battery_spaces
-                ).sum()
-                weighted_residual_battery_spaces += (
-                    location_weighted_residual_battery_spaces
+            if (
+                use_day_types_in_charge_computing
+                and (time_tag.hour == day_start_hour)
+                and (run_day_type in day_types_to_compute)  # type: ignore
+            ):
+                # For the da to be representative, it cannot have
+                # charging from the prior day (this spillover issue
+                # will be dealt with later)
+                weighted_residual_battery_spaces: float = 0
+                for charging_location_to_test in location_names:
+                    location_weighted_residual_battery_spaces: float = (
+                        battery_spaces[
+                            charging_location_to_test
+                        ].weighted_row_sum(time_tag_index - 1)
+                    )
+                    weighted_residual_battery_spaces += (
+                        location_weighted_residual_battery_spaces
+                    )
+                does_charge_demand_spillover: bool = (
+                    weighted_residual_battery_spaces > zero_threshold
                 )
-            does_charge_demand_spillover: bool = (
-                weighted_residual_battery_spaces > zero_threshold
-            )
 
-            if not does_charge_demand_spillover:
-                day_types_to_compute.remove(run_day_type)  # type: ignore
-                compute_charge = True
-                time_tags_of_day_type = []
+                if not does_charge_demand_spillover:
+                    day_types_to_compute.remove(run_day_type)  # type: ignore
+                    compute_charge = True
+                    time_tags_of_day_type = []
 
-        if compute_charge:
-            if use_day_types_in_charge_computing:
-                time_tags_of_day_type.append(time_tag)  # type: ignore
+            if compute_charge:
+                if use_day_types_in_charge_computing:
+                    time_tags_of_day_type.append(time_tag)  # type: ignore
 
-            # We start by looking at how travel changes the
-            # available battery spaces at each location
-            battery_spaces = travel_space_occupation(
-                scenario,
-                battery_spaces,
-                time_tag,
-                time_tag_index,
-                run_mobility_matrix,
-                zero_threshold,
-                location_names,
-                possible_destinations,
-                possible_origins,
-                use_day_types_in_charge_computing,
-                day_start_hour,
-                location_split,
-                run_arrivals_impact,
-                run_arrivals_impact_gaps,
-                run_departures_impact,
-                run_departures_impact_gaps,
-                run_range,
-                travelling_battery_spaces,
-            )
+                # We start by looking at how travel changes the
+                # available battery spaces at each location
+                battery_spaces = travel_space_occupation(
+                    scenario,
+                    battery_spaces,
+                    time_tag,
+                    time_tag_index,
+                    run_leg_distances,
+                    zero_threshold,
+                    location_names,
+                    possible_destinations,
+                    possible_origins,
+                    use_day_types_in_charge_computing,
+                    day_start_hour,
+                    location_split,
+                    run_arrivals_impact,
+                    run_arrivals_impact_gaps,
+                    run_departures_impact,
+                    run_departures_impact_gaps,
+                    run_range,
+                    travelling_battery_spaces,
+                    use_numba=use_numba,
+                )
 
-            # We then look at which charging happens
-            (
-                battery_spaces,
-                charge_drawn_by_vehicles,
-                charge_drawn_from_network,
-            ) = compute_charging_events(
+                # We then look at which charging happens
+                (
+                    battery_spaces,
+                    charge_drawn_by_vehicles,
+                    charge_drawn_from_network,
+                ) = compute_charging_events(
+                    battery_spaces,
+                    charge_drawn_by_vehicles,
+                    charge_drawn_from_network,
+                    time_tag,
+                    time_tag_index,
+                    scenario,
+                    general_parameters,
+                    location_names,
+                    charging_modulation,
+                )
+
+                if use_day_types_in_charge_computing and (
+                    time_tag.hour == day_end_hour
+                ):
+                    compute_charge = False
+                    reference_day_type_time_tags[  # type: ignore
+                        run_day_type
+                    ] = time_tags_of_day_type  # type: ignore
+
+        if use_reference_day_cache:
+            save_reference_days(
+                reference_day_cache_file,
+                reference_day_type_time_tags,  # type: ignore
                 battery_spaces,
                 charge_drawn_by_vehicles,
                 charge_drawn_from_network,
-                time_tag,
-                scenario,
-                general_parameters,
+                run_range,
                 location_names,
-                charging_modulation,
             )
 
-            if use_day_types_in_charge_computing and (
-                time_tag.hour == day_end_hour
-            ):
-                compute_charge = False
-                reference_day_type_time_tags[run_day_type] = (  # type: ignore
-                    time_tags_of_day_type
-                )  # type: ignore
-
     if use_day_types_in_charge_computing:
         copy_day_type_profiles_to_whole_run(
             scenario,
@@ -1544,22 +1956,15 @@ def get_charging_profile(
             general_parameters,
             charge_drawn_by_vehicles,
             charge_drawn_from_network,
+            run_departures_impact,
+            travelling_battery_spaces,
+            charging_modulation,
         )
 
     for location_name in location_names:
-        location_total_battery_space: pd.Series = pd.Series(
-            np.zeros(len(run_range)), index=run_range
-        )
-
-        for battery_space in battery_spaces[location_name].columns:
-            location_total_battery_space += (
-                pd.Series(battery_spaces[location_name][battery_space].values)
-                * float(battery_space)
-            ).values
-
-        total_battery_space_per_location[
+        total_battery_space_per_location[location_name] = battery_spaces[
             location_name
-        ] = location_total_battery_space
+        ].weighted_sums()
     charging_costs: pd.DataFrame = charge_drawn_from_network.copy()
     for location in scenario.locations:
         charging_costs[location] *= scenario.locations[location].charging_price
@@ -1634,73 +2039,35 @@ def charging_amounts_in_charging_sessions(
             'Maximal Possible Charge to Vehicles (kWh)'
         ]
     )
-    charging_sessions_with_charged_amounts[
-        'Charge to Vehicles (kWh)'
-    ] = charging_sessions_with_charged_amounts[
-        [
-            'Available Charge to Vehicles (kWh)',
-            'Target charge (kWh)',
-        ]
-    ].min(
-        axis=1
-    )
-    charging_sessions_with_charged_amounts['Charge deficit (kWh)'] = (
-        charging_sessions_with_charged_amounts['Target charge (kWh)']
-        - charging_sessions_with_charged_amounts[
-            'Available Charge to Vehicles (kWh)'
-        ]
-    )
-    charging_sessions_with_charged_amounts['Charge deficit (kWh)'] = [
-        0 if deficit < 0 else deficit
-        for deficit in charging_sessions_with_charged_amounts[
-            'Charge deficit (kWh)'
-        ].values
-    ]
-    total_charge_deficit: float = charging_sessions_with_charged_amounts[
-        'Charge deficit (kWh)'
-    ].sum()
-
-    while total_charge_deficit > 0:
-        rolled_deficit: np.ndarray = np.roll(
-            charging_sessions_with_charged_amounts['Charge deficit (kWh)'], 1
-        )
-
-        charging_sessions_with_charged_amounts['Target charge (kWh)'] = (
-            charging_sessions_with_charged_amounts['Target charge (kWh)']
-            - charging_sessions_with_charged_amounts['Charge deficit (kWh)']
-        )
-        charging_sessions_with_charged_amounts['Target charge (kWh)'] = (
+    # The part of the target charge that a session can not deliver is
+    # carried forward to the next session(s), in one pass over the
+    # sessions (in order)
+    charges_to_vehicles, remaining_charge_deficit = (
+        kernels.roll_over_charge_deficits(
             charging_sessions_with_charged_amounts[
                 'Target charge (kWh)'
-            ].values
-            + rolled_deficit
-        )
-
-        charging_sessions_with_charged_amounts[
-            'Charge to Vehicles (kWh)'
-        ] = charging_sessions_with_charged_amounts[
-            [
-                'Available Charge to Vehicles (kWh)',
-                'Target charge (kWh)',
-            ]
-        ].min(
-            axis=1
-        )
-        charging_sessions_with_charged_amounts['Charge deficit (kWh)'] = (
-            charging_sessions_with_charged_amounts['Target charge (kWh)']
-            - charging_sessions_with_charged_amounts[
+            ].to_numpy(dtype=float),
+            charging_sessions_with_charged_amounts[
                 'Available Charge to Vehicles (kWh)'
-            ]
+            ].to_numpy(dtype=float),
         )
-        charging_sessions_with_charged_amounts['Charge deficit (kWh)'] = [
-            0 if deficit < 0 else deficit
-            for deficit in charging_sessions_with_charged_amounts[
-                'Charge deficit (kWh)'
-            ].values
-        ]
-        total_charge_deficit = charging_sessions_with_charged_amounts[
-            'Charge deficit (kWh)'
-        ].sum()
+    )
+    # The targets include the deficits of previous sessions, so that
+    # they are all met
+    charging_sessions_with_charged_amounts['Target charge (kWh)'] = (
+        charges_to_vehicles
+    )
+    charging_sessions_with_charged_amounts['Charge to Vehicles (kWh)'] = (
+        charges_to_vehicles
+    )
+    # Deficits only remain if the sessions can not absorb them
+    # (this is put on the last session)
+    charge_deficits: np.ndarray = np.zeros(len(charges_to_vehicles))
+    if len(charge_deficits) > 0:
+        charge_deficits[-1] = remaining_charge_deficit
+    charging_sessions_with_charged_amounts['Charge deficit (kWh)'] = (
+        charge_deficits
+    )
 
     charging_sessions_locations: list[str] = list(
         set(charging_sessions_with_charged_amounts['Location'])
@@ -1730,13 +2097,16 @@ def charging_amounts_in_charging_sessions(
             'Charging Power to Vehicles (kW)'
         ]
     )
-    constant_charge_time_shifts: pd.Series = pd.Series(
-        [
-            datetime.timedelta(hours=constant_charge_time)
-            for constant_charge_time in charging_sessions_with_charged_amounts[
+    # The shifts are rounded to the microsecond (as datetime.timedelta does)
+    constant_charge_time_shifts: pd.TimedeltaIndex = (
+        pd.to_timedelta(
+            charging_sessions_with_charged_amounts[
                 'Duration at constant charge (hours)'
-            ]
-        ]
+            ].to_numpy(dtype=float),
+            unit='h',
+        )
+        .round('us')
+        .as_unit('us')
     )
     charging_sessions_with_charged_amounts[
         'End time if constant charge from start'
@@ -1747,9 +2117,11 @@ def charging_amounts_in_charging_sessions(
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     output_root: str = general_parameters.files.output_root
     if pickle_interim_files:
-        charging_sessions_with_charged_amounts.to_pickle(
+        writing.save_interim_table(
+            charging_sessions_with_charged_amounts,
             f'{output_root}/{case_name}/{scenario.name}_'
-            f'charging_sessions_with_charged_amounts.pkl'
+            f'charging_sessions_with_charged_amounts.pkl',
+            general_parameters,
         )
 
     return charging_sessions_with_charged_amounts
@@ -1762,9 +2134,14 @@ def get_profile_from_sessions(
     general_parameters: Box,
     case_name: str,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    charging_profile_from_sessions: pd.DataFrame = (
-        run_time.get_time_stamped_dataframe(scenario, general_parameters)
-    ).fillna(0)
+    '''
+    Makes the charging profiles (to vehicles and from the network) per
+    location from the charging sessions (charging at constant power from
+    their start). This is done as an interval sweep: each session
+    covers the hour slots from its start slot to its end slot, with
+    partial first and last slots, and all the session slots are
+    accumulated into (time tag × location) arrays at once.
+    '''
     charging_profile_to_vehicle_from_sessions: pd.DataFrame = (
         run_time.get_time_stamped_dataframe(scenario, general_parameters)
     ).fillna(0)
@@ -1772,95 +2149,99 @@ def get_profile_from_sessions(
         run_time.get_time_stamped_dataframe(scenario, general_parameters)
     ).fillna(0)
 
-    sessions_charging_slots: list = [
-        pd.date_range(
-            start=session_start.replace(second=0, microsecond=0, minute=0),
-            end=session_end.replace(second=0, microsecond=0, minute=0),
-            inclusive='both',
-            freq='1h',
+    SECONDS_PER_HOUR: int = general_parameters.time.SECONDS_PER_HOUR
+    session_starts: pd.DatetimeIndex = pd.DatetimeIndex(sessions['Start time'])
+    session_ends: pd.DatetimeIndex = pd.DatetimeIndex(
+        sessions['End time if constant charge from start']
+    )
+    session_start_slots: pd.DatetimeIndex = session_starts.floor('h')
+    session_end_slots: pd.DatetimeIndex = session_ends.floor('h')
+    first_slot_non_charging_portions: np.ndarray = (
+        np.asarray((session_starts - session_start_slots).total_seconds())
+        / SECONDS_PER_HOUR
+    )
+    last_slot_charging_portions: np.ndarray = (
+        np.asarray((session_ends - session_end_slots).total_seconds())
+        / SECONDS_PER_HOUR
+    )
+    session_slot_amounts: np.ndarray = (
+        np.asarray(
+            (session_end_slots - session_start_slots)
+            // datetime.timedelta(hours=1),
+            dtype=int,
         )
-        for session_start, session_end in zip(
-            sessions['Start time'],
-            sessions['End time if constant charge from start'],
+        + 1
+    )
+
+    # Each session slot gets an entry, in session (and then slot) order
+    slot_sessions: np.ndarray = np.repeat(
+        np.arange(len(session_slot_amounts)), session_slot_amounts
+    )
+    session_first_entries: np.ndarray = (
+        np.cumsum(session_slot_amounts) - session_slot_amounts
+    )
+    session_last_entries: np.ndarray = (
+        session_first_entries + session_slot_amounts - 1
+    )
+    slot_hours_from_session_start: np.ndarray = (
+        np.arange(len(slot_sessions)) - session_first_entries[slot_sessions]
+    )
+    slot_time_tags: pd.DatetimeIndex = pd.DatetimeIndex(
+        session_start_slots[slot_sessions]
+    ) + pd.to_timedelta(slot_hours_from_session_start, unit='h')
+    # The slots that are not in the run are skipped
+    slot_positions: np.ndarray = (
+        charging_profile_to_vehicle_from_sessions.index.get_indexer(
+            slot_time_tags
         )
-    ]
-    used_powers_to_vehicle: pd.Series = (
-        sessions['Charging Power to Vehicles (kW)']
-        * sessions['Modulation factor']
-    )
-    used_powers_from_network: pd.Series = (
-        sessions['Charging Power from Network (kW)']
-        * sessions['Modulation factor']
-    )
-    sessions_charging_slots_charge_factors_to_vehicle: list[np.ndarray] = [
-        used_power * np.ones(len(session_charging_slots))
-        for session_charging_slots, used_power in zip(
-            sessions_charging_slots, used_powers_to_vehicle
+    )
+    slots_in_run: np.ndarray = slot_positions >= 0
+
+    session_locations: np.ndarray = sessions['Location'].to_numpy()
+    profile_locations: list[str] = sorted(set(session_locations))
+    location_positions: dict[str, int] = {
+        location: location_position
+        for location_position, location in enumerate(profile_locations)
+    }
+    slot_location_positions: np.ndarray = np.array(
+        [location_positions[location] for location in session_locations],
+        dtype=int,
+    )[slot_sessions]
+
+    for charging_profile, used_powers in [
+        (
+            charging_profile_to_vehicle_from_sessions,
+            sessions['Charging Power to Vehicles (kW)']
+            * sessions['Modulation factor'],
+        ),
+        (
+            charging_profile_from_network_from_sessions,
+            sessions['Charging Power from Network (kW)']
+            * sessions['Modulation factor'],
+        ),
+    ]:
+        slot_charges: np.ndarray = np.repeat(
+            used_powers.to_numpy(dtype=float), session_slot_amounts
         )
-    ]
-    sessions_charging_slots_charge_factors_from_network: list[np.ndarray] = [
-        used_power * np.ones(len(session_charging_slots))
-        for session_charging_slots, used_power in zip(
-            sessions_charging_slots, used_powers_from_network
+        # The first and last slots are partial (and for sessions
+        # within a slot, both portions apply)
+        slot_charges[session_first_entries] *= (
+            1 - first_slot_non_charging_portions
         )
-    ]
+        slot_charges[session_last_entries] *= last_slot_charging_portions
 
-    for (
-        session_charging_slots_charge_factors_to_vehicle,
-        session_charging_slots_charge_factors_from_network,
-        start_time,
-        end_time,
-        session_charging_slots,
-    ) in zip(
-        sessions_charging_slots_charge_factors_to_vehicle,
-        sessions_charging_slots_charge_factors_from_network,
-        sessions['Start time'],
-        sessions['End time if constant charge from start'],
-        sessions_charging_slots,
-    ):
-        first_slot_non_charging_portion: float = (
-            start_time - session_charging_slots[0]
-        ).total_seconds() / general_parameters.time.SECONDS_PER_HOUR
-        last_slot_charging_portion: float = (
-            end_time - session_charging_slots[-1]
-        ).total_seconds() / general_parameters.time.SECONDS_PER_HOUR
-
-        session_charging_slots_charge_factors_to_vehicle[0] *= (
-            1 - first_slot_non_charging_portion
-        )
-        session_charging_slots_charge_factors_from_network[0] *= (
-            1 - first_slot_non_charging_portion
+        profile_values: np.ndarray = charging_profile[
+            profile_locations
+        ].to_numpy(dtype=float)
+        np.add.at(
+            profile_values,
+            (
+                slot_positions[slots_in_run],
+                slot_location_positions[slots_in_run],
+            ),
+            slot_charges[slots_in_run],
         )
-        session_charging_slots_charge_factors_to_vehicle[
-            -1
-        ] *= last_slot_charging_portion
-        session_charging_slots_charge_factors_from_network[
-            -1
-        ] *= last_slot_charging_portion
-
-    for (
-        location,
-        session_charging_slots,
-        session_charging_slots_charge_factors_to_vehicle,
-        session_charging_slots_charge_factors_from_network,
-    ) in zip(
-        sessions['Location'],
-        sessions_charging_slots,
-        sessions_charging_slots_charge_factors_to_vehicle,
-        sessions_charging_slots_charge_factors_from_network,
-    ):
-        for time_slot, charge_to_vehicle, charge_from_network in zip(
-            session_charging_slots,
-            session_charging_slots_charge_factors_to_vehicle,
-            session_charging_slots_charge_factors_from_network,
-        ):
-            if time_slot in charging_profile_from_sessions.index:
-                charging_profile_to_vehicle_from_sessions.loc[
-                    time_slot, location
-                ] += charge_to_vehicle
-                charging_profile_from_network_from_sessions.loc[
-                    time_slot, location
-                ] += charge_from_network
+        charging_profile[profile_locations] = profile_values
 
     output_root: str = general_parameters.files.output_root
 
@@ -0,0 +1,326 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module writes the pipeline outputs (such as profiles, charge drawn,
+battery spaces, sessions and consumption tables) to a columnar
+(Parquet) dataset and reads them back.
+
+The dataset is partitioned by case, scenario and table, with one folder
+per partition (case=…/scenario=…/table=…). The tables are compressed
+(with zstd by default) and their float columns are stored as float32
+when this keeps them within a relative tolerance. The tables are written
+in row groups, so that readers can load some columns (and, with the
+row group statistics, some time ranges) of a few scenarios without
+reading whole files. This needs pyarrow.
+
+It contains the following functions:
+1. **get_case_scenario_names:** Gives the names of the scenarios of a case.
+2. **get_dataset_target:** Tells where a table (of the output folder)
+    goes in the dataset, if it is saved there.
+3. **split_table_name:** Splits the name of an output table into its
+    scenario and table names.
+4. **get_partition_folder:** Gives the folder of a partition of the
+    dataset.
+5. **downcast_float_columns:** Stores float columns as float32 where
+    this keeps them within a relative tolerance.
+6. **write_table_to_dataset:** Writes a table to its partition of the
+    dataset.
+7. **get_time_column:** Gives the time column of a dataset table
+    (used to read time ranges).
+8. **read_dataset_table:** Reads (some columns and a time range of)
+    a table of the dataset.
+9. **read_dataset_scenarios:** Reads a table for several scenarios.
+10. **list_dataset_partitions:** Lists the partitions of the dataset.
+'''
+
+import fnmatch
+import os
+
+import numpy as np
+import pandas as pd
+from box import Box
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+
+    PYARROW_AVAILABLE: bool = True
+except ModuleNotFoundError:
+    PYARROW_AVAILABLE = False
+
+# The partition keys of the dataset (in folder order)
+PARTITION_KEYS: list[str] = ['case', 'scenario', 'table']
+PARTITION_FILE_NAME: str = 'part-0.parquet'
+
+
+def get_case_scenario_names(case_name: str) -> list[str]:
+    '''
+    Gives the names of the scenarios of a case (as in
+    scenarios_module.load_scenarios, i.e. the names of the scenario files).
+    '''
+    return [
+        scenario_file.split('.')[0]
+        for scenario_file in os.listdir(f'scenarios/{case_name}')
+        if scenario_file.split('.')[1] == 'toml'
+    ]
+
+
+def get_dataset_target(
+    table_name: str,
+    case_name: str,
+    scenario_names: list[str],
+    general_parameters: Box,
+) -> Box | None:
+    '''
+    Tells where a table of the output folder (named as its file, without
+    extension, i.e. {scenario}_{table}) goes in the dataset (as a Box with
+    the dataset folder and the case, scenario and table of the partition).
+    Gives None if columnar outputs are not saved, if the table does not
+    match any of the columnar table patterns, or if it does not belong
+    to a scenario.
+    '''
+    columnar_parameters: Box = general_parameters.columnar_outputs
+    if not columnar_parameters.save:
+        return None
+    if not any(
+        fnmatch.fnmatchcase(table_name, table_pattern)
+        for table_pattern in columnar_parameters.tables
+    ):
+        return None
+    scenario_and_table: tuple[str, str] | None = split_table_name(
+        table_name, scenario_names
+    )
+    if scenario_and_table is None:
+        return None
+    output_root: str = general_parameters.files.output_root
+    return Box(
+        {
+            'folder': f'{output_root}/{columnar_parameters.folder}',
+            'case': case_name,
+            'scenario': scenario_and_table[0],
+            'table': scenario_and_table[1],
+        }
+    )
+
+
+def split_table_name(
+    table_name: str, scenario_names: list[str]
+) -> tuple[str, str] | None:
+    '''
+    Splits the name of an output table ({scenario}_{table}) into
+    its scenario name and the table name within the scenario.
+    Gives None if the table does not belong to one of the scenarios.
+    '''
+    # Scenario names can contain underscores (and be the start of
+    # other scenario names), so we use the longest one that matches
+    matching_scenario_names: list[str] = [
+        scenario_name
+        for scenario_name in scenario_names
+        if table_name.startswith(f'{scenario_name}_')
+    ]
+    if not matching_scenario_names:
+        return None
+    scenario_name: str = max(matching_scenario_names, key=len)
+    return scenario_name, table_name[len(scenario_name) + 1 :]
+
+
+def get_partition_folder(
+    dataset_folder: str, case_name: str, scenario_name: str, table_name: str
+) -> str:
+    '''
+    Gives the folder of a partition of the dataset
+    (dataset_folder/case=…/scenario=…/table=…).
+    '''
+    partition_path: str = '/'.join(
+        f'{partition_key}={partition_value}'
+        for partition_key, partition_value in zip(
+            PARTITION_KEYS, [case_name, scenario_name, table_name]
+        )
+    )
+    return f'{dataset_folder}/{partition_path}'
+
+
+def downcast_float_columns(
+    table: pd.DataFrame, relative_tolerance: float
+) -> pd.DataFrame:
+    '''
+    Stores the float64 columns of a table as float32 if all their values
+    stay within a relative tolerance (missing values stay missing).
+    Other columns (and the index) are unchanged.
+    '''
+    downcast_table: pd.DataFrame = table.copy(deep=False)
+    for column_position in range(len(table.columns)):
+        column_values: pd.Series = table.iloc[:, column_position]
+        if column_values.dtype != np.float64:
+            continue
+        values: np.ndarray = column_values.to_numpy()
+        # Values that are too large for float32 become infinite,
+        # so they are not within the tolerance
+        with np.errstate(over='ignore'):
+            float32_values: np.ndarray = values.astype(np.float32)
+        if np.allclose(
+            float32_values.astype(np.float64),
+            values,
+            rtol=relative_tolerance,
+            atol=0,
+            equal_nan=True,
+        ):
+            downcast_table.isetitem(column_position, float32_values)
+    return downcast_table
+
+
+def write_table_to_dataset(
+    table: pd.DataFrame | pd.Series,
+    dataset_target: Box,
+    general_parameters: Box,
+) -> str:
+    '''
+    Writes a table (with its index) to its partition of the dataset
+    (see get_dataset_target), with the compression, row group size and
+    float32 downcasting set in the columnar_outputs parameters.
+    Returns the path of the written file.
+    '''
+    if not PYARROW_AVAILABLE:
+        raise ModuleNotFoundError(
+            'Saving columnar outputs needs pyarrow (pip install pyarrow)'
+        )
+    columnar_parameters: Box = general_parameters.columnar_outputs
+    table = pd.DataFrame(table)  # Because some are Series
+    if columnar_parameters.downcast_to_float32:
+        table = downcast_float_columns(
+            table, columnar_parameters.float32_relative_tolerance
+        )
+    partition_folder: str = get_partition_folder(
+        dataset_target.folder,
+        dataset_target.case,
+        dataset_target.scenario,
+        dataset_target.table,
+    )
+    os.makedirs(partition_folder, exist_ok=True)
+    partition_file: str = f'{partition_folder}/{PARTITION_FILE_NAME}'
+    pq.write_table(
+        pa.Table.from_pandas(table, preserve_index=True),
+        partition_file,
+        compression=columnar_parameters.compression,
+        row_group_size=columnar_parameters.row_group_size,
+    )
+    return partition_file
+
+
+def get_time_column(partition_file: str) -> str:
+    '''
+    Gives the time column of a dataset table, which is the first
+    time stamp index column (such as the Time Tag) or, if there is
+    none, the first time stamp column (such as the start time
+    of charging sessions).
+    '''
+    schema: pa.Schema = pq.read_schema(partition_file)
+    index_columns: list[str] = [
+        index_column
+        for index_column in (schema.pandas_metadata or {}).get(
+            'index_columns', []
+        )
+        if isinstance(index_column, str)  # Range indexes are not stored
+    ]
+    timestamp_columns: list[str] = [
+        field.name for field in schema if pa.types.is_timestamp(field.type)
+    ]
+    for time_column in index_columns + timestamp_columns:
+        if time_column in timestamp_columns:
+            return time_column
+    raise ValueError(f'{partition_file} has no time column')
+
+
+def read_dataset_table(
+    dataset_folder: str,
+    case_name: str,
+    scenario_name: str,
+    table_name: str,
+    columns: list[str] | None = None,
+    start: pd.Timestamp | str | None = None,
+    end: pd.Timestamp | str | None = None,
+) -> pd.DataFrame:
+    '''
+    Reads a table of the dataset. Only the given columns (and the index)
+    are read (all of them if columns is None). If a start and/or end
+    is given, only the rows with a time (see get_time_column) from the
+    start and before the end are kept (the row groups that are outside
+    this range are not read).
+    '''
+    if not PYARROW_AVAILABLE:
+        raise ModuleNotFoundError(
+            'Reading columnar outputs needs pyarrow (pip install pyarrow)'
+        )
+    partition_folder: str = get_partition_folder(
+        dataset_folder, case_name, scenario_name, table_name
+    )
+    partition_file: str = f'{partition_folder}/{PARTITION_FILE_NAME}'
+    time_filters: list[tuple] | None = None
+    if start is not None or end is not None:
+        time_column: str = get_time_column(partition_file)
+        time_filters = []
+        if start is not None:
+            time_filters.append((time_column, '>=', pd.Timestamp(start)))
+        if end is not None:
+            time_filters.append((time_column, '<', pd.Timestamp(end)))
+    return pq.read_table(
+        partition_file,
+        columns=columns,
+        filters=time_filters,
+        use_pandas_metadata=True,
+    ).to_pandas()
+
+
+def read_dataset_scenarios(
+    dataset_folder: str,
+    case_name: str,
+    scenario_names: list[str],
+    table_name: str,
+    columns: list[str] | None = None,
+    start: pd.Timestamp | str | None = None,
+    end: pd.Timestamp | str | None = None,
+) -> pd.DataFrame:
+    '''
+    Reads a table (see read_dataset_table) for several scenarios and
+    combines them, with the scenario name as the first index level.
+    '''
+    return pd.concat(
+        [
+            read_dataset_table(
+                dataset_folder,
+                case_name,
+                scenario_name,
+                table_name,
+                columns,
+                start,
+                end,
+            )
+            for scenario_name in scenario_names
+        ],
+        keys=scenario_names,
+        names=['scenario'],
+    )
+
+
+def list_dataset_partitions(dataset_folder: str) -> pd.DataFrame:
+    '''
+    Lists the partitions of the dataset (as a DataFrame with the case,
+    scenario and table of each partition).
+    '''
+    partitions: list[dict[str, str]] = []
+    for partition_folder, _, partition_files in os.walk(dataset_folder):
+        if PARTITION_FILE_NAME not in partition_files:
+            continue
+        partition_values: list[str] = os.path.relpath(
+            partition_folder, dataset_folder
+        ).split(os.sep)
+        partitions.append(
+            {
+                partition_key: partition_value.split('=', 1)[1]
+                for partition_key, partition_value in zip(
+                    PARTITION_KEYS, partition_values
+                )
+            }
+        )
+    return pd.DataFrame(partitions, columns=PARTITION_KEYS).sort_values(
+        PARTITION_KEYS, ignore_index=True
+    )
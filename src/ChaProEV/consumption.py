@@ -20,6 +20,19 @@ except ModuleNotFoundError:
 # We need to add to type: ignore thing to avoid MypY thinking
 # we are importing again
 
+try:
+    import writing  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import writing  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
 
 def create_consumption_tables(
     run_mobility_matrix: pd.DataFrame,
@@ -118,23 +131,35 @@ def create_consumption_tables(
     yearly_consumption_table.index.name = 'Year'
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        consumption_matrix.to_pickle(
-            f'{output_folder}/{scenario_name}_consumption_matrix.pkl'
+        writing.save_interim_table(
+            consumption_matrix,
+            f'{output_folder}/{scenario_name}_consumption_matrix.pkl',
+            general_parameters,
         )
-        consumption_table.to_pickle(
-            f'{output_folder}/{scenario_name}_consumption_table.pkl'
+        writing.save_interim_table(
+            consumption_table,
+            f'{output_folder}/{scenario_name}_consumption_table.pkl',
+            general_parameters,
         )
-        daily_consumption_table.to_pickle(
-            f'{output_folder}/{scenario_name}_daily_consumption_table.pkl'
+        writing.save_interim_table(
+            daily_consumption_table,
+            f'{output_folder}/{scenario_name}_daily_consumption_table.pkl',
+            general_parameters,
         )
-        weekly_consumption_table.to_pickle(
-            f'{output_folder}/{scenario_name}_weekly_consumption_table.pkl'
+        writing.save_interim_table(
+            weekly_consumption_table,
+            f'{output_folder}/{scenario_name}_weekly_consumption_table.pkl',
+            general_parameters,
         )
-        monthly_consumption_table.to_pickle(
-            f'{output_folder}/{scenario_name}_monthly_consumption_table.pkl'
+        writing.save_interim_table(
+            monthly_consumption_table,
+            f'{output_folder}/{scenario_name}_monthly_consumption_table.pkl',
+            general_parameters,
         )
-        yearly_consumption_table.to_pickle(
-            f'{output_folder}/{scenario_name}_yearly_consumption_table.pkl'
+        writing.save_interim_table(
+            yearly_consumption_table,
+            f'{output_folder}/{scenario_name}_yearly_consumption_table.pkl',
+            general_parameters,
         )
 
     consumption_tables_frequencies: list[
@@ -197,12 +222,16 @@ def get_energy_for_next_leg(
     )
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        energy_for_next_leg.to_pickle(
-            f'{output_folder}/{scenario_name}_energy_for_next_leg.pkl'
+        writing.save_interim_table(
+            energy_for_next_leg,
+            f'{output_folder}/{scenario_name}_energy_for_next_leg.pkl',
+            general_parameters,
         )
-        energy_for_next_leg_cumulative.to_pickle(
+        writing.save_interim_table(
+            energy_for_next_leg_cumulative,
             f'{output_folder}/{scenario_name}'
-            '_energy_for_next_leg_cumulative.pkl'
+            '_energy_for_next_leg_cumulative.pkl',
+            general_parameters,
         )
 
 
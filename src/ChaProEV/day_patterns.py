@@ -0,0 +1,308 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module defines a compact structure for run-level tables that
+repeat daily patterns.
+
+Most run-level tables (such as the location split of a trip, or
+the probability-weighted sums of these over all trips) are a pattern for
+a day (starting at the day start hour) that is repeated according to
+the calendar. Instead of storing a value for each time tag of the run,
+we store the distinct day patterns and, for each day of the run, which
+pattern it uses. Memory and computations then scale with the amount of
+distinct patterns (day types) instead of the run length.
+
+It contains the following class:
+1. **DayPatternSeries:** Holds a (pattern × hour in day × column) array
+of values and a pattern code for each day of the run.
+It supports arithmetic (with numbers or other DayPatternSeries over the
+same run), weighted sums of day tables (for example across trips) and
+materialisation to a DataFrame with the run time tags as index.
+
+And the following functions:
+1. **get_run_day_and_hour_numbers:** Gives the day number and hour in day
+of each time tag of the run.
+2. **get_pattern_weights:** Gives the distinct per-day rows of run-level
+weights and the code of each day of the run.
+'''
+
+import datetime
+import typing as ty
+
+import numpy as np
+import pandas as pd
+
+
+class DayPatternSeries:
+    '''
+    This class stores run-level values as distinct day patterns
+    (an array of pattern × hour in day × column) and a pattern code
+    for each day of the run. Days start at the day start hour, so
+    hour in day zero is the day start hour.
+    '''
+
+    class_name: str = 'day_pattern_series'
+
+    def __init__(
+        self,
+        patterns: np.ndarray,
+        day_codes: np.ndarray,
+        columns: list,
+        run_range: pd.DatetimeIndex,
+        day_start_hour: int,
+    ) -> None:
+        self.patterns: np.ndarray = np.asarray(patterns, dtype=float)
+        self.day_codes: np.ndarray = np.asarray(day_codes, dtype=int)
+        self.columns: list = list(columns)
+        self.run_range: pd.DatetimeIndex = run_range
+        self.day_start_hour: int = day_start_hour
+        self.run_day_numbers, self.run_hours_in_day = (
+            get_run_day_and_hour_numbers(run_range, day_start_hour)
+        )
+        if len(self.day_codes) != self.run_day_numbers[-1] + 1:
+            raise ValueError(
+                'The amount of day codes does not match the days of the run'
+            )
+
+    @classmethod
+    def from_day_table(
+        cls,
+        day_table: pd.DataFrame | pd.Series,
+        run_range: pd.DatetimeIndex,
+        day_start_hour: int,
+    ) -> 'DayPatternSeries':
+        '''
+        Makes a DayPatternSeries that repeats a table for a day
+        (with one row per hour from day start) every day of the run.
+        '''
+        day_table = pd.DataFrame(day_table)
+        run_day_numbers, _ = get_run_day_and_hour_numbers(
+            run_range, day_start_hour
+        )
+        return cls(
+            day_table.to_numpy(dtype=float)[np.newaxis],
+            np.zeros(run_day_numbers[-1] + 1, dtype=int),
+            list(day_table.columns),
+            run_range,
+            day_start_hour,
+        )
+
+    @classmethod
+    def weighted_sum(
+        cls,
+        day_tables: list[pd.DataFrame | pd.Series],
+        run_weights: pd.DataFrame | np.ndarray,
+        columns: list,
+        run_range: pd.DatetimeIndex,
+        day_start_hour: int,
+    ) -> 'DayPatternSeries':
+        '''
+        Sums day tables (for example of trips), each weighted by
+        run-level weights (for example the trip probabilities, with one
+        weight column per day table), which need to be the same for all
+        time tags of a day. The columns of each day table are added
+        to the corresponding columns of the sum.
+        '''
+        return cls.weighted_sums(
+            [day_tables], run_weights, [columns], run_range, day_start_hour
+        )[0]
+
+    @classmethod
+    def weighted_sums(
+        cls,
+        quantity_day_tables: list[list[pd.DataFrame | pd.Series]],
+        run_weights: pd.DataFrame | np.ndarray,
+        quantity_columns: list[list],
+        run_range: pd.DatetimeIndex,
+        day_start_hour: int,
+    ) -> list['DayPatternSeries']:
+        '''
+        Does weighted sums (see weighted_sum) for several quantities
+        at once. Each quantity has a list of day tables (one per weight
+        column) and its columns (all quantities need the same amount
+        of columns). The day tables are stacked in a
+        (table × hour × column × quantity) array, which is combined with
+        the weights of the distinct days in one matrix product.
+        '''
+        pattern_weights, day_codes = get_pattern_weights(
+            run_weights, run_range, day_start_hour
+        )
+        first_day_table: pd.DataFrame = pd.DataFrame(quantity_day_tables[0][0])
+        stacked_day_tables: np.ndarray = np.zeros(
+            (
+                len(quantity_day_tables[0]),
+                len(first_day_table),
+                len(quantity_columns[0]),
+                len(quantity_day_tables),
+            )
+        )
+        for quantity_index, (day_tables, columns) in enumerate(
+            zip(quantity_day_tables, quantity_columns)
+        ):
+            column_positions: dict = {
+                column: column_position
+                for column_position, column in enumerate(columns)
+            }
+            for table_index, day_table in enumerate(day_tables):
+                day_table = pd.DataFrame(day_table)
+                stacked_day_tables[table_index][
+                    :,
+                    [
+                        column_positions[table_column]
+                        for table_column in day_table.columns
+                    ],
+                    quantity_index,
+                ] = day_table.to_numpy(dtype=float)
+
+        summed_patterns: np.ndarray = np.einsum(
+            'pt,thcq->phcq', pattern_weights, stacked_day_tables
+        )
+
+        return [
+            cls(
+                summed_patterns[..., quantity_index],
+                day_codes,
+                columns,
+                run_range,
+                day_start_hour,
+            )
+            for quantity_index, columns in enumerate(quantity_columns)
+        ]
+
+    def combine(
+        self,
+        other: ty.Any,
+        operation: ty.Callable[[np.ndarray, ty.Any], np.ndarray],
+    ) -> 'DayPatternSeries':
+        '''
+        Applies an element-wise operation with a number (or array that
+        broadcasts to the patterns) or another DayPatternSeries over the
+        same run. With another DayPatternSeries, each distinct pair of
+        patterns used on a day gets a pattern.
+        '''
+        if not isinstance(other, DayPatternSeries):
+            return DayPatternSeries(
+                operation(self.patterns, other),
+                self.day_codes,
+                self.columns,
+                self.run_range,
+                self.day_start_hour,
+            )
+        if not self.run_range.equals(other.run_range):
+            raise ValueError('Both DayPatternSeries need the same run')
+        pattern_pairs, day_codes = np.unique(
+            np.stack((self.day_codes, other.day_codes), axis=1),
+            axis=0,
+            return_inverse=True,
+        )
+        return DayPatternSeries(
+            operation(
+                self.patterns[pattern_pairs[:, 0]],
+                other.patterns[pattern_pairs[:, 1]],
+            ),
+            np.ravel(day_codes),
+            self.columns,
+            self.run_range,
+            self.day_start_hour,
+        )
+
+    def __add__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, np.add)
+
+    def __radd__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, lambda values, number: number + values)
+
+    def __sub__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, np.subtract)
+
+    def __rsub__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, lambda values, number: number - values)
+
+    def __mul__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, np.multiply)
+
+    def __rmul__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, lambda values, number: number * values)
+
+    def __truediv__(self, other: ty.Any) -> 'DayPatternSeries':
+        return self.combine(other, np.divide)
+
+    def __neg__(self) -> 'DayPatternSeries':
+        return self.combine(-1, np.multiply)
+
+    def sum_columns(self, column_name: str) -> 'DayPatternSeries':
+        '''
+        Sums the columns into a single column with a given name.
+        '''
+        return DayPatternSeries(
+            self.patterns.sum(axis=2, keepdims=True),
+            self.day_codes,
+            [column_name],
+            self.run_range,
+            self.day_start_hour,
+        )
+
+    def get_values(self) -> np.ndarray:
+        '''
+        Gives the values for each time tag of the run (as an array with
+        one row per time tag and one column per column).
+        '''
+        return self.patterns[
+            self.day_codes[self.run_day_numbers], self.run_hours_in_day
+        ]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''
+        Gives the values as a DataFrame with the run time tags as index.
+        '''
+        return pd.DataFrame(
+            self.get_values(), columns=self.columns, index=self.run_range
+        )
+
+
+def get_run_day_and_hour_numbers(
+    run_range: pd.DatetimeIndex, day_start_hour: int
+) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Gives the day number (counting from the first day of the run)
+    and the hour in day (from the day start hour) of each time tag
+    of the run.
+    '''
+    shifted_run_range: pd.DatetimeIndex = run_range - datetime.timedelta(
+        hours=day_start_hour
+    )
+    shifted_run_days: pd.DatetimeIndex = shifted_run_range.normalize()
+    run_day_numbers: np.ndarray = np.asarray(
+        (shifted_run_days - shifted_run_days[0]).days, dtype=int
+    )
+    run_hours_in_day: np.ndarray = np.asarray(
+        shifted_run_range.hour, dtype=int
+    )
+    return run_day_numbers, run_hours_in_day
+
+
+def get_pattern_weights(
+    run_weights: pd.DataFrame | np.ndarray,
+    run_range: pd.DatetimeIndex,
+    day_start_hour: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Gives the distinct (per-day) rows of run-level weights, which need
+    to be the same for all time tags of a day, and the code (position in
+    these distinct rows) of each day of the run.
+    '''
+    run_weight_values: np.ndarray = np.asarray(run_weights, dtype=float)
+    run_day_numbers, _ = get_run_day_and_hour_numbers(
+        run_range, day_start_hour
+    )
+    day_first_positions: np.ndarray = np.unique(
+        run_day_numbers, return_index=True
+    )[1]
+    day_weights: np.ndarray = run_weight_values[day_first_positions]
+    if not np.array_equal(
+        day_weights[run_day_numbers], run_weight_values, equal_nan=True
+    ):
+        raise ValueError('The weights need to be constant within a day')
+    pattern_weights, day_codes = np.unique(
+        day_weights, axis=0, return_inverse=True
+    )
+    return pattern_weights, np.ravel(day_codes)
@@ -18,7 +18,9 @@ to run that function for all class types.
 '''
 
 import datetime
+import functools
 import math
+import typing as ty
 
 import numpy as np
 import pandas as pd
@@ -39,6 +41,79 @@ except ModuleNotFoundError:
 # We need to add to type: ignore thing to avoid MypY thinking
 # we are importing again
 
+try:
+    import writing  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import writing  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+
+# The trip tables that are saved as interim files (as
+# {scenario}_{trip}_{table}), if requested
+TRIP_INTERIM_TABLES: list[str] = [
+    'mobility_matrix',
+    'run_mobility_matrix',
+    'next_leg_kilometers',
+    'run_next_leg_kilometers',
+    'next_leg_kilometers_cumulative',
+    'run_next_leg_kilometers_cumulative',
+    'next_leg_charge_to_vehicle',
+    'next_leg_charge_from_network',
+    'run_next_leg_charge_to_vehicle',
+    'run_next_leg_charge_from_network',
+    'next_leg_charge_to_vehicle_cumulative',
+    'next_leg_charge_from_network_cumulative',
+    'run_next_leg_charge_to_vehicle_cumulative',
+    'run_next_leg_charge_from_network_cumulative',
+    'location_split',
+    'run_location_split',
+    'percentage_driving',
+    'run_percentage_driving',
+    'connectivity_per_location',
+    'run_connectivity_per_location',
+    'connectivity',
+    'run_connectivity',
+    'maximal_delivered_power_per_location',
+    'run_maximal_delivered_power_per_location',
+    'maximal_delivered_power',
+    'run_maximal_delivered_power',
+    'maximal_received_power_per_location',
+    'run_maximal_received_power_per_location',
+    'maximal_received_power',
+    'run_maximal_received_power',
+    'vehicle_discharge_power_per_location',
+    'run_vehicle_discharge_power_per_location',
+    'vehicle_discharge_power',
+    'run_vehicle_discharge_power',
+    'discharge_power_to_network_per_location',
+    'run_discharge_power_to_network_per_location',
+    'discharge_power_to_network',
+    'run_discharge_power_to_network',
+    'battery_space_shifts_departures',
+    'battery_space_shifts_departures_impact',
+    'battery_space_shifts_arrivals',
+    'battery_space_shifts_arrivals_impact',
+    'battery_space_shifts_departures_weighted',
+    'battery_space_shifts_departures_impact_weighted',
+    'battery_space_shifts_arrivals_weighted',
+    'battery_space_shifts_arrivals_impact_weighted',
+    'run_battery_space_shifts_departures',
+    'run_battery_space_shifts_departures_impact',
+    'run_battery_space_shifts_arrivals',
+    'run_battery_space_shifts_arrivals_impact',
+    'run_battery_space_shifts_departures_weighted',
+    'run_battery_space_shifts_departures_impact_weighted',
+    'run_battery_space_shifts_arrivals_weighted',
+    'run_battery_space_shifts_arrivals_impact_weighted',
+]
+
 
 def get_trip_charging_sessions(
     end_locations_of_legs: list[str],
@@ -224,18 +299,24 @@ def get_slot_split(
 
 def compute_travel_impact(
     impacted_type: str,
-    mobility_matrix,  # It is a DataFrame, but MyPy has issues with MultiIndex
-    # DataFrames (and using loc on them)
+    mobility_impacts: list[tuple[int, str, float]],
     travelling_group_size: float,
-    travelling_group_first_slot: int,
+    travelling_group_first_row: int,
     percent_in_first_slot: float,
-    leg_origin: str,
-    leg_destination: str,
     distance: float,
     weighted_distance: float,
-    battery_space_shifts: dict,
+    battery_space_shift_impacts: dict[
+        tuple[str, str], list[tuple[int, float, float]]
+    ],
     vehicle_electricity_consumption: float,
-) -> pd.DataFrame:
+) -> None:
+    '''
+    Adds the impacts of the departures or arrivals of a travelling group
+    (for a leg) to the mobility matrix and battery space shifts impacts.
+    These impacts are (row position, column, value) entries, which are
+    added to the tables in one go once all travelling groups and legs
+    have been processed (see accumulate_travel_impacts).
+    '''
     leg_consumption: float = vehicle_electricity_consumption * distance
     weighted_leg_consumption: float = (
         vehicle_electricity_consumption * weighted_distance
@@ -244,265 +325,116 @@ def compute_travel_impact(
     first_slot_impact, second_slot_impact, third_slot_impact = get_slot_split(
         percent_in_first_slot, travelling_group_size
     )
+    slot_impacts: list[float] = [
+        first_slot_impact,
+        second_slot_impact,
+        third_slot_impact,
+    ]
+    # The amounts are split between the first two slots only
+    slot_amounts: list[float] = [
+        travelling_group_size * percent_in_first_slot,
+        travelling_group_size * (1 - percent_in_first_slot),
+        0,
+    ]
 
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} impact',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} impact']
-        + first_slot_impact
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} amount',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} amount']
-        + travelling_group_size * percent_in_first_slot
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} impact kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} impact kilometers']
-        + first_slot_impact * distance
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} kilometers']
-        + travelling_group_size * percent_in_first_slot * distance
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} impact weighted kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} impact weighted kilometers']
-        + first_slot_impact * weighted_distance
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        f'{impacted_type} weighted kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][f'{impacted_type} weighted kilometers']
-        + travelling_group_size * percent_in_first_slot * weighted_distance
-    )
-
-    battery_space_shifts[(impacted_type, 'Impact')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][leg_consumption]
-        + first_slot_impact
-    )
-    battery_space_shifts[(impacted_type, 'Amount')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Amount')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][leg_consumption]
-        + travelling_group_size * percent_in_first_slot
-    )
-    battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        weighted_leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][weighted_leg_consumption]
-        + first_slot_impact
-    )
-    battery_space_shifts[(impacted_type, 'Amount Weighted')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot),
-        weighted_leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Amount Weighted')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot
-        ][weighted_leg_consumption]
-        + travelling_group_size * percent_in_first_slot
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} impact',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][f'{impacted_type} impact']
-        + second_slot_impact
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} amount',
-    ] = mobility_matrix.loc[
-        leg_origin, leg_destination, travelling_group_first_slot + 1
-    ][
-        f'{impacted_type} amount'
-    ] + travelling_group_size * (
-        1 - percent_in_first_slot
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} impact kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][f'{impacted_type} impact kilometers']
-        + second_slot_impact * distance
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][f'{impacted_type} kilometers']
-        + travelling_group_size * (1 - percent_in_first_slot) * distance
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} impact weighted kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][f'{impacted_type} impact weighted kilometers']
-        + second_slot_impact * weighted_distance
-    )
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        f'{impacted_type} weighted kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][f'{impacted_type} weighted kilometers']
-        + travelling_group_size
-        * (1 - percent_in_first_slot)
-        * weighted_distance
-    )
-
-    battery_space_shifts[(impacted_type, 'Impact')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][leg_consumption]
-        + second_slot_impact
-    )
-    battery_space_shifts[(impacted_type, 'Amount')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        leg_consumption,
-    ] = battery_space_shifts[(impacted_type, 'Amount')].loc[
-        leg_origin, leg_destination, travelling_group_first_slot + 1
-    ][
-        leg_consumption
-    ] + travelling_group_size * (
-        1 - percent_in_first_slot
-    )
-    battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        weighted_leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 1
-        ][weighted_leg_consumption]
-        + second_slot_impact
-    )
-    battery_space_shifts[(impacted_type, 'Amount Weighted')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 1),
-        weighted_leg_consumption,
-    ] = battery_space_shifts[(impacted_type, 'Amount Weighted')].loc[
-        leg_origin, leg_destination, travelling_group_first_slot + 1
-    ][
-        weighted_leg_consumption
-    ] + travelling_group_size * (
-        1 - percent_in_first_slot
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 2),
-        f'{impacted_type} impact',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 2
-        ][f'{impacted_type} impact']
-        + third_slot_impact
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 2),
-        f'{impacted_type} impact kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 2
-        ][f'{impacted_type} impact kilometers']
-        + third_slot_impact * distance
-    )
-
-    mobility_matrix.loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 2),
-        f'{impacted_type} impact weighted kilometers',
-    ] = (
-        mobility_matrix.loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 2
-        ][f'{impacted_type} impact weighted kilometers']
-        + third_slot_impact * weighted_distance
-    )
+    for slot_shift, (slot_impact, slot_amount) in enumerate(
+        zip(slot_impacts, slot_amounts)
+    ):
+        slot_row: int = travelling_group_first_row + slot_shift
+        mobility_impacts.extend(
+            [
+                (slot_row, f'{impacted_type} impact', slot_impact),
+                (slot_row, f'{impacted_type} amount', slot_amount),
+                (
+                    slot_row,
+                    f'{impacted_type} impact kilometers',
+                    slot_impact * distance,
+                ),
+                (
+                    slot_row,
+                    f'{impacted_type} kilometers',
+                    slot_amount * distance,
+                ),
+                (
+                    slot_row,
+                    f'{impacted_type} impact weighted kilometers',
+                    slot_impact * weighted_distance,
+                ),
+                (
+                    slot_row,
+                    f'{impacted_type} weighted kilometers',
+                    slot_amount * weighted_distance,
+                ),
+            ]
+        )
+        battery_space_shift_impacts[(impacted_type, 'Impact')].append(
+            (slot_row, leg_consumption, slot_impact)
+        )
+        battery_space_shift_impacts[(impacted_type, 'Amount')].append(
+            (slot_row, leg_consumption, slot_amount)
+        )
+        battery_space_shift_impacts[(impacted_type, 'Impact Weighted')].append(
+            (slot_row, weighted_leg_consumption, slot_impact)
+        )
+        battery_space_shift_impacts[(impacted_type, 'Amount Weighted')].append(
+            (slot_row, weighted_leg_consumption, slot_amount)
+        )
 
-    battery_space_shifts[(impacted_type, 'Impact')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 2),
-        leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 2
-        ][leg_consumption]
-        + third_slot_impact
-    )
 
-    battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-        (leg_origin, leg_destination, travelling_group_first_slot + 2),
-        weighted_leg_consumption,
-    ] = (
-        battery_space_shifts[(impacted_type, 'Impact Weighted')].loc[
-            leg_origin, leg_destination, travelling_group_first_slot + 2
-        ][weighted_leg_consumption]
-        + third_slot_impact
+def accumulate_travel_impacts(
+    base_table: pd.DataFrame,
+    travel_impacts: list[tuple[int, ty.Any, float]],
+) -> np.ndarray:
+    '''
+    Adds travel impacts (row position, column, value) to the values
+    of a table. The impacts are added in the order in which they were
+    computed, so that the sums are the same as when adding them one by one.
+    All the impact columns need to be in the table.
+    '''
+    accumulated_values: np.ndarray = base_table.to_numpy(
+        dtype=float, copy=True
     )
-
-    return mobility_matrix
+    if len(travel_impacts) > 0:
+        impact_rows, impact_columns, impact_values = zip(*travel_impacts)
+        impact_column_positions: np.ndarray = base_table.columns.get_indexer(
+            list(impact_columns)
+        )
+        # Missing columns get a position of -1, which would add their
+        # impacts to the last column
+        if (impact_column_positions < 0).any():
+            missing_columns: list = list(
+                dict.fromkeys(
+                    impact_column
+                    for impact_column, impact_column_position in zip(
+                        impact_columns, impact_column_positions
+                    )
+                    if impact_column_position < 0
+                )
+            )
+            raise KeyError(f'Columns {missing_columns} are not in the table')
+        np.add.at(
+            accumulated_values,
+            (np.array(impact_rows), impact_column_positions),
+            np.array(impact_values),
+        )
+    return accumulated_values
 
 
 def get_travelling_group_travel_impact(
-    mobility_matrix: pd.DataFrame,
+    mobility_impacts: list[tuple[int, str, float]],
     travelling_group_size: float,
     travelling_group_start_slot: int,
     time_between_legs_used: list[float],
     leg_driving_times: list[float],
-    start_locations_of_legs: list[str],
-    end_locations_of_legs: list[str],
+    leg_first_rows: list[int],
     leg_distances: list[float],
     leg_weighted_distances: list[float],
-    battery_space_shifts: dict[tuple[str, str], pd.DataFrame],
+    battery_space_shift_impacts: dict[
+        tuple[str, str], list[tuple[int, float, float]]
+    ],
     vehicle_electricity_consumption: float,
     HOURS_IN_A_DAY: int,
-) -> pd.DataFrame:
+) -> None:
     travelling_group_first_slot: int = travelling_group_start_slot
     percent_in_first_slot: float = 1
     if travelling_group_first_slot + 2 >= HOURS_IN_A_DAY:
@@ -511,16 +443,14 @@ def get_travelling_group_travel_impact(
     # The trips start uniformly within the first slot
 
     for leg_index, (
-        leg_origin,
-        leg_destination,
+        leg_first_row,
         time_after_leg,
         time_driving,
         distance,
         weighted_distance,
     ) in enumerate(
         zip(
-            start_locations_of_legs,
-            end_locations_of_legs,
+            leg_first_rows,
             time_between_legs_used,
             leg_driving_times,
             leg_distances,
@@ -529,17 +459,15 @@ def get_travelling_group_travel_impact(
     ):
         # We begin with the impact of departures
 
-        mobility_matrix = compute_travel_impact(
+        compute_travel_impact(
             'Departures',
-            mobility_matrix,
+            mobility_impacts,
             travelling_group_size,
-            travelling_group_first_slot,
+            leg_first_row + travelling_group_first_slot,
             percent_in_first_slot,
-            leg_origin,
-            leg_destination,
             distance,
             weighted_distance,
-            battery_space_shifts,
+            battery_space_shift_impacts,
             vehicle_electricity_consumption,
         )
 
@@ -556,17 +484,15 @@ def get_travelling_group_travel_impact(
             exit()
 
         # We now look at the impact of arrivals
-        mobility_matrix = compute_travel_impact(
+        compute_travel_impact(
             'Arrivals',
-            mobility_matrix,
+            mobility_impacts,
             travelling_group_size,
-            travelling_group_first_slot,
+            leg_first_row + travelling_group_first_slot,
             percent_in_first_slot,
-            leg_origin,
-            leg_destination,
             distance,
             weighted_distance,
-            battery_space_shifts,
+            battery_space_shift_impacts,
             vehicle_electricity_consumption,
         )
 
@@ -582,8 +508,6 @@ def get_travelling_group_travel_impact(
             print('dddd')
             exit()
 
-    return mobility_matrix
-
 
 def get_location_split_and_impact_of_departures_and_arrivals(
     location_names: list[str],
@@ -609,25 +533,58 @@ def get_location_split_and_impact_of_departures_and_arrivals(
         # same length as the amount of legs
         time_between_legs_used: list[float] = time_between_legs.copy()
         time_between_legs_used.append(dummy_time_between_legs)
+
+        # The mobility matrix and the battery space shifts have the same
+        # (sorted) index, where each leg has a block of rows with one row
+        # per hour number, so we get the row position of the first
+        # hour of each leg
+        leg_first_rows: list[int] = [
+            mobility_matrix.index.get_loc((leg_origin, leg_destination, 0))
+            for leg_origin, leg_destination in zip(
+                start_locations_of_legs, end_locations_of_legs
+            )
+        ]
+        mobility_impacts: list[tuple[int, str, float]] = []
+        battery_space_shift_impacts: dict[
+            tuple[str, str], list[tuple[int, float, float]]
+        ] = {
+            battery_space_shift_type: []
+            for battery_space_shift_type in battery_space_shifts
+        }
         for travelling_group_start_slot, travelling_group_size in enumerate(
             start_probabilities
         ):
             if travelling_group_size > 0:
-                mobility_matrix = get_travelling_group_travel_impact(
-                    mobility_matrix,
+                get_travelling_group_travel_impact(
+                    mobility_impacts,
                     travelling_group_size,
                     travelling_group_start_slot,
                     time_between_legs_used,
                     leg_driving_times,
-                    start_locations_of_legs,
-                    end_locations_of_legs,
+                    leg_first_rows,
                     leg_distances,
                     weighted_leg_distances,
-                    battery_space_shifts,
+                    battery_space_shift_impacts,
                     vehicle_electricity_consumption,
                     HOURS_IN_A_DAY,
                 )
 
+        mobility_matrix = pd.DataFrame(
+            accumulate_travel_impacts(mobility_matrix, mobility_impacts),
+            columns=mobility_matrix.columns,
+            index=mobility_matrix.index,
+        )
+        # The battery space shifts tables are updated in place, as the
+        # trip also refers to them directly
+        for (
+            battery_space_shift_type,
+            battery_space_shift_table,
+        ) in battery_space_shifts.items():
+            battery_space_shift_table.iloc[:, :] = accumulate_travel_impacts(
+                battery_space_shift_table,
+                battery_space_shift_impacts[battery_space_shift_type],
+            )
+
         possible_origins: list[str] = list(
             set(mobility_matrix.index.get_level_values('From'))
         )
@@ -1174,206 +1131,16 @@ class Trip:
             )
         )
 
-        # We now can create a mobility matrix for the whole run
-        run_time_tags: pd.DatetimeIndex = run_time.get_time_range(
+        # The run versions of the trip tables (which clone the tables
+        # for a day over the whole run) are only computed when they
+        # are used (see the cached properties below), as most of them
+        # are not needed and they are large for long runs
+        self.leg_tuples: list[tuple[str, str]] = leg_tuples
+        self.run_time_tags: pd.DatetimeIndex = run_time.get_time_range(
             scenario, general_parameters
         )[0]
-
-        # We only want the start and end locations that are in the legs
-        run_mobility_index_tuples: list[tuple[str, str, datetime.datetime]] = [
-            (leg_tuple[0], leg_tuple[1], time_tag)
-            for leg_tuple in leg_tuples
-            for time_tag in run_time_tags
-        ]
-
-        mobility_index_names: list[str] = (
-            scenario.mobility_module.mobility_index_names
-        )
-        run_mobility_index: pd.MultiIndex = pd.MultiIndex.from_tuples(
-            run_mobility_index_tuples, names=mobility_index_names
-        )
-
-        self.run_mobility_matrix: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.mobility_matrix,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        ).astype(float)
-
-        self.run_battery_space_shifts_departures: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_departures,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_battery_space_shifts_departures_impact: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_departures_impact,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_battery_space_shifts_arrivals: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_arrivals,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_battery_space_shifts_arrivals_impact: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_arrivals_impact,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-
-        self.run_battery_space_shifts_departures_weighted: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_departures_weighted,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_battery_space_shifts_departures_impact_weighted: (
-            pd.DataFrame
-        ) = mobility_matrix_to_run_mobility_matrix(
-            self.battery_space_shifts_departures_impact_weighted,
-            leg_tuples,
-            run_mobility_index,
-            run_time_tags,
-            self.day_start_hour,
-            scenario,
-            general_parameters,
-        )
-        self.run_battery_space_shifts_arrivals_weighted: pd.DataFrame = (
-            mobility_matrix_to_run_mobility_matrix(
-                self.battery_space_shifts_arrivals_weighted,
-                leg_tuples,
-                run_mobility_index,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_battery_space_shifts_arrivals_impact_weighted: (
-            pd.DataFrame
-        ) = mobility_matrix_to_run_mobility_matrix(
-            self.battery_space_shifts_arrivals_impact_weighted,
-            leg_tuples,
-            run_mobility_index,
-            run_time_tags,
-            self.day_start_hour,
-            scenario,
-            general_parameters,
-        )
-
-        # We also do this for some other quantities
-        day_start_hour: int = scenario.mobility_module.day_start_hour
-        self.run_location_split: pd.DataFrame = run_time.from_day_to_run(
-            self.location_split,
-            run_time_tags,
-            day_start_hour,
-            scenario,
-            general_parameters,
-        )
-
-        self.run_connectivity_per_location: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.connectivity_per_location,
-                run_time_tags,
-                day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_maximal_delivered_power_per_location: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.maximal_delivered_power_per_location,
-                run_time_tags,
-                day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-        self.run_maximal_received_power_per_location: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.maximal_received_power_per_location,
-                run_time_tags,
-                day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-
-        self.run_vehicle_discharge_power_per_location: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.vehicle_discharge_power_per_location,
-                run_time_tags,
-                day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-
-        self.run_discharge_power_to_network_per_location: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.discharge_power_to_network_per_location,
-                run_time_tags,
-                day_start_hour,
-                scenario,
-                general_parameters,
-            )
-        )
-
-        self.run_percentage_driving: pd.Series = (
-            1 - self.run_location_split.sum(axis=1)
-        )
-
-        self.run_connectivity: pd.Series = (
-            self.run_connectivity_per_location.sum(axis=1)
-        )
-        self.run_maximal_delivered_power: pd.Series = (
-            self.run_maximal_delivered_power_per_location.sum(axis=1)
-        )
-        self.run_maximal_received_power: pd.Series = (
-            self.run_maximal_received_power_per_location.sum(axis=1)
-        )
-
-        self.run_vehicle_discharge_power: pd.Series = (
-            self.run_vehicle_discharge_power_per_location.sum(axis=1)
-        )
-
-        self.run_discharge_power_to_network: pd.Series = (
-            self.run_discharge_power_to_network_per_location.sum(axis=1)
-        )
+        self.scenario: Box = scenario
+        self.general_parameters: Box = general_parameters
 
         self.next_leg_kilometers: pd.DataFrame = pd.DataFrame(
             np.zeros((HOURS_IN_A_DAY, len(self.location_names))),
@@ -1488,61 +1255,172 @@ class Trip:
                 * draw_from_network_per_km
             )
 
-        self.run_next_leg_kilometers: pd.DataFrame = run_time.from_day_to_run(
-            self.next_leg_kilometers,
-            run_time_tags,
+    def day_to_run(self, day_table: pd.DataFrame) -> pd.DataFrame:
+        '''
+        Clones a table for a day (with zero at day start) for the whole run.
+        '''
+        return run_time.from_day_to_run(
+            day_table,
+            self.run_time_tags,
             self.day_start_hour,
-            scenario,
-            general_parameters,
+            self.scenario,
+            self.general_parameters,
+        )
+
+    def mobility_day_to_run(self, mobility_day_table) -> pd.DataFrame:
+        '''
+        Clones a table for a day with a (From, To, Hour number) index
+        (such as the mobility matrix) for the whole run.
+        '''
+        return mobility_matrix_to_run_mobility_matrix(
+            mobility_day_table,
+            self.leg_tuples,
+            self.run_mobility_index,
+            self.run_time_tags,
+            self.day_start_hour,
+            self.scenario,
+            self.general_parameters,
         )
-        self.run_next_leg_kilometers_cumulative: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.next_leg_kilometers_cumulative,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
+
+    @functools.cached_property
+    def run_mobility_index(self) -> pd.MultiIndex:
+        # We only want the start and end locations that are in the legs
+        run_mobility_index_tuples: list[tuple[str, str, datetime.datetime]] = [
+            (leg_tuple[0], leg_tuple[1], time_tag)
+            for leg_tuple in self.leg_tuples
+            for time_tag in self.run_time_tags
+        ]
+        mobility_index_names: list[str] = (
+            self.scenario.mobility_module.mobility_index_names
+        )
+        return pd.MultiIndex.from_tuples(
+            run_mobility_index_tuples, names=mobility_index_names
         )
 
-        self.run_next_leg_charge_to_vehicle: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.next_leg_charge_to_vehicle,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
+    @functools.cached_property
+    def run_mobility_matrix(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(self.mobility_matrix).astype(float)
+
+    @functools.cached_property
+    def run_battery_space_shifts_departures(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(self.battery_space_shifts_departures)
+
+    @functools.cached_property
+    def run_battery_space_shifts_departures_impact(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_departures_impact
         )
-        self.run_next_leg_charge_to_vehicle_cumulative: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.next_leg_charge_to_vehicle_cumulative,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
+
+    @functools.cached_property
+    def run_battery_space_shifts_arrivals(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(self.battery_space_shifts_arrivals)
+
+    @functools.cached_property
+    def run_battery_space_shifts_arrivals_impact(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_arrivals_impact
         )
 
-        self.run_next_leg_charge_from_network: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.next_leg_charge_from_network,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
+    @functools.cached_property
+    def run_battery_space_shifts_departures_weighted(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_departures_weighted
         )
-        self.run_next_leg_charge_from_network_cumulative: pd.DataFrame = (
-            run_time.from_day_to_run(
-                self.next_leg_charge_from_network_cumulative,
-                run_time_tags,
-                self.day_start_hour,
-                scenario,
-                general_parameters,
-            )
+
+    @functools.cached_property
+    def run_battery_space_shifts_departures_impact_weighted(
+        self,
+    ) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_departures_impact_weighted
+        )
+
+    @functools.cached_property
+    def run_battery_space_shifts_arrivals_weighted(self) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_arrivals_weighted
+        )
+
+    @functools.cached_property
+    def run_battery_space_shifts_arrivals_impact_weighted(
+        self,
+    ) -> pd.DataFrame:
+        return self.mobility_day_to_run(
+            self.battery_space_shifts_arrivals_impact_weighted
         )
 
+    @functools.cached_property
+    def run_location_split(self) -> pd.DataFrame:
+        return self.day_to_run(self.location_split)
+
+    @functools.cached_property
+    def run_connectivity_per_location(self) -> pd.DataFrame:
+        return self.day_to_run(self.connectivity_per_location)
+
+    @functools.cached_property
+    def run_maximal_delivered_power_per_location(self) -> pd.DataFrame:
+        return self.day_to_run(self.maximal_delivered_power_per_location)
+
+    @functools.cached_property
+    def run_maximal_received_power_per_location(self) -> pd.DataFrame:
+        return self.day_to_run(self.maximal_received_power_per_location)
+
+    @functools.cached_property
+    def run_vehicle_discharge_power_per_location(self) -> pd.DataFrame:
+        return self.day_to_run(self.vehicle_discharge_power_per_location)
+
+    @functools.cached_property
+    def run_discharge_power_to_network_per_location(self) -> pd.DataFrame:
+        return self.day_to_run(self.discharge_power_to_network_per_location)
+
+    @functools.cached_property
+    def run_percentage_driving(self) -> pd.Series:
+        return 1 - self.run_location_split.sum(axis=1)
+
+    @functools.cached_property
+    def run_connectivity(self) -> pd.Series:
+        return self.run_connectivity_per_location.sum(axis=1)
+
+    @functools.cached_property
+    def run_maximal_delivered_power(self) -> pd.Series:
+        return self.run_maximal_delivered_power_per_location.sum(axis=1)
+
+    @functools.cached_property
+    def run_maximal_received_power(self) -> pd.Series:
+        return self.run_maximal_received_power_per_location.sum(axis=1)
+
+    @functools.cached_property
+    def run_vehicle_discharge_power(self) -> pd.Series:
+        return self.run_vehicle_discharge_power_per_location.sum(axis=1)
+
+    @functools.cached_property
+    def run_discharge_power_to_network(self) -> pd.Series:
+        return self.run_discharge_power_to_network_per_location.sum(axis=1)
+
+    @functools.cached_property
+    def run_next_leg_kilometers(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_kilometers)
+
+    @functools.cached_property
+    def run_next_leg_kilometers_cumulative(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_kilometers_cumulative)
+
+    @functools.cached_property
+    def run_next_leg_charge_to_vehicle(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_charge_to_vehicle)
+
+    @functools.cached_property
+    def run_next_leg_charge_to_vehicle_cumulative(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_charge_to_vehicle_cumulative)
+
+    @functools.cached_property
+    def run_next_leg_charge_from_network(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_charge_from_network)
+
+    @functools.cached_property
+    def run_next_leg_charge_from_network_cumulative(self) -> pd.DataFrame:
+        return self.day_to_run(self.next_leg_charge_from_network_cumulative)
+
 
 class TripChargingSession:
     '''
@@ -1680,302 +1558,53 @@ def declare_all_instances(
             ] = fill_value
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        location_connections.to_pickle(
-            f'{output_folder}/{scenario_name}_location_connections.pkl'
+        writing.save_interim_table(
+            location_connections,
+            f'{output_folder}/{scenario_name}_location_connections.pkl',
+            general_parameters,
         )
 
     trips: list[type] = declare_class_instances(
         Trip, scenario, general_parameters
     )
 
-    # We want to save the moblity matrixes
+    # We want to save the moblity matrixes (and other trip tables).
+    # The run tables are computed when needed, so we only get
+    # the ones that are requested. The ones that are only built to be
+    # saved are not kept on the trip (so that the trips do not hold
+    # run-length copies of their day tables)
     if pickle_interim_files:
+        charging_sessions_headers: list[str] = (
+            general_parameters.sessions_dataframe.dataframe_headers
+        )
         for trip in trips:
-            mobility_table_name: str = (
-                f'{scenario_name}_{trip.name}_mobility_matrix'
-            )
-
-            trip.mobility_matrix.to_pickle(
-                f'{output_folder}/{mobility_table_name}.pkl'
-            )
-
-            run_mobility_table_name: str = (
-                f'{scenario_name}_{trip.name}_run_mobility_matrix'
-            )
-            trip.run_mobility_matrix.to_pickle(
-                f'{output_folder}/{run_mobility_table_name}.pkl'
-            )
-            trip.next_leg_kilometers.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                'next_leg_kilometers.pkl'
-            )
-            trip.run_next_leg_kilometers.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_next_leg_kilometers.pkl'
-            )
-            trip.next_leg_kilometers_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}'
-                f'_next_leg_kilometers_cumulative.pkl'
-            )
-            trip.run_next_leg_kilometers_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_next_leg_kilometers_cumulative.pkl'
-            )
-            trip.next_leg_charge_to_vehicle.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_next_leg_charge_to_vehicle.pkl'
-            )
-            trip.next_leg_charge_from_network.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_next_leg_charge_from_network.pkl'
-            )
-            trip.run_next_leg_charge_to_vehicle.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_next_leg_charge_to_vehicle.pkl'
-            )
-            trip.run_next_leg_charge_from_network.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_next_leg_charge_from_network.pkl'
-            )
-            trip.next_leg_charge_to_vehicle_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_next_leg_charge_to_vehicle_cumulative.pkl'
-            )
-            trip.next_leg_charge_from_network_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}'
-                f'_next_leg_charge_from_network_cumulative.pkl'
-            )
-            trip.run_next_leg_charge_to_vehicle_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}'
-                f'_run_next_leg_charge_to_vehicle_cumulative.pkl'
-            )
-            trip.run_next_leg_charge_from_network_cumulative.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}'
-                f'_run_next_leg_charge_from_network_cumulative.pkl'
-            )
-            trip.location_split.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_location_split.pkl'
-            )
-            trip.run_location_split.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_location_split.pkl'
-            )
-            trip.percentage_driving.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_percentage_driving.pkl'
-            )
-            trip.run_percentage_driving.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_percentage_driving.pkl'
-            )
-
-            trip.connectivity_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_connectivity_per_location.pkl'
-            )
-
-            trip.run_connectivity_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_connectivity_per_location.pkl'
-            )
-
-            trip.connectivity.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_connectivity.pkl'
-            )
-
-            trip.run_connectivity.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_connectivity.pkl'
-            )
-
-            trip.maximal_delivered_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_maximal_delivered_power_per_location.pkl'
-            )
-            trip.run_maximal_delivered_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_maximal_delivered_power_per_location.pkl'
-            )
-
-            trip.maximal_delivered_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_maximal_delivered_power.pkl'
-            )
-            trip.run_maximal_delivered_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_maximal_delivered_power.pkl'
-            )
-
-            trip.maximal_received_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_maximal_received_power_per_location.pkl'
-            )
-            trip.run_maximal_received_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_maximal_received_power_per_location.pkl'
-            )
-
-            trip.maximal_received_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_maximal_received_power.pkl'
-            )
-            trip.run_maximal_received_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_maximal_received_power.pkl'
-            )
-
-            trip.vehicle_discharge_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_vehicle_discharge_power_per_location.pkl'
-            )
-            trip.run_vehicle_discharge_power_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_vehicle_discharge_power_per_location.pkl'
-            )
-
-            trip.vehicle_discharge_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_vehicle_discharge_power.pkl'
-            )
-            trip.run_vehicle_discharge_power.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_vehicle_discharge_power.pkl'
-            )
-
-            trip.discharge_power_to_network_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_discharge_power_to_network_per_location.pkl'
-            )
-            trip.run_discharge_power_to_network_per_location.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_discharge_power_to_network_per_location.pkl'
-            )
-
-            trip.discharge_power_to_network.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_discharge_power_to_network.pkl'
-            )
-            trip.run_discharge_power_to_network.to_pickle(
-                f'{output_folder}/{scenario_name}_'
-                f'{trip.name}_run_discharge_power_to_network.pkl'
-            )
-
-            trip.battery_space_shifts_departures.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_departures'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_departures_impact.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_departures_impact'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_arrivals.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_arrivals'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_arrivals_impact.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_arrivals_impact'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_departures_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_departures_weighted'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_departures_impact_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_departures_impact_weighted'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_arrivals_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_arrivals_weighted'
-                f'.pkl'
-            )
-
-            trip.battery_space_shifts_arrivals_impact_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'battery_space_shifts_arrivals_impact_weighted'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_departures.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_departures'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_departures_impact.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_departures_impact'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_arrivals.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_arrivals'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_arrivals_impact.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_arrivals_impact'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_departures_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_departures_weighted'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_departures_impact_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_departures_impact_weighted'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_arrivals_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_arrivals_weighted'
-                f'.pkl'
-            )
-
-            trip.run_battery_space_shifts_arrivals_impact_weighted.to_pickle(
-                f'{output_folder}/{scenario_name}_{trip.name}_'
-                f'run_battery_space_shifts_arrivals_impact_weighted'
-                f'.pkl'
-            )
-            charging_sessions_headers: list[str] = (
-                general_parameters.sessions_dataframe.dataframe_headers
-            )
+            for trip_table_name in TRIP_INTERIM_TABLES:
+                interim_table_name: str = (
+                    f'{scenario_name}_{trip.name}_{trip_table_name}'
+                )
+                if writing.is_interim_table_requested(
+                    interim_table_name, general_parameters
+                ):
+                    was_built: bool = trip_table_name in trip.__dict__
+                    writing.save_interim_table(
+                        getattr(trip, trip_table_name),
+                        f'{output_folder}/{interim_table_name}.pkl',
+                        general_parameters,
+                    )
+                    if not was_built:
+                        # This removes the table cached by cached_property
+                        del trip.__dict__[trip_table_name]
 
-            charging_sessions_dataframe: pd.DataFrame = (
+            writing.save_interim_table(
                 get_charging_sessions_dataframe(
                     trip.charging_sessions,
                     general_parameters,
                     charging_sessions_headers,
-                )
-            )
-
-            charging_sessions_dataframe.to_pickle(
+                ),
                 f'{output_folder}/{scenario_name}_{trip.name}_'
                 f'charging_sessions'
-                f'.pkl'
+                f'.pkl',
+                general_parameters,
             )
 
     return location_connections, legs, locations, trips
@@ -1986,20 +1615,26 @@ def get_charging_sessions_dataframe(
     general_parameters: Box,
     chosen_headers: list[str],
 ) -> pd.DataFrame:
-    charging_sessions_dataframe: pd.DataFrame = pd.DataFrame(
-        index=range(len(charging_sessions))
-    )
-
+    '''
+    Puts the properties of charging sessions in a DataFrame (one row
+    per session), with the chosen headers as columns. The DataFrame
+    is built column by column.
+    '''
     charging_sessions_properties: list[str] = (
         general_parameters.sessions_dataframe.properties
     )
-    for session_index, session in enumerate(charging_sessions):
-        for charging_session_header, charging_session_property in zip(
-            chosen_headers, charging_sessions_properties
-        ):
-            charging_sessions_dataframe.loc[
-                session_index, charging_session_header
-            ] = getattr(session, charging_session_property)
+    charging_sessions_dataframe: pd.DataFrame = pd.DataFrame(
+        {
+            charging_session_header: [
+                getattr(session, charging_session_property)
+                for session in charging_sessions
+            ]
+            for charging_session_header, charging_session_property in zip(
+                chosen_headers, charging_sessions_properties
+            )
+        },
+        index=range(len(charging_sessions)),
+    )
 
     return charging_sessions_dataframe
 
@@ -0,0 +1,266 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module defines the structure used to track battery spaces.
+
+It contains the following class:
+1. **BatterySpaceHistogram:** Proportion of vehicles per battery space
+(in kWh), for each row of an index (time tags for the battery spaces at
+a location, origin/destination tuples for travelling battery spaces).
+The values are stored in a NumPy array, with one column per battery space.
+New battery spaces get a new column (the array grows by doubling its
+capacity, so that adding spaces stays cheap) and a registry keeps
+track of the battery spaces in ascending order.
+If a resolution (in kWh) is given, the battery spaces are snapped to a grid
+with that step, which caps the amount of battery spaces. An amount added
+to a battery space between two grid points is split between these two
+points so that both the amount and the battery space (energy) are conserved.
+'''
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class BatterySpaceHistogram:
+    '''
+    This class stores the proportion of vehicles per battery space (in kWh),
+    for each row of an index. Columns are kept in the order in which the
+    battery spaces were added, and the sorted registry gives them in
+    ascending battery space order. A resolution of zero keeps
+    the exact battery spaces.
+    '''
+
+    class_name: str = 'battery_space_histogram'
+
+    def __init__(
+        self,
+        index: pd.Index,
+        initial_spaces: list[float] | None = None,
+        initial_capacity: int = 16,
+        resolution: float = 0,
+    ) -> None:
+        self.index: pd.Index = index
+        self.resolution: float = float(resolution)
+        if initial_spaces is None:
+            initial_spaces = [float(0)]
+        capacity: int = max(initial_capacity, len(initial_spaces), 1)
+        self._values: np.ndarray = np.zeros((len(index), capacity))
+        self._spaces: list[float] = []
+        self._positions: dict[float, int] = {}
+        self._sorted_positions: np.ndarray | None = None
+        self._row_positions: dict | None = None
+        for initial_space in initial_spaces:
+            self.get_position(initial_space)
+
+    def __contains__(self, space: float) -> bool:
+        return float(space) in self._positions
+
+    def __len__(self) -> int:
+        return len(self._spaces)
+
+    @property
+    def values(self) -> np.ndarray:
+        '''
+        The values, with columns in the order the spaces were added.
+        This is a view, so it can be modified in place.
+        '''
+        return self._values[:, : len(self._spaces)]
+
+    @property
+    def sorted_positions(self) -> np.ndarray:
+        '''
+        The column positions of the battery spaces, in ascending
+        battery space order.
+        '''
+        if self._sorted_positions is None:
+            self._sorted_positions = np.argsort(
+                np.array(self._spaces), kind='stable'
+            )
+        return self._sorted_positions
+
+    @property
+    def spaces(self) -> np.ndarray:
+        '''
+        The battery spaces, in ascending order.
+        '''
+        return np.array(self._spaces)[self.sorted_positions]
+
+    def get_position(self, space: float) -> int:
+        '''
+        Gets the column position of a battery space. If the battery space
+        is not in the histogram yet, it gets added (with zero values).
+        '''
+        space = float(space)
+        position: int | None = self._positions.get(space)
+        if position is None:
+            position = len(self._spaces)
+            if position == self._values.shape[1]:
+                # We double the capacity so that the amount of copies
+                # stays low when many battery spaces are added
+                expanded_values: np.ndarray = np.zeros(
+                    (self._values.shape[0], 2 * self._values.shape[1])
+                )
+                expanded_values[:, :position] = self._values
+                self._values = expanded_values
+            self._spaces.append(space)
+            self._positions[space] = position
+            self._sorted_positions = None
+        return position
+
+    def get(self, row: int, space: float) -> float:
+        '''
+        Gets the value for a battery space at a given row position.
+        '''
+        position: int | None = self._positions.get(float(space))
+        if position is None:
+            return float(0)
+        return float(self._values[row, position])
+
+    def set(self, row: int, space: float, amount: float) -> None:
+        '''
+        Sets the value for a battery space at a given row position.
+        '''
+        self._values[row, self.get_position(space)] = amount
+
+    def quantise(self, space: float) -> list[tuple[float, float]]:
+        '''
+        Gives the battery spaces that represent a battery space, with
+        the share of the amount that goes to each of them. Without
+        a resolution, this is the battery space itself. Otherwise, it is
+        the grid point (if the battery space is on the grid) or the two
+        neighbouring grid points, with shares such that the
+        battery space (energy) is conserved.
+        '''
+        space = float(space)
+        if self.resolution <= 0:
+            return [(space, float(1))]
+        grid_position: float = space / self.resolution
+        nearest_grid_position: int = round(grid_position)
+        if math.isclose(grid_position, nearest_grid_position, abs_tol=1e-9):
+            return [(float(nearest_grid_position * self.resolution), float(1))]
+        lower_grid_position: int = math.floor(grid_position)
+        upper_share: float = grid_position - lower_grid_position
+        return [
+            (float(lower_grid_position * self.resolution), 1 - upper_share),
+            (float((lower_grid_position + 1) * self.resolution), upper_share),
+        ]
+
+    def add(self, row: int, space: float, amount: float) -> None:
+        '''
+        Adds an amount to a battery space at a given row position.
+        With a resolution, the amount is split between the neighbouring
+        grid points.
+        '''
+        for grid_space, share in self.quantise(space):
+            position: int = self.get_position(grid_space)
+            self._values[row, position] = (
+                self._values[row, position] + amount * share
+            )
+
+    def move(
+        self,
+        row: int,
+        origin_spaces: np.ndarray,
+        destination_spaces: np.ndarray,
+        amounts: np.ndarray,
+    ) -> None:
+        '''
+        Moves amounts from (existing) origin battery spaces to destination
+        battery spaces at a given row position, in one pass.
+        '''
+        origin_positions: list[int] = [
+            self._positions[float(origin_space)]
+            for origin_space in origin_spaces
+        ]
+        destination_positions: list[int] = []
+        destination_amounts: list[float] = []
+        for destination_space, amount in zip(destination_spaces, amounts):
+            for grid_space, share in self.quantise(destination_space):
+                destination_positions.append(self.get_position(grid_space))
+                destination_amounts.append(amount * share)
+        # Adding destination battery spaces can replace the values array,
+        # so we only get the row afterwards
+        row_values: np.ndarray = self._values[row]
+        row_values[origin_positions] = row_values[origin_positions] - amounts
+        np.add.at(row_values, destination_positions, destination_amounts)
+
+    def row_sum(self, row: int) -> float:
+        '''
+        Sums the values of all battery spaces at a given row position.
+        '''
+        return float(self._values[row, : len(self._spaces)].sum())
+
+    def row_series(self, row: int) -> pd.Series:
+        '''
+        Gives the values of a row position as a Series with the battery
+        spaces (in ascending order) as index.
+        '''
+        return pd.Series(
+            self.values[row, self.sorted_positions], index=self.spaces
+        )
+
+    def row_position(self, label) -> int:
+        '''
+        Gets the position of a row label (such as a time tag or an
+        origin/destination tuple) in the index.
+        '''
+        if self._row_positions is None:
+            self._row_positions = {
+                row_label: row_index
+                for row_index, row_label in enumerate(self.index)
+            }
+        return self._row_positions[label]
+
+    def drop(self, space: float) -> None:
+        '''
+        Removes a battery space (and its values for all rows).
+        '''
+        space = float(space)
+        position: int | None = self._positions.pop(space, None)
+        if position is None:
+            return
+        last_position: int = len(self._spaces) - 1
+        if position != last_position:
+            # We move the last column into the freed position
+            last_space: float = self._spaces[last_position]
+            self._values[:, position] = self._values[:, last_position]
+            self._spaces[position] = last_space
+            self._positions[last_space] = position
+        self._values[:, last_position] = 0
+        self._spaces.pop()
+        self._sorted_positions = None
+
+    def weighted_row_sum(self, row: int) -> float:
+        '''
+        Gives the sum of the values of a row position weighted by their
+        battery space (i.e. the total battery space at that row).
+        '''
+        return float(
+            (self._values[row, : len(self._spaces)] * self._spaces).sum()
+        )
+
+    def weighted_sums(self) -> np.ndarray:
+        '''
+        Gives, for each row, the sum of the values weighted by their
+        battery space (i.e. the total battery space).
+        '''
+        return self.values @ np.array(self._spaces)
+
+    def sums(self) -> np.ndarray:
+        '''
+        Gives, for each row, the sum of the values of all battery spaces
+        (summed in ascending battery space order, as in to_dataframe).
+        '''
+        return self.values[:, self.sorted_positions].sum(axis=1)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        '''
+        Converts the histogram to a DataFrame with the index as index
+        and the battery spaces (in ascending order) as columns.
+        '''
+        return pd.DataFrame(
+            self.values[:, self.sorted_positions],
+            columns=self.spaces,
+            index=self.index,
+        )
@@ -0,0 +1,107 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module contains array kernels for the hourly battery space loop
+of the charging module. They are compiled with Numba if it is installed
+(pip install ChaProEV[numba]) and run as pure Python otherwise. The
+battery space loop only uses them if the charging engine of the scenario
+is set to numba and Numba is installed.
+
+It contains the following functions:
+1. **njit:** Numba's njit if Numba is installed, a decorator that leaves
+the function unchanged otherwise.
+2. **take_from_lowest_battery_spaces:** Takes an amount of vehicles
+from a row of battery spaces, starting with the lowest battery spaces.
+3. **roll_over_charge_deficits:** Carries the charge deficits of
+charging sessions forward to the next sessions.
+'''
+
+import numpy as np
+
+try:
+    from numba import njit  # type: ignore
+
+    NUMBA_AVAILABLE: bool = True
+except ModuleNotFoundError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):  # type: ignore
+        '''
+        Replaces Numba's njit when Numba is not installed. The decorated
+        function is left unchanged (and runs as pure Python).
+        '''
+
+        def decorator(function):
+            return function
+
+        return decorator
+
+
+@njit(cache=True)
+def take_from_lowest_battery_spaces(
+    row_values: np.ndarray,
+    sorted_positions: np.ndarray,
+    amount: float,
+    zero_threshold: float,
+) -> tuple[np.ndarray, int]:
+    '''
+    Takes an amount of vehicles from a row of battery spaces (modified
+    in place), starting with the lowest battery space, until the amount
+    has been reached. Returns the amount taken from each battery space
+    (in ascending battery space order) and how many battery spaces were
+    reached.
+    '''
+    taken_amounts: np.ndarray = np.zeros(len(sorted_positions))
+    battery_spaces_reached: int = 0
+    for battery_space_index in range(len(sorted_positions)):
+        if amount <= zero_threshold:
+            break
+        position: int = sorted_positions[battery_space_index]
+        taken_amount: float = min(amount, row_values[position])
+        amount -= taken_amount
+        row_values[position] = row_values[position] - taken_amount
+        taken_amounts[battery_space_index] = taken_amount
+        battery_spaces_reached += 1
+
+    return taken_amounts, battery_spaces_reached
+
+
+@njit(cache=True)
+def roll_over_charge_deficits(
+    target_charges: np.ndarray, available_charges: np.ndarray
+) -> tuple[np.ndarray, float]:
+    '''
+    Carries the charge deficits of charging sessions (the part of the
+    target charge that is above the available charge) forward to the
+    next session, in session order. The deficit of the last session
+    goes to the first one, so this goes on (wrapping around) until there
+    is no deficit left or a full pass can not absorb any of it.
+    Returns the charges of the sessions (their target including the
+    deficits they received, capped by their available charge) and the
+    deficit that could not be absorbed.
+    '''
+    charges: np.ndarray = np.zeros(len(target_charges))
+    session_amount: int = len(target_charges)
+    charge_deficit: float = 0.0
+    for session_index in range(session_amount):
+        session_target: float = target_charges[session_index] + charge_deficit
+        charges[session_index] = min(
+            session_target, available_charges[session_index]
+        )
+        charge_deficit = max(
+            session_target - available_charges[session_index], 0.0
+        )
+    pass_start_deficit: float = 0.0
+    while charge_deficit > 0 and charge_deficit != pass_start_deficit:
+        pass_start_deficit = charge_deficit
+        for session_index in range(session_amount):
+            if charge_deficit <= 0:
+                break
+            session_target = charges[session_index] + charge_deficit
+            charges[session_index] = min(
+                session_target, available_charges[session_index]
+            )
+            charge_deficit = max(
+                session_target - available_charges[session_index], 0.0
+            )
+
+    return charges, charge_deficit
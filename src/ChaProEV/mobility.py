@@ -22,6 +22,19 @@ from box import Box
 from ETS_CookBook import ETS_CookBook as cook
 from rich import print
 
+try:
+    import day_patterns  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import day_patterns  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
 try:
     import run_time  # type: ignore
 
@@ -48,55 +61,59 @@ except ModuleNotFoundError:
 # We need to add to type: ignore thing to avoid MypY thinking
 # we are importing again
 
+try:
+    import writing  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import writing  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+
+# The charging session properties that are times (in hours from day start
+# in the trip charging sessions) and labels (not scaled with the trip
+# probability)
+SESSION_TIME_PROPERTIES: list[str] = ['start_time', 'end_time']
+SESSION_LABEL_PROPERTIES: list[str] = ['location']
+
 
 class ChargingSession:
     '''
-    This class defines the charging sessions for a whole run.
+    This class is a view of a charging session of the whole run (a row of
+    the table made by get_run_charging_sessions), with the session
+    properties as attributes.
     The quantities other than start time, end time, and location
-    are proprtional to the size of the session (the group travelling).
-    We scale the travelling group soze (and associated quantities)
-    according to the trip probability.
+    are proprtional to the size of the session (the group travelling),
+    scaled according to the trip probability.
     '''
 
     class_name: str = 'charging_session'
 
     def __init__(
         self,
-        trip_charging_session: define.TripChargingSession,
-        day_start_time_tag: datetime.datetime,
-        trip_probability: float,
+        run_charging_sessions: pd.DataFrame,
+        session_index: int,
+        general_parameters: Box,
     ) -> None:
-        self.start_time: datetime.datetime = (
-            day_start_time_tag
-            + datetime.timedelta(hours=trip_charging_session.start_time)
-        )
-        self.end_time: datetime.datetime = (
-            day_start_time_tag
-            + datetime.timedelta(hours=trip_charging_session.end_time)
-        )
-
-        self.location: str = trip_charging_session.location
-        self.previous_leg_consumption: float = (
-            trip_charging_session.previous_leg_consumption * trip_probability
-        )
-        self.next_leg_consumption: float = (
-            trip_charging_session.next_leg_consumption * trip_probability
-        )
-        self.connectivity: float = (
-            trip_charging_session.connectivity * trip_probability
-        )
-        self.power_to_vehicle: float = (
-            trip_charging_session.power_to_vehicle * trip_probability
-        )
-        self.power_from_network: float = (
-            trip_charging_session.power_from_network * trip_probability
-        )
-        self.power_from_vehicle: float = (
-            trip_charging_session.power_from_vehicle * trip_probability
-        )
-        self.power_to_network: float = (
-            trip_charging_session.power_to_network * trip_probability
-        )
+        sessions_dataframe_parameters: Box = (
+            general_parameters.sessions_dataframe
+        )
+        for charging_session_property, charging_session_header in zip(
+            sessions_dataframe_parameters.properties,
+            sessions_dataframe_parameters.run_dataframe_headers,
+        ):
+            setattr(
+                self,
+                charging_session_property,
+                run_charging_sessions.at[
+                    session_index, charging_session_header
+                ],
+            )
 
 
 class NextDayStartChargingSession:
@@ -145,185 +162,111 @@ def get_run_charging_sessions(
     trip_probabilities_per_day_type: pd.DataFrame,
     scenario: Box,
     general_parameters: Box,
-) -> list[ChargingSession]:
-    # day_start_location_split: pd.DataFrame = (
-    # get_day_type_start_location_split(
-    #     scenario, general_parameters
-    # ))
-    # vehicle_consumption: float = (
-    #     scenario.vehicle.base_consumption_per_km.electricity_kWh
-    # )
-    charging_sessions: list = []
+) -> pd.DataFrame:
+    '''
+    Gets the charging sessions of the whole run, as a table with one row
+    per session (and the run dataframe headers of the sessions as
+    columns). The sessions of each trip are a template (with times from
+    day start) that is broadcast across the days where the trip has a
+    non-zero probability, with the quantities scaled by that probability.
+    The sessions are ordered by day, then trip, then trip session.
+    '''
     time_tags_and_types: list[
         tuple[datetime.datetime, str]
     ] = run_time.get_day_start_time_tags_and_types(
         scenario, general_parameters
     )
-    for day_tag_index, (day_start_time_tag, day_type) in enumerate(
-        time_tags_and_types
-    ):
-        for trip in trips:
-            trip_probability: float = trip_probabilities_per_day_type.loc[
-                trip.name
-            ][
-                day_type
-            ]  # type: ignore
-            if trip_probability > 0:
-                for trip_charging_session in trip.charging_sessions:
-                    charging_sessions.append(
-                        ChargingSession(
-                            trip_charging_session,
-                            day_start_time_tag,
-                            trip_probability,
-                        )
-                    )
+    day_start_time_tags: np.ndarray = (
+        pd.DatetimeIndex(
+            [time_tag_and_type[0] for time_tag_and_type in time_tags_and_types]
+        )
+        .as_unit('us')
+        .to_numpy()
+    )
+    day_types: list[str] = [day_type for _, day_type in time_tags_and_types]
 
-                # # We now look at the next day's start charging sessions
-                # # There are none after the last day of the run
-                # previous_leg_consumption: float = 0
-                # # We set it top zero, as the last leg consumption
-                # # goes to the last session of the original day
-                # # (but this can change later, as the last session might
-                # # spillover into the next day, which will be managed
-                # # in the charging module)
-                # next_day_start_sessions: list[
-                #     NextDayStartChargingSession
-                # ] = []
-                # if len(trip.end_locations_of_legs) > 0:
-                #     end_location: str = trip.end_locations_of_legs[-1]
-                # else:
-                #     end_location = trip.location_names[0]
-
-                # loc_connectivity: float = scenario.locations[
-                #     end_location
-                # ].connectivity
-                # loc_power_to_vehicle: float = scenario.locations[
-                #     end_location
-                # ].charging_power
-                # loc_power_from_network: float = (
-                #     loc_power_to_vehicle
-                #     / scenario.locations[end_location].charger_efficiency
-                # )
-                # loc_power_from_vehicle: float = scenario.locations[
-                #     end_location
-                # ].vehicle_discharge_power
-                # loc_power_to_network: float = (
-                #     loc_power_from_vehicle
-                #     * scenario.locations[
-                #         end_location
-                #     ].proportion_of_discharge_to_network
-                # )
-                # if day_tag_index < len(time_tags_and_types) - 1:
-                #     next_day_session_start, next_day_type = (
-                #         time_tags_and_types[day_tag_index + 1]
-                #     )
-                #     next_day_all_start_sessions_amount: float = float(
-                #         day_start_location_split.loc[end_location][
-                #             next_day_type
-                #         ]
-                #     )
-
-                #     for next_day_trip in trips:
-                #         amount_for_that_trip: float = (
-                #             next_day_all_start_sessions_amount
-                #             * trip_probabilities_per_day_type.loc[
-                #                 next_day_trip.name
-                #             ][next_day_type]
-                #         )
-                #         if amount_for_that_trip > 0:
-
-                #             if sum(next_day_trip.start_probabilities) == 0:
-                #                 if (
-                #                     next_day_trip.location_names[0]
-                #                     == end_location
-                #                 ):
-                #                     next_day_session_end: datetime.datetime =
-                #                       (
-                #                         next_day_session_start
-                #                         + datetime.timedelta(days=1)
-                #                     )
-                #                     group_size: float = amount_for_that_trip
-                #                     next_leg_distance: float = 0
-                #                     next_leg_consumption: float = (
-                #                         vehicle_consumption
-                #                         * next_leg_distance
-                #                     )
-                #                     next_day_start_sessions.append(
-                #                         NextDayStartChargingSession(
-                #                             end_location,
-                #                             next_day_session_start,
-                #                             next_day_session_end,
-                #                             previous_leg_consumption,
-                #                             next_leg_consumption,
-                #                             group_size,
-                #                             loc_connectivity,
-                #                             loc_power_to_vehicle,
-                #                             loc_power_from_network,
-                #                             loc_power_from_vehicle,
-                #                             loc_power_to_network,
-                #                         )
-                #                     )
-
-                #             else:
-                #                 if (
-                #                     next_day_trip.start_locations_of_legs[0]
-                #                     == end_location
-                #                 ):
-                #                     for (
-                #                         departure_slot,
-                #                         departure_probability,
-                #                     ) in enumerate(
-                #                         next_day_trip.start_probabilities
-                #                     ):
-                #                         if departure_probability > 0:
-                #                             next_day_session_end = (
-                #                                 next_day_session_start
-                #                                 + datetime.timedelta(
-                #                                     hours=departure_slot
-                #                                 )
-                #                             )
-                #                             group_size = (
-                #                                 amount_for_that_trip
-                #                                 * departure_probability
-                #                             )
-
-                #                             next_leg_distance = (
-                #                                 next_day_trip.leg_distances[0]
-                #                             )
-                #                             next_leg_consumption = (
-                #                                 vehicle_consumption
-                #                                 * next_leg_distance
-                #                             )
-
-                #                             next_day_start_sessions.append(
-                #                                 NextDayStartChargingSession(
-                #                                     end_location,
-                #                                     next_day_session_start,
-                #                                     next_day_session_end,
-                #                                     previous_leg_consumption,
-                #                                     next_leg_consumption,
-                #                                     group_size,
-                #                                     loc_connectivity,
-                #                                     loc_power_to_vehicle,
-                #                                     loc_power_from_network,
-                #                                     loc_power_from_vehicle,
-                #                                     loc_power_to_network,
-                #                                 )
-                #                             )
-
-                # # We sort these extra session by putting the longer ones
-                # # first (so that these get the spillover first)
-                # next_day_start_sessions = sorted(
-                #     next_day_start_sessions,
-                #     key=lambda session: (
-                #         session.end_time - session.start_time
-                #     ).total_seconds(),
-                #     reverse=True,
-                # )
-                # for next_day_start_session in next_day_start_sessions:
-                #     charging_sessions.append(next_day_start_session)
-
-    return charging_sessions
+    sessions_dataframe_parameters: Box = general_parameters.sessions_dataframe
+    charging_sessions_properties: list[str] = (
+        sessions_dataframe_parameters.properties
+    )
+    charging_sessions_headers: list[str] = (
+        sessions_dataframe_parameters.run_dataframe_headers
+    )
+
+    sessions_days: list[np.ndarray] = [np.zeros(0, dtype=int)]
+    sessions_trips: list[np.ndarray] = [np.zeros(0, dtype=int)]
+    sessions_values: dict[str, list[np.ndarray]] = {
+        charging_session_property: []
+        for charging_session_property in charging_sessions_properties
+    }
+    for trip_index, trip in enumerate(trips):
+        trip_day_probabilities: np.ndarray = (
+            trip_probabilities_per_day_type.loc[trip.name][day_types]
+            .to_numpy(dtype=float)
+        )
+        trip_days: np.ndarray = np.flatnonzero(trip_day_probabilities > 0)
+        trip_sessions: pd.DataFrame = define.get_charging_sessions_dataframe(
+            trip.charging_sessions,
+            general_parameters,
+            charging_sessions_properties,
+        )
+        trip_session_amount: int = len(trip_sessions.index)
+        if len(trip_days) == 0 or trip_session_amount == 0:
+            continue
+
+        sessions_days.append(np.repeat(trip_days, trip_session_amount))
+        sessions_trips.append(
+            np.full(len(trip_days) * trip_session_amount, trip_index)
+        )
+        for charging_session_property in charging_sessions_properties:
+            template_values: np.ndarray = trip_sessions[
+                charging_session_property
+            ].to_numpy()
+            if charging_session_property in SESSION_TIME_PROPERTIES:
+                # The times are hours from day start, which we turn to
+                # durations as datetime.timedelta does (to the microsecond)
+                template_values = np.array(
+                    [
+                        datetime.timedelta(hours=float(session_time))
+                        for session_time in template_values
+                    ],
+                    dtype='timedelta64[us]',
+                )
+                session_values: np.ndarray = (
+                    day_start_time_tags[trip_days][:, np.newaxis]
+                    + template_values
+                )
+            elif charging_session_property in SESSION_LABEL_PROPERTIES:
+                session_values = np.tile(template_values, len(trip_days))
+            else:
+                session_values = (
+                    template_values.astype(float)
+                    * trip_day_probabilities[trip_days][:, np.newaxis]
+                )
+            sessions_values[charging_session_property].append(
+                np.ravel(session_values)
+            )
+
+    sessions_order: np.ndarray = np.lexsort(
+        (np.concatenate(sessions_trips), np.concatenate(sessions_days))
+    )
+    run_charging_sessions: pd.DataFrame = pd.DataFrame(
+        {
+            charging_session_header: (
+                np.concatenate(sessions_values[charging_session_property])[
+                    sessions_order
+                ]
+                if len(sessions_values[charging_session_property]) > 0
+                else []
+            )
+            for charging_session_header, charging_session_property in zip(
+                charging_sessions_headers, charging_sessions_properties
+            )
+        },
+        index=range(len(sessions_order)),
+    )
+
+    return run_charging_sessions
 
 
 def get_run_mobility_matrix(
@@ -338,37 +281,68 @@ def get_run_mobility_matrix(
     '''
     Takes the matrices for different trips and adds them up (weighed on
     probability) to get a matrix for the whole run.
+    The values are accumulated in an array with a (time tag × quantity)
+    block per location tuple, which is turned into a DataFrame
+    (with the location connections) at the end.
+    The day mobility matrices of the trips are spread over the run with
+    the hour in day of each time tag, so that the run mobility matrices
+    of the trips are not built.
     '''
 
     run_time_tags: pd.DatetimeIndex = run_time.get_time_range(
         scenario, general_parameters
     )[0]
+    run_length: int = len(run_time_tags)
+    _, run_hours_in_day = day_patterns.get_run_day_and_hour_numbers(
+        run_time_tags, scenario.mobility_module.day_start_hour
+    )
 
-    location_tuples: list[tuple[str, str]] = get_mobility_location_tuples(
-        scenario
+    # We sort the location tuples so that the run index is sorted
+    location_tuples: list[tuple[str, str]] = sorted(
+        get_mobility_location_tuples(scenario)
     )
-    run_index_tuples: list[tuple[str, str, datetime.datetime]] = [
-        (location_tuple[0], location_tuple[1], time_tag)
-        for location_tuple in location_tuples
-        for time_tag in run_time_tags
-    ]
+    location_tuple_positions: dict[tuple[str, str], int] = {
+        location_tuple: location_tuple_position
+        for location_tuple_position, location_tuple in enumerate(
+            location_tuples
+        )
+    }
 
     mobility_index_names: list[str] = scenario.mobility_module[
         'mobility_index_names'
     ]
-    run_index: pd.MultiIndex = pd.MultiIndex.from_tuples(
-        run_index_tuples, names=mobility_index_names
+    # The run index is the product of the location tuples and the
+    # run time tags
+    run_index: pd.MultiIndex = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(
+                [location_tuple[0] for location_tuple in location_tuples],
+                run_length,
+            ),
+            np.repeat(
+                [location_tuple[1] for location_tuple in location_tuples],
+                run_length,
+            ),
+            np.tile(run_time_tags, len(location_tuples)),
+        ],
+        names=mobility_index_names,
+    )
+
+    location_connections_headers: list[str] = (
+        scenario.mobility_module.location_connections_headers
+    )
+    mobility_quantities: list[str] = [
+        quantity
+        for quantity in matrix_columns
+        if quantity not in location_connections_headers
+    ]
+    run_mobility_columns: list[str] = mobility_quantities + list(
+        location_connections_headers
     )
 
-    run_mobility_matrix: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_index), len(matrix_columns))),
-        columns=matrix_columns,
-        index=run_index,
+    run_mobility_values: np.ndarray = np.zeros(
+        (len(location_tuples), run_length, len(run_mobility_columns))
     )
-    run_mobility_matrix = run_mobility_matrix.sort_index()
-
-    file_parameters: Box = general_parameters.files
-    output_folder: str = f'{file_parameters.output_root}/{case_name}'
 
     for trip in trips:
         unique_trip_legs: list[str] = list(set(trip.legs))
@@ -384,68 +358,49 @@ def get_run_mobility_matrix(
                 if leg_tuple not in trip_location_tuples:
                     trip_location_tuples.append(leg_tuple)
 
-            this_trip_run_probabilities: pd.DataFrame = pd.DataFrame(
-                run_trip_probabilities[trip.name]
-            )
-
-            location_connections_headers: list[
-                str
-            ] = scenario.mobility_module.location_connections_headers
-
-            # We need a version for each start/end location combination
-            # that appears in our trip mobility matrix. This is also the
-            # amount of (unique) legs or the trip location tuples
-            this_trip_run_probabilities_extended: pd.DataFrame = pd.DataFrame()
-            for _ in range(len(trip_location_tuples)):
-                # -1 to get the right length
-                this_trip_run_probabilities_extended = pd.concat(
-                    (
-                        this_trip_run_probabilities,
-                        this_trip_run_probabilities_extended,
-                    ),
-                    ignore_index=True,
+            trip_run_probabilities: np.ndarray = run_trip_probabilities[
+                trip.name
+            ].to_numpy(dtype=float)
+
+            # We need to place the weighted quantities at the right
+            # places in the run (the rows of the day mobility matrix
+            # are the hours from the day start)
+            for trip_location_tuple in trip_location_tuples:
+                run_mobility_values[
+                    location_tuple_positions[trip_location_tuple],
+                    :,
+                    : len(mobility_quantities),
+                ] += (
+                    trip.mobility_matrix.loc[
+                        trip_location_tuple, mobility_quantities
+                    ].to_numpy(dtype=float)[run_hours_in_day]
+                    * trip_run_probabilities[:, np.newaxis]
                 )
 
-            probability_values_to_use = this_trip_run_probabilities_extended[
-                trip.name
-            ].values
+    for location_tuple, location_tuple_position in (
+        location_tuple_positions.items()
+    ):
+        run_mobility_values[
+            location_tuple_position, :, len(mobility_quantities) :
+        ] = location_connections.loc[
+            location_tuple, location_connections_headers
+        ].to_numpy(dtype=float)
 
-            for quantity in run_mobility_matrix.columns:
-                if quantity not in location_connections_headers:
-                    weighted_mobility_quantity_to_use = (
-                        trip.run_mobility_matrix[quantity]
-                        * probability_values_to_use
-                    )
+    run_mobility_matrix: pd.DataFrame = pd.DataFrame(
+        run_mobility_values.reshape(-1, len(run_mobility_columns)),
+        columns=run_mobility_columns,
+        index=run_index,
+    )
 
-                    # We need to place it at the right places in the run
-
-                    for trip_location_tuple in trip_location_tuples:
-                        run_mobility_matrix.loc[
-                            (trip_location_tuple),
-                            quantity,
-                        ] = (
-                            pd.Series(
-                                run_mobility_matrix.loc[
-                                    trip_location_tuple, quantity
-                                ]
-                            ).values
-                            + weighted_mobility_quantity_to_use.loc[
-                                trip_location_tuple
-                            ].values
-                        )
-
-        for location_tuple in location_tuples:
-            these_locations_connections: pd.Series = pd.Series(
-                location_connections.loc[location_tuple]
-            )
-            run_mobility_matrix.loc[
-                (location_tuple), location_connections_headers  # type: ignore
-            ] = these_locations_connections.values
-        pickle_interim_files: bool = general_parameters.interim_files['pickle']
-        if pickle_interim_files:
-            run_mobility_matrix.to_pickle(
-                f'{output_folder}/{scenario.name}_run_mobility_matrix.pkl'
-            )
+    pickle_interim_files: bool = general_parameters.interim_files['pickle']
+    if pickle_interim_files:
+        file_parameters: Box = general_parameters.files
+        output_folder: str = f'{file_parameters.output_root}/{case_name}'
+        writing.save_interim_table(
+            run_mobility_matrix,
+            f'{output_folder}/{scenario.name}_run_mobility_matrix.pkl',
+            general_parameters,
+        )
     return run_mobility_matrix
 
 
@@ -1233,8 +1188,10 @@ def get_car_trip_probabilities_per_day_type(
     )
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        trip_probabilities_per_day_type.to_pickle(
-            f'{output_folder}/{table_name}.pkl'
+        writing.save_interim_table(
+            trip_probabilities_per_day_type,
+            f'{output_folder}/{table_name}.pkl',
+            general_parameters,
         )
 
     return trip_probabilities_per_day_type
@@ -1460,7 +1417,11 @@ def get_run_trip_probabilities(
     table_name: str = f'{scenario.name}_run_trip_probabilities'
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        run_trip_probabilities.to_pickle(f'{output_folder}/{table_name}.pkl')
+        writing.save_interim_table(
+            run_trip_probabilities,
+            f'{output_folder}/{table_name}.pkl',
+            general_parameters,
+        )
 
     vehicle_name: str = scenario.vehicle.name
     if vehicle_name == 'car':
@@ -1594,198 +1555,167 @@ def get_location_split(
     ]
     run_range: pd.Index | pd.DatetimeIndex = run_trip_probabilities.index
 
-    location_split: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-    connectivity_per_location: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-
-    maximal_delivered_power_per_location: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-    maximal_received_power_per_location: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-    vehicle_discharge_power_per_location: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-    discharge_power_to_network_per_location: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), len(location_names))),
-        columns=location_names,
-        index=run_range,
-    )
-
-    percentage_driving: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Driving percent'],
-        index=run_range,
-    )
-    connectivity: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Connectivity'],
-        index=run_range,
-    )
-
-    maximal_delivered_power: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Maximal Delivered Power (kW)'],
-        index=run_range,
-    )
-    maximal_received_power: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Maximal Received Power (kW)'],
-        index=run_range,
-    )
-
-    vehicle_discharge_power: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Vehicle Discharge Power (kW)'],
-        index=run_range,
-    )
-    discharge_power_to_network: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_range), 1)),
-        columns=['Discharge Power to Network (kW)'],
-        index=run_range,
-    )
-
-    for trip in trips:
-        percentage_driving['Driving percent'] = (
-            percentage_driving['Driving percent'].values
-            + trip.run_percentage_driving.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
-        )
-        connectivity['Connectivity'] = (
-            connectivity['Connectivity'].values
-            + trip.run_connectivity.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
-        )
-        maximal_delivered_power['Maximal Delivered Power (kW)'] = (
-            maximal_delivered_power['Maximal Delivered Power (kW)'].values
-            + trip.run_maximal_delivered_power.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
+    # The trip tables are patterns for a day that we weigh with the
+    # trip probabilities (which are the same for all time tags of a day),
+    # so we compute the sums for the distinct days only. All the
+    # quantities are stacked (per trip) and combined with the
+    # probabilities in one go
+    day_start_hour: int = scenario.mobility_module.day_start_hour
+    trip_run_probabilities: pd.DataFrame = run_trip_probabilities[
+        [trip.name for trip in trips]
+    ]
+    (
+        location_split,
+        connectivity_per_location,
+        maximal_delivered_power_per_location,
+        maximal_received_power_per_location,
+        vehicle_discharge_power_per_location,
+        discharge_power_to_network_per_location,
+    ) = [
+        location_quantity_sum.to_dataframe()
+        for location_quantity_sum in (
+            day_patterns.DayPatternSeries.weighted_sums(
+                [
+                    [trip.location_split for trip in trips],
+                    [trip.connectivity_per_location for trip in trips],
+                    [
+                        trip.maximal_delivered_power_per_location
+                        for trip in trips
+                    ],
+                    [
+                        trip.maximal_received_power_per_location
+                        for trip in trips
+                    ],
+                    [
+                        trip.vehicle_discharge_power_per_location
+                        for trip in trips
+                    ],
+                    [
+                        trip.discharge_power_to_network_per_location
+                        for trip in trips
+                    ],
+                ],
+                trip_run_probabilities,
+                [location_names] * 6,
+                run_range,  # type: ignore
+                day_start_hour,
+            )
         )
+    ]
 
-        maximal_received_power['Maximal Received Power (kW)'] = (
-            maximal_received_power['Maximal Received Power (kW)'].values
-            + trip.run_maximal_received_power.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
-        )
-        vehicle_discharge_power['Vehicle Discharge Power (kW)'] = (
-            vehicle_discharge_power['Vehicle Discharge Power (kW)'].values
-            + trip.run_vehicle_discharge_power.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
-        )
-        discharge_power_to_network['Discharge Power to Network (kW)'] = (
-            discharge_power_to_network[
-                'Discharge Power to Network (kW)'
-            ].values
-            + trip.run_discharge_power_to_network.values
-            * run_trip_probabilities[trip.name].values  # type: ignore
+    total_headers: list[str] = [
+        'Driving percent',
+        'Connectivity',
+        'Maximal Delivered Power (kW)',
+        'Maximal Received Power (kW)',
+        'Vehicle Discharge Power (kW)',
+        'Discharge Power to Network (kW)',
+    ]
+    (
+        percentage_driving,
+        connectivity,
+        maximal_delivered_power,
+        maximal_received_power,
+        vehicle_discharge_power,
+        discharge_power_to_network,
+    ) = [
+        total_quantity_sum.to_dataframe()
+        for total_quantity_sum in (
+            day_patterns.DayPatternSeries.weighted_sums(
+                [
+                    [
+                        trip_total.to_frame(total_header)
+                        for trip_total in trip_totals
+                    ]
+                    for trip_totals, total_header in zip(
+                        [
+                            [trip.percentage_driving for trip in trips],
+                            [trip.connectivity for trip in trips],
+                            [trip.maximal_delivered_power for trip in trips],
+                            [trip.maximal_received_power for trip in trips],
+                            [trip.vehicle_discharge_power for trip in trips],
+                            [
+                                trip.discharge_power_to_network
+                                for trip in trips
+                            ],
+                        ],
+                        total_headers,
+                    )
+                ],
+                trip_run_probabilities,
+                [[total_header] for total_header in total_headers],
+                run_range,  # type: ignore
+                day_start_hour,
+            )
         )
-
-        for location_name in trip.run_location_split.columns:
-            location_split[location_name] = location_split[
-                location_name
-            ].values + (
-                trip.run_location_split[location_name].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
-
-            connectivity_per_location[
-                location_name
-            ] = connectivity_per_location[location_name].values + (
-                trip.run_connectivity_per_location[location_name].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
-
-            maximal_delivered_power_per_location[
-                location_name
-            ] = maximal_delivered_power_per_location[location_name].values + (
-                trip.run_maximal_delivered_power_per_location[
-                    location_name
-                ].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
-            maximal_received_power_per_location[
-                location_name
-            ] = maximal_received_power_per_location[location_name].values + (
-                trip.run_maximal_received_power_per_location[
-                    location_name
-                ].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
-            vehicle_discharge_power_per_location[
-                location_name
-            ] = vehicle_discharge_power_per_location[location_name].values + (
-                trip.run_vehicle_discharge_power_per_location[
-                    location_name
-                ].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
-            discharge_power_to_network_per_location[
-                location_name
-            ] = discharge_power_to_network_per_location[
-                location_name
-            ].values + (
-                trip.run_discharge_power_to_network_per_location[
-                    location_name
-                ].values
-                * run_trip_probabilities[trip.name].values
-            )  # type: ignore
+    ]
 
     loop_timer.append(datetime.datetime.now())
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        location_split.to_pickle(
-            f'{output_folder}/{scenario.name}_location_split.pkl'
+        writing.save_interim_table(
+            location_split,
+            f'{output_folder}/{scenario.name}_location_split.pkl',
+            general_parameters,
         )
-        percentage_driving.to_pickle(
-            f'{output_folder}/{scenario.name}_percentage_driving.pkl'
+        writing.save_interim_table(
+            percentage_driving,
+            f'{output_folder}/{scenario.name}_percentage_driving.pkl',
+            general_parameters,
         )
-        connectivity_per_location.to_pickle(
-            f'{output_folder}/{scenario.name}_connectivity_per_location.pkl'
+        writing.save_interim_table(
+            connectivity_per_location,
+            f'{output_folder}/{scenario.name}_connectivity_per_location.pkl',
+            general_parameters,
         )
-        connectivity.to_pickle(
-            f'{output_folder}/{scenario.name}_connectivity.pkl'
+        writing.save_interim_table(
+            connectivity,
+            f'{output_folder}/{scenario.name}_connectivity.pkl',
+            general_parameters,
         )
-        maximal_delivered_power_per_location.to_pickle(
+        writing.save_interim_table(
+            maximal_delivered_power_per_location,
             f'{output_folder}/{scenario.name}'
-            f'_maximal_delivered_power_per_location.pkl'
+            f'_maximal_delivered_power_per_location.pkl',
+            general_parameters,
         )
-        maximal_delivered_power.to_pickle(
-            f'{output_folder}/{scenario.name}_maximal_delivered_power.pkl'
+        writing.save_interim_table(
+            maximal_delivered_power,
+            f'{output_folder}/{scenario.name}_maximal_delivered_power.pkl',
+            general_parameters,
         )
-        maximal_received_power_per_location.to_pickle(
+        writing.save_interim_table(
+            maximal_received_power_per_location,
             f'{output_folder}/{scenario.name}'
-            f'_maximal_received_power_per_location.pkl'
+            f'_maximal_received_power_per_location.pkl',
+            general_parameters,
         )
-        maximal_received_power.to_pickle(
-            f'{output_folder}/{scenario.name}_maximal_received_power.pkl'
+        writing.save_interim_table(
+            maximal_received_power,
+            f'{output_folder}/{scenario.name}_maximal_received_power.pkl',
+            general_parameters,
         )
-        vehicle_discharge_power_per_location.to_pickle(
+        writing.save_interim_table(
+            vehicle_discharge_power_per_location,
             f'{output_folder}/{scenario.name}'
-            f'_vehicle_discharge_power_per_location.pkl'
+            f'_vehicle_discharge_power_per_location.pkl',
+            general_parameters,
         )
-        vehicle_discharge_power.to_pickle(
-            f'{output_folder}/{scenario.name}_vehicle_discharge_power.pkl'
+        writing.save_interim_table(
+            vehicle_discharge_power,
+            f'{output_folder}/{scenario.name}_vehicle_discharge_power.pkl',
+            general_parameters,
         )
-        discharge_power_to_network_per_location.to_pickle(
+        writing.save_interim_table(
+            discharge_power_to_network_per_location,
             f'{output_folder}/{scenario.name}'
-            f'_discharge_power_to_network_per_location.pkl'
+            f'_discharge_power_to_network_per_location.pkl',
+            general_parameters,
         )
-        discharge_power_to_network.to_pickle(
-            f'{output_folder}/{scenario.name}_discharge_power_to_network.pkl'
+        writing.save_interim_table(
+            discharge_power_to_network,
+            f'{output_folder}/{scenario.name}_discharge_power_to_network.pkl',
+            general_parameters,
         )
     return (
         location_split,
@@ -1869,99 +1799,83 @@ def get_kilometers_for_next_leg(
         for location_name in location_parameters
         if location_parameters[location_name].vehicle == vehicle_name
     ]
-    run_next_leg_kilometers: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-    run_next_leg_kilometers_cumulative: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-    run_next_leg_charge_to_vehicle: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-    run_next_leg_charge_from_network: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-    run_next_leg_charge_to_vehicle_cumulative: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-    run_next_leg_charge_from_network_cumulative: pd.DataFrame = pd.DataFrame(
-        np.zeros((len(run_trip_probabilities.index), len(location_names))),
-        columns=location_names,
-        index=run_trip_probabilities.index,
-    )
-
-    for trip in trips:
-        this_trip_probabilities: pd.Series[float] = pd.Series(
-            run_trip_probabilities[trip.name]
-        )
-        for location_name in trip.run_next_leg_kilometers.columns:
-            run_next_leg_kilometers[
-                location_name
-            ] += trip.run_next_leg_kilometers[location_name].mul(
-                this_trip_probabilities, axis=0
-            )
-            run_next_leg_kilometers_cumulative[
-                location_name
-            ] += trip.run_next_leg_kilometers_cumulative[location_name].mul(
-                this_trip_probabilities, axis=0
-            )
-            run_next_leg_charge_to_vehicle[
-                location_name
-            ] += trip.run_next_leg_charge_to_vehicle[location_name].mul(
-                this_trip_probabilities, axis=0
-            )
-
-            run_next_leg_charge_from_network[
-                location_name
-            ] += trip.run_next_leg_charge_from_network[location_name].mul(
-                this_trip_probabilities, axis=0
-            )
-            run_next_leg_charge_to_vehicle_cumulative[
-                location_name
-            ] += trip.run_next_leg_charge_to_vehicle_cumulative[
-                location_name
-            ].mul(
-                this_trip_probabilities, axis=0
-            )
-            run_next_leg_charge_from_network_cumulative[
-                location_name
-            ] += trip.run_next_leg_charge_from_network_cumulative[
-                location_name
-            ].mul(
-                this_trip_probabilities, axis=0
+    # The next leg tables of the trips are patterns for a day that we
+    # weigh with the trip probabilities (which are the same for all
+    # time tags of a day), so we compute the sums for the distinct days only.
+    # All the quantities are stacked (per trip) and combined with the
+    # probabilities in one go
+    run_range: pd.DatetimeIndex = run_trip_probabilities.index  # type: ignore
+    day_start_hour: int = scenario.mobility_module.day_start_hour
+    trip_run_probabilities: pd.DataFrame = run_trip_probabilities[
+        [trip.name for trip in trips]
+    ]
+    (
+        run_next_leg_kilometers,
+        run_next_leg_kilometers_cumulative,
+        run_next_leg_charge_to_vehicle,
+        run_next_leg_charge_from_network,
+        run_next_leg_charge_to_vehicle_cumulative,
+        run_next_leg_charge_from_network_cumulative,
+    ) = [
+        next_leg_quantity_sum.to_dataframe()
+        for next_leg_quantity_sum in (
+            day_patterns.DayPatternSeries.weighted_sums(
+                [
+                    [trip.next_leg_kilometers for trip in trips],
+                    [trip.next_leg_kilometers_cumulative for trip in trips],
+                    [trip.next_leg_charge_to_vehicle for trip in trips],
+                    [trip.next_leg_charge_from_network for trip in trips],
+                    [
+                        trip.next_leg_charge_to_vehicle_cumulative
+                        for trip in trips
+                    ],
+                    [
+                        trip.next_leg_charge_from_network_cumulative
+                        for trip in trips
+                    ],
+                ],
+                trip_run_probabilities,
+                [location_names] * 6,
+                run_range,
+                day_start_hour,
             )
+        )
+    ]
     pickle_interim_files: bool = general_parameters.interim_files.pickle
     if pickle_interim_files:
-        run_next_leg_kilometers.to_pickle(
-            f'{output_folder}/{scenario.name}_next_leg_kilometers.pkl'
+        writing.save_interim_table(
+            run_next_leg_kilometers,
+            f'{output_folder}/{scenario.name}_next_leg_kilometers.pkl',
+            general_parameters,
         )
-        run_next_leg_kilometers_cumulative.to_pickle(
+        writing.save_interim_table(
+            run_next_leg_kilometers_cumulative,
             f'{output_folder}/{scenario.name}'
-            '_next_leg_kilometers_cumulative.pkl'
+            '_next_leg_kilometers_cumulative.pkl',
+            general_parameters,
         )
-        run_next_leg_charge_to_vehicle.to_pickle(
-            f'{output_folder}/{scenario.name}_next_leg_charge_to_vehicle.pkl'
+        writing.save_interim_table(
+            run_next_leg_charge_to_vehicle,
+            f'{output_folder}/{scenario.name}_next_leg_charge_to_vehicle.pkl',
+            general_parameters,
         )
-        run_next_leg_charge_from_network.to_pickle(
-            f'{output_folder}/{scenario.name}_next_leg_charge_from_network.pkl'
+        writing.save_interim_table(
+            run_next_leg_charge_from_network,
+            f'{output_folder}/{scenario.name}'
+            '_next_leg_charge_from_network.pkl',
+            general_parameters,
         )
-        run_next_leg_charge_to_vehicle_cumulative.to_pickle(
+        writing.save_interim_table(
+            run_next_leg_charge_to_vehicle_cumulative,
             f'{output_folder}/{scenario.name}'
-            f'_next_leg_charge_to_vehicle_cumulative.pkl'
+            f'_next_leg_charge_to_vehicle_cumulative.pkl',
+            general_parameters,
         )
-        run_next_leg_charge_from_network_cumulative.to_pickle(
+        writing.save_interim_table(
+            run_next_leg_charge_from_network_cumulative,
             f'{output_folder}/{scenario.name}'
-            f'_next_leg_charge_from_network_cumulative.pkl'
+            f'_next_leg_charge_from_network_cumulative.pkl',
+            general_parameters,
         )
     return (
         run_next_leg_kilometers,
@@ -1993,7 +1907,6 @@ def make_mobility_data(
     pd.DataFrame,
     pd.DataFrame,
     pd.DataFrame,
-    list[ChargingSession],
     pd.DataFrame,
 ]:
     run_trip_probabilities: pd.DataFrame = get_run_trip_probabilities(
@@ -2065,33 +1978,23 @@ def make_mobility_data(
         case_name,
         general_parameters,
     )
-    run_charging_sessions: list[ChargingSession] = get_run_charging_sessions(
+    run_charging_sessions_dataframe: pd.DataFrame = get_run_charging_sessions(
         trips,  # type: ignore
         trip_probabilities_per_day_type,
         scenario,
         general_parameters,
     )
     pickle_interim_files: bool = general_parameters.interim_files.pickle
-
-    charging_sessions_headers: list[
-        str
-    ] = general_parameters.sessions_dataframe.run_dataframe_headers
-
-    run_charging_sessions_dataframe: pd.DataFrame = (
-        define.get_charging_sessions_dataframe(
-            run_charging_sessions,
-            general_parameters,
-            charging_sessions_headers,
-        )
-    )
     if pickle_interim_files:
         output_root: str = general_parameters.files.output_root
         output_folder: str = f'{output_root}/{case_name}'
 
-        run_charging_sessions_dataframe.to_pickle(
+        writing.save_interim_table(
+            run_charging_sessions_dataframe,
             f'{output_folder}/{scenario.name}_'
             f'run_charging_sessions'
-            f'.pkl'
+            f'.pkl',
+            general_parameters,
         )
 
     return (
@@ -2107,7 +2010,6 @@ def make_mobility_data(
         run_next_leg_kilometers_cumulative,
         run_next_leg_charge_from_network,
         run_next_leg_charge_to_vehicle,
-        run_charging_sessions,
         run_charging_sessions_dataframe,
     )
 
@@ -2144,7 +2046,6 @@ if __name__ == '__main__':
         run_next_leg_kilometers_cumulative,
         run_next_leg_charge_from_network,
         run_next_leg_charge_to_vehicle,
-        run_charging_sessions,
         run_charging_sessions_dataframe,
     ) = make_mobility_data(
         location_connections,
@@ -0,0 +1,401 @@
+'''
+Author: Omar Usmani (Omar.Usmani@TNO.nl)
+This module stores the output tables of a case in a single results
+database (SQLite), in a long format with one row per value:
+(scenario, table_name, time_tag, row_label, location, quantity, value).
+
+All the inserts go through a single writer process, which receives
+the values of the tables (in chunks) from a queue and inserts them
+in batches (one transaction per batch). The processes that convert the
+tables can then feed the store in parallel without contending for the
+database. The indexes (on scenario and time, and on table) are created
+once all the values are inserted. The stored values can be queried
+across scenarios without loading the pickle files.
+
+It contains the following functions:
+1. **get_database_path:** Gives the path of the results database of a case.
+2. **get_case_scenario_locations:** Gives the locations of each scenario
+    of a case.
+3. **get_store_target:** Tells how a table (of the output folder) goes
+    in the results store, if it is stored there.
+4. **get_table_chunks:** Converts a table to chunks of long format rows.
+5. **put_table_in_store:** Puts the chunks of a table in the queue of the
+    store writer.
+6. **start_store_writer:** Starts the writer process of the store
+    (and its queue).
+7. **stop_store_writer:** Stops the writer process once the queue
+    is empty.
+8. **run_store_writer:** Inserts the chunks of the queue into the
+    database (this is what the writer process does).
+9. **read_results:** Reads values from the results database.
+'''
+
+import fnmatch
+import itertools
+import multiprocessing
+import pickle
+import sqlite3
+import typing as ty
+from multiprocessing.managers import SyncManager
+
+import numpy as np
+import pandas as pd
+from box import Box
+from ETS_CookBook import ETS_CookBook as cook
+
+try:
+    import columnar_outputs  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import columnar_outputs  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+RESULTS_TABLE_NAME: str = 'results'
+RESULTS_COLUMNS: list[str] = [
+    'scenario',
+    'table_name',
+    'time_tag',
+    'row_label',
+    'location',
+    'quantity',
+    'value',
+]
+CREATE_RESULTS_TABLE: str = (
+    f'CREATE TABLE IF NOT EXISTS {RESULTS_TABLE_NAME} ('
+    'scenario TEXT NOT NULL, table_name TEXT NOT NULL, time_tag TEXT, '
+    'row_label TEXT, location TEXT, quantity TEXT NOT NULL, value REAL)'
+)
+INSERT_RESULTS: str = (
+    f'INSERT INTO {RESULTS_TABLE_NAME} ({", ".join(RESULTS_COLUMNS)}) '
+    f'VALUES ({", ".join("?" * len(RESULTS_COLUMNS))})'
+)
+DELETE_TABLE_RESULTS: str = (
+    f'DELETE FROM {RESULTS_TABLE_NAME} WHERE scenario = ? AND table_name = ?'
+)
+SELECT_STORED_TABLES: str = (
+    f'SELECT DISTINCT scenario, table_name FROM {RESULTS_TABLE_NAME}'
+)
+CREATE_RESULTS_INDEXES: list[str] = [
+    f'CREATE INDEX IF NOT EXISTS {RESULTS_TABLE_NAME}_scenario_time '
+    f'ON {RESULTS_TABLE_NAME} (scenario, time_tag)',
+    f'CREATE INDEX IF NOT EXISTS {RESULTS_TABLE_NAME}_table '
+    f'ON {RESULTS_TABLE_NAME} (table_name, scenario)',
+]
+# Time tags are stored as text in this format (which sorts as time)
+TIME_TAG_FORMAT: str = '%Y-%m-%d %H:%M:%S'
+
+
+def get_database_path(case_name: str, general_parameters: Box) -> str:
+    '''
+    Gives the path of the results database of a case (in the output
+    folder of the case).
+    '''
+    output_root: str = general_parameters.files.output_root
+    groupfile_root: str = general_parameters.files.groupfile_root
+    file_name: str = general_parameters.results_store.file_name
+    return (
+        f'{output_root}/{case_name}/'
+        f'{groupfile_root}_{case_name}_{file_name}.sqlite3'
+    )
+
+
+def get_case_scenario_locations(case_name: str) -> dict[str, list[str]]:
+    '''
+    Gives the names of the locations of each scenario of a case
+    (from the scenario files).
+    '''
+    return {
+        scenario_name: list(
+            cook.parameters_from_TOML(
+                f'scenarios/{case_name}/{scenario_name}.toml'
+            ).locations
+        )
+        for scenario_name in columnar_outputs.get_case_scenario_names(
+            case_name
+        )
+    }
+
+
+def get_store_target(
+    table_name: str,
+    scenario_locations: dict[str, list[str]],
+    general_parameters: Box,
+) -> Box | None:
+    '''
+    Tells how a table of the output folder (named as its file, without
+    extension, i.e. {scenario}_{table}) goes in the results store, as a
+    Box with its scenario and table names, the locations of its
+    scenario and the size of the insert batches. Gives None if the
+    results are not stored, if the table does not match one of the
+    patterns of the tables to store, or if it does not belong
+    to a scenario.
+    '''
+    store_parameters: Box = general_parameters.results_store
+    if not store_parameters.save:
+        return None
+    if not any(
+        fnmatch.fnmatchcase(table_name, table_pattern)
+        for table_pattern in store_parameters.tables
+    ):
+        return None
+    scenario_and_table: tuple[str, str] | None = (
+        columnar_outputs.split_table_name(table_name, list(scenario_locations))
+    )
+    if scenario_and_table is None:
+        return None
+    scenario_name, scenario_table_name = scenario_and_table
+    return Box(
+        {
+            'scenario': scenario_name,
+            'table': scenario_table_name,
+            'locations': scenario_locations[scenario_name],
+            'batch_size': store_parameters.batch_size,
+        }
+    )
+
+
+def get_table_chunks(
+    table: pd.DataFrame | pd.Series, store_target: Box
+) -> ty.Iterator[list[tuple]]:
+    '''
+    Converts the numeric columns of a table to long format rows
+    (see RESULTS_COLUMNS), in chunks of about the batch size.
+    The time tag is the time index (or the first time level of the
+    index), if there is one. Otherwise, the row label is the index value.
+    The location is the column if the column is a location of the
+    scenario (such as in charge drawn tables), or the location the table
+    name starts with (such as in the battery spaces tables of a location).
+    The quantity is the column name.
+    '''
+    table = pd.DataFrame(table)  # Because some are Series
+    numeric_positions: list[int] = [
+        column_position
+        for column_position, column_type in enumerate(table.dtypes)
+        if pd.api.types.is_numeric_dtype(column_type)
+    ]
+    if not numeric_positions or table.empty:
+        return
+    quantities: np.ndarray = np.array(
+        [str(table.columns[position]) for position in numeric_positions],
+        dtype=object,
+    )
+    table_locations: list[str] = [
+        location
+        for location in store_target.locations
+        if store_target.table.startswith(f'{location}_')
+    ]
+    table_location: str | None = (
+        max(table_locations, key=len) if table_locations else None
+    )
+    column_locations: np.ndarray = np.array(
+        [
+            quantity if quantity in store_target.locations else table_location
+            for quantity in quantities
+        ],
+        dtype=object,
+    )
+
+    time_tags: pd.DatetimeIndex | None = None
+    if isinstance(table.index, pd.DatetimeIndex):
+        time_tags = table.index
+    elif isinstance(table.index, pd.MultiIndex):
+        for level_position in range(table.index.nlevels):
+            level_values: pd.Index = table.index.get_level_values(
+                level_position
+            )
+            if isinstance(level_values, pd.DatetimeIndex):
+                time_tags = level_values
+                break
+    row_time_tags: np.ndarray = np.full(len(table), None, dtype=object)
+    row_labels: np.ndarray = np.full(len(table), None, dtype=object)
+    if time_tags is None:
+        row_labels = np.array(
+            [str(index_value) for index_value in table.index], dtype=object
+        )
+    else:
+        row_time_tags[~time_tags.isna()] = time_tags[
+            ~time_tags.isna()
+        ].strftime(TIME_TAG_FORMAT)
+
+    values: np.ndarray = table.iloc[:, numeric_positions].to_numpy(dtype=float)
+    column_amount: int = len(numeric_positions)
+    rows_per_chunk: int = max(1, store_target.batch_size // column_amount)
+    for chunk_start in range(0, len(table), rows_per_chunk):
+        chunk_end: int = min(chunk_start + rows_per_chunk, len(table))
+        chunk_row_amount: int = chunk_end - chunk_start
+        yield list(
+            zip(
+                itertools.repeat(store_target.scenario),
+                itertools.repeat(store_target.table),
+                np.repeat(row_time_tags[chunk_start:chunk_end], column_amount),
+                np.repeat(row_labels[chunk_start:chunk_end], column_amount),
+                np.tile(column_locations, chunk_row_amount),
+                np.tile(quantities, chunk_row_amount),
+                values[chunk_start:chunk_end].ravel().tolist(),
+            )
+        )
+
+
+def put_table_in_store(
+    table: pd.DataFrame | pd.Series,
+    store_target: Box,
+    store_queue: ty.Any,
+) -> None:
+    '''
+    Puts a table in the queue of the store writer: first a message
+    to remove the previous values of the table (for example of a
+    previous run), then the chunks of its values. The chunks are sent
+    pickled, so that the queue (which is served by a manager process)
+    only passes bytes along instead of unpickling and pickling
+    all the rows again.
+    '''
+    store_queue.put(('table', store_target.scenario, store_target.table))
+    for table_chunk in get_table_chunks(table, store_target):
+        store_queue.put(
+            ('rows', pickle.dumps(table_chunk, pickle.HIGHEST_PROTOCOL))
+        )
+
+
+def start_store_writer(
+    case_name: str, general_parameters: Box
+) -> tuple[SyncManager, ty.Any, multiprocessing.Process]:
+    '''
+    Starts the writer process of the results store of a case, with
+    a bounded queue (which can be passed to other processes, including
+    those of a Pool) to send it the tables to store.
+    '''
+    store_parameters: Box = general_parameters.results_store
+    store_manager: SyncManager = multiprocessing.Manager()
+    store_queue: ty.Any = store_manager.Queue(store_parameters.queue_size)
+    store_writer: multiprocessing.Process = multiprocessing.Process(
+        target=run_store_writer,
+        args=(
+            get_database_path(case_name, general_parameters),
+            store_queue,
+            store_parameters.batch_size,
+        ),
+    )
+    store_writer.start()
+    return store_manager, store_queue, store_writer
+
+
+def stop_store_writer(
+    store_manager: SyncManager,
+    store_queue: ty.Any,
+    store_writer: multiprocessing.Process,
+) -> None:
+    '''
+    Tells the writer process of the results store that there are no
+    more tables, waits for it to finish and stops the queue.
+    '''
+    store_queue.put(None)
+    store_writer.join()
+    store_manager.shutdown()
+    if store_writer.exitcode != 0:
+        raise RuntimeError('The results store writer failed (see above)')
+
+
+def run_store_writer(
+    database_path: str, store_queue: ty.Any, batch_size: int
+) -> None:
+    '''
+    Inserts the chunks of the queue into the results database, with
+    one transaction for each batch of (about) batch_size rows, until
+    it gets None. The indexes are then created. If an insert fails,
+    the rest of the queue is still read (so that the processes that
+    feed it do not wait for it), and the error is raised at the end.
+    '''
+    connection: sqlite3.Connection = sqlite3.connect(database_path)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    connection.execute(CREATE_RESULTS_TABLE)
+    connection.commit()
+    # Only the tables of previous runs need their values removed
+    # (the indexes make this fast, but they only exist once a run has
+    # finished, so we do not scan the table for new tables)
+    stored_tables: set[tuple[str, str]] = set(
+        connection.execute(SELECT_STORED_TABLES).fetchall()
+    )
+    pending_rows: int = 0
+    store_error: Exception | None = None
+    while (store_message := store_queue.get()) is not None:
+        if store_error is not None:
+            continue
+        try:
+            if store_message[0] == 'table':
+                if tuple(store_message[1:]) in stored_tables:
+                    connection.execute(DELETE_TABLE_RESULTS, store_message[1:])
+            else:
+                table_chunk: list[tuple] = pickle.loads(store_message[1])
+                connection.executemany(INSERT_RESULTS, table_chunk)
+                pending_rows += len(table_chunk)
+            if pending_rows >= batch_size:
+                connection.commit()
+                pending_rows = 0
+        except sqlite3.Error as error:
+            connection.rollback()
+            store_error = error
+    if store_error is None:
+        connection.commit()
+        for create_results_index in CREATE_RESULTS_INDEXES:
+            connection.execute(create_results_index)
+        connection.commit()
+    connection.close()
+    if store_error is not None:
+        raise store_error
+
+
+def read_results(
+    database_path: str,
+    scenario_names: list[str] | None = None,
+    table_name: str | None = None,
+    quantities: list[str] | None = None,
+    locations: list[str] | None = None,
+    start: pd.Timestamp | str | None = None,
+    end: pd.Timestamp | str | None = None,
+) -> pd.DataFrame:
+    '''
+    Reads values from the results database (in long format, see
+    RESULTS_COLUMNS), for some scenarios, a table, some quantities and
+    some locations (all of them if these are None), and time tags from
+    the start and before the end (if given).
+    '''
+    conditions: list[str] = []
+    parameters: list[ty.Any] = []
+    for column_name, column_values in [
+        ('scenario', scenario_names),
+        ('quantity', quantities),
+        ('location', locations),
+    ]:
+        if column_values is not None:
+            conditions.append(
+                f'{column_name} IN ({", ".join("?" * len(column_values))})'
+            )
+            parameters.extend(column_values)
+    if table_name is not None:
+        conditions.append('table_name = ?')
+        parameters.append(table_name)
+    if start is not None:
+        conditions.append('time_tag >= ?')
+        parameters.append(pd.Timestamp(start).strftime(TIME_TAG_FORMAT))
+    if end is not None:
+        conditions.append('time_tag < ?')
+        parameters.append(pd.Timestamp(end).strftime(TIME_TAG_FORMAT))
+    query: str = f'SELECT * FROM {RESULTS_TABLE_NAME}'
+    if conditions:
+        query = f'{query} WHERE {" AND ".join(conditions)}'
+    with sqlite3.connect(database_path) as connection:
+        results: pd.DataFrame = pd.read_sql_query(
+            query, connection, params=parameters
+        )
+    connection.close()
+    results['time_tag'] = pd.to_datetime(
+        results['time_tag'], format=TIME_TAG_FORMAT
+    )
+    return results
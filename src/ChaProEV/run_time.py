@@ -5,13 +5,15 @@ This module defines time structures.
 It contains the following functions:
 1. **get_time_range:** This function returns the time range of the run, and the
     associated hour numbers, based on values found in the
-    scenario file.
+    scenario file (memoised per run parameters).
 2. **get_time_stamped_dataframe:** This function creates a DataFrame with the
 time tags of the run as index (and hour numbers as a column).
 3. **get_day_type:** Tells us the date type of a given time_tag.
-4. **add_day_type_to_time_stamped_dataframe:** Adds a column with the date type
+4. **get_day_types:** Tells us the date types of an index of time tags
+(vectorised and memoised).
+5. **add_day_type_to_time_stamped_dataframe:** Adds a column with the date type
 to a time-stamped_dataframe
-5. **from_day_to_run:** Clones dataframe for a day (with zero at day start) for
+6. **from_day_to_run:** Clones dataframe for a day (with zero at day start) for
 the whole run.
 '''
 
@@ -24,6 +26,28 @@ from box import Box
 from ETS_CookBook import ETS_CookBook as cook
 from rich import print
 
+# The possible day types. The first four are ordered so that their position
+# is (1 if weekend else 0) + (2 if holiday week else 0)
+DAY_TYPE_NAMES: list[str] = [
+    'weekday_in_work_week',
+    'weekend_in_work_week',
+    'weekday_in_holiday_week',
+    'weekend_in_holiday_week',
+    'weekend_holiday_departures',
+    'weekend_holiday_returns',
+    'holiday_overlap_weekend',
+]
+# The time ranges are memoised (see get_time_range), for this amount of
+# run parameters combinations
+TIME_RANGES_MEMO_SIZE: int = 32
+time_ranges_memo: dict[
+    tuple, tuple[pd.DatetimeIndex, list[int], pd.DatetimeIndex]
+] = {}
+# The day types of time tags are memoised (see get_day_types), for this
+# amount of calendar parameters and time tags combinations
+DAY_TYPES_MEMO_SIZE: int = 32
+day_types_memo: dict[tuple, pd.Categorical] = {}
+
 
 def get_run_duration(
     scenario: Box, general_parameters: Box
@@ -57,8 +81,17 @@ def get_time_range(
     '''
     This function returns the time range of the run, and the
     associated hour numbers, based on values found in the
-    scenario file.
+    scenario file. The results are memoised per run parameters, so that
+    all consumers of a scenario share the same (immutable) ranges
+    (they get a copy of the hour numbers).
     '''
+    time_range_key: tuple = get_time_range_key(scenario, general_parameters)
+    if time_range_key in time_ranges_memo:
+        run_range, run_hour_numbers, display_range = time_ranges_memo[
+            time_range_key
+        ]
+        return run_range, run_hour_numbers.copy(), display_range
+
     run_parameters: Box = scenario.run
     run_start_parameters: Box = run_parameters.start
     run_start_year: int = int(run_start_parameters.year)
@@ -177,18 +210,64 @@ def get_time_range(
     SECONDS_PER_HOUR: int = time_parameters.SECONDS_PER_HOUR
     first_hour_number: int = time_parameters.first_hour_number
 
-    run_hour_numbers: list[int] = [
-        first_hour_number
-        + int(
-            (
-                time_stamp - datetime.datetime(time_stamp.year, 1, 1, 0, 0)
-            ).total_seconds()
-            / SECONDS_PER_HOUR
+    run_year_starts: pd.DatetimeIndex = pd.DatetimeIndex(
+        pd.to_datetime(
+            pd.DataFrame({'year': run_range.year, 'month': 1, 'day': 1})
         )
-        for time_stamp in run_range
-    ]
+    ).as_unit(run_range.unit)
+    run_hour_numbers: list[int] = (
+        first_hour_number
+        + np.floor(
+            (run_range - run_year_starts).total_seconds() / SECONDS_PER_HOUR
+        ).astype(int)
+    ).tolist()
+
+    if len(time_ranges_memo) >= TIME_RANGES_MEMO_SIZE:
+        del time_ranges_memo[next(iter(time_ranges_memo))]
+    time_ranges_memo[time_range_key] = (
+        run_range,
+        run_hour_numbers,
+        display_range,
+    )
+
+    return run_range, run_hour_numbers.copy(), display_range
 
-    return run_range, run_hour_numbers, display_range
+
+def get_time_range_key(scenario: Box, general_parameters: Box) -> tuple:
+    '''
+    Gives the parameters that determine the time range of the run
+    (as a tuple that can be used as a key to memoise it).
+    '''
+    run_parameters: Box = scenario.run
+    moment_names: list[str] = ['year', 'month', 'day', 'hour', 'minute']
+    frequency_names: list[str] = ['size', 'type']
+    mobility_module_parameters: Box = scenario.mobility_module
+    time_parameters: Box = general_parameters.time
+    return (
+        tuple(
+            tuple(
+                int(run_parameters[moment_parameters][moment_name])
+                for moment_name in moment_names
+            )
+            for moment_parameters in [
+                'start',
+                'display_start',
+                'end',
+                'display_end',
+            ]
+        ),
+        tuple(
+            tuple(
+                run_parameters[frequency_parameters][frequency_name]
+                for frequency_name in frequency_names
+            )
+            for frequency_parameters in ['frequency', 'display_frequency']
+        ),
+        int(mobility_module_parameters.day_start_hour),
+        bool(mobility_module_parameters.compute_start_location_split),
+        time_parameters.SECONDS_PER_HOUR,
+        time_parameters.first_hour_number,
+    )
 
 
 def get_time_stamped_dataframe(
@@ -297,6 +376,80 @@ def get_day_type(
     return day_name
 
 
+def get_day_types(
+    time_tags: pd.DatetimeIndex, scenario: Box, general_parameters: Box
+) -> pd.Categorical:
+    '''
+    Tells us the date types of an index of time tags (giving the same
+    results as get_day_type for each time tag). The ISO weeks and
+    weekdays are computed once for the whole index and mapped
+    to day types with array operations. The results are memoised per
+    calendar parameters and time tags (callers get a copy).
+    '''
+    weekend_day_numbers: tuple[int, ...] = tuple(
+        general_parameters.time['weekend_day_numbers']
+    )
+    mobility_module_parameters: Box = scenario.mobility_module
+    holiday_weeks: tuple[int, ...] = tuple(
+        mobility_module_parameters.holiday_weeks
+    )
+    holiday_departures_in_weekend_week_numbers: tuple[int, ...] = tuple(
+        mobility_module_parameters.holiday_departures_in_weekend_week_numbers
+    )
+    holiday_returns_in_weekend_week_numbers: tuple[int, ...] = tuple(
+        mobility_module_parameters.holiday_returns_in_weekend_week_numbers
+    )
+    day_types_key: tuple = (
+        weekend_day_numbers,
+        holiday_weeks,
+        holiday_departures_in_weekend_week_numbers,
+        holiday_returns_in_weekend_week_numbers,
+        time_tags.dtype.str,
+        time_tags.asi8.tobytes(),
+    )
+    if day_types_key in day_types_memo:
+        return day_types_memo[day_types_key].copy()
+
+    iso_calendar: pd.DataFrame = time_tags.isocalendar()
+    weekdays: np.ndarray = iso_calendar['day'].to_numpy(dtype=int)
+    weeks: np.ndarray = iso_calendar['week'].to_numpy(dtype=int)
+
+    is_weekend: np.ndarray = np.isin(weekdays, weekend_day_numbers)
+    is_holiday_week: np.ndarray = np.isin(weeks, holiday_weeks)
+    # The positions of the base day types in DAY_TYPE_NAMES follow
+    # from the day type (weekday/weekend) and week type (work/holiday)
+    day_type_codes: np.ndarray = (
+        is_weekend.astype(int) + 2 * is_holiday_week.astype(int)
+    )
+
+    is_holiday_departure: np.ndarray = is_weekend & np.isin(
+        weeks, holiday_departures_in_weekend_week_numbers
+    )
+    is_holiday_return: np.ndarray = is_weekend & np.isin(
+        weeks, holiday_returns_in_weekend_week_numbers
+    )
+    # The order matters, as overlaps take precedence over departures,
+    # which take precedence over returns
+    day_type_codes[is_holiday_return] = DAY_TYPE_NAMES.index(
+        'weekend_holiday_returns'
+    )
+    day_type_codes[is_holiday_departure] = DAY_TYPE_NAMES.index(
+        'weekend_holiday_departures'
+    )
+    day_type_codes[is_holiday_departure & is_holiday_return] = (
+        DAY_TYPE_NAMES.index('holiday_overlap_weekend')
+    )
+
+    day_types: pd.Categorical = pd.Categorical.from_codes(
+        day_type_codes, categories=DAY_TYPE_NAMES
+    )
+    if len(day_types_memo) >= DAY_TYPES_MEMO_SIZE:
+        del day_types_memo[next(iter(day_types_memo))]
+    day_types_memo[day_types_key] = day_types
+
+    return day_types.copy()
+
+
 def add_day_type_to_time_stamped_dataframe(
     dataframe: pd.DataFrame, scenario: Box, general_parameters: Box
 ) -> pd.DataFrame:
@@ -305,16 +458,14 @@ def add_day_type_to_time_stamped_dataframe(
     to a time-stamped_dataframe
     '''
     day_start_hour: int = int(scenario.mobility_module.day_start_hour)
-    day_types: list[str] = [
-        get_day_type(
-            time_tag - datetime.timedelta(hours=day_start_hour),
-            scenario,
-            general_parameters,
-        )
-        for time_tag in dataframe.index
-    ]
+    day_types: pd.Categorical = get_day_types(
+        pd.DatetimeIndex(dataframe.index)
+        - datetime.timedelta(hours=day_start_hour),
+        scenario,
+        general_parameters,
+    )
 
-    dataframe['Day Type'] = day_types
+    dataframe['Day Type'] = day_types.tolist()
     return dataframe
 
 
@@ -346,10 +497,11 @@ def get_day_start_time_tags_and_types(
     tags_range: pd.DatetimeIndex = pd.date_range(
         start=tags_start, end=tags_end, freq='D', inclusive='both'
     )
-    for time_tag in tags_range:
-        time_tags_and_types.append(
-            (time_tag, get_day_type(time_tag, scenario, general_parameters))
-        )
+    day_types: pd.Categorical = get_day_types(
+        tags_range, scenario, general_parameters
+    )
+    for time_tag, day_type in zip(tags_range, day_types.tolist()):
+        time_tags_and_types.append((time_tag, day_type))
 
     return time_tags_and_types
 
@@ -102,7 +102,6 @@ def run_scenario(
         run_next_leg_kilometers_cumulative,
         run_next_leg_charge_from_network,
         run_next_leg_charge_to_vehicle,
-        run_charging_sessions,
         run_charging_sessions_dataframe,
     ) = mobility.make_mobility_data(
         location_connections,
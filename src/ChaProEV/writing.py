@@ -2,16 +2,30 @@
 Author: Omar Usmani (Omar.Usmani@TNO.nl)
 This contains functions related to writting outputs.
 It contains the following functions:
-1. **write_scenario_parameters:** This function writes the scenario parameters
+1. **is_table_in_manifest:** Tells if a table is requested by the tables
+    manifest (include and exclude patterns).
+2. **is_interim_table_requested:** Tells if an interim table needs to be saved.
+3. **save_interim_table:** Pickles an interim table if it is requested.
+4. **get_table_output_formats:** Gives the formats that a table is saved to
+    (in extra_end_outputs).
+5. **save_pickle_file_to_other_formats:** Loads a pickle file of the output
+    folder and saves it to other formats (and the columnar dataset and
+    results store).
+6. **extra_end_outputs:** Saves the pickle files (of the tables in the
+    manifest) to other formats, one table at a time (in parallel or not).
+7. **wait_for_pending_saves:** Waits until at least one of the pending
+    (parallel) pickle saves is done.
+8. **write_scenario_parameters:** This function writes the scenario parameters
     to the output files (either as separate files, or as tables/sheets
     in groupfiles.)
 '''
 
 import datetime
+import fnmatch
 import os
 import typing as ty
-from itertools import repeat
 from multiprocessing import Pool
+from multiprocessing.pool import AsyncResult
 
 import pandas as pd
 from box import Box
@@ -19,88 +33,372 @@ from ETS_CookBook import ETS_CookBook as cook
 from rich import print
 from tqdm.rich import tqdm
 
+try:
+    import columnar_outputs  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import columnar_outputs  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+try:
+    import results_store  # type: ignore
+
+    # We need to ignore the type because mypy has its own search path for
+    # imports and does not resolve imports exactly as Python does and it
+    # isn't able to find the module.
+    # https://stackoverflow.com/questions/68695851/mypy-cannot-find-implementation-or-library-stub-for-module
+except ModuleNotFoundError:
+    from ChaProEV import results_store  # type: ignore
+# So that it works both as a standalone (1st) and as a package (2nd)
+# We need to add to type: ignore thing to avoid MypY thinking
+# we are importing again
+
+BYTES_PER_MEGABYTE: int = 1_000_000
+# How long (in seconds) we wait for a parallel pickle save before checking
+# all of them again
+SAVE_POLLING_INTERVAL: float = 0.1
+
+
+def is_table_in_manifest(table_name: str, general_parameters: Box) -> bool:
+    '''
+    Tells if a table (named as its file, without extension) is requested
+    by the tables manifest (the interim_files.tables parameters), i.e.
+    if it matches one of the include patterns and none of the
+    exclude patterns.
+    '''
+    tables_manifest: Box = general_parameters.interim_files.tables
+    return any(
+        fnmatch.fnmatchcase(table_name, include_pattern)
+        for include_pattern in tables_manifest.include
+    ) and not any(
+        fnmatch.fnmatchcase(table_name, exclude_pattern)
+        for exclude_pattern in tables_manifest.exclude
+    )
+
+
+def is_interim_table_requested(
+    table_name: str, general_parameters: Box
+) -> bool:
+    '''
+    Tells if an interim table (named as its file, without extension)
+    needs to be saved: interim files need to be pickled and the table
+    needs to be in the tables manifest.
+    '''
+    return general_parameters.interim_files.pickle and is_table_in_manifest(
+        table_name, general_parameters
+    )
+
+
+def save_interim_table(
+    table: pd.DataFrame | pd.Series, file_path: str, general_parameters: Box
+) -> None:
+    '''
+    Pickles an interim table to a file path if it is requested
+    (see is_interim_table_requested).
+    '''
+    table_name: str = os.path.splitext(os.path.basename(file_path))[0]
+    if is_interim_table_requested(table_name, general_parameters):
+        table.to_pickle(file_path)
+
+
+def get_table_output_formats(table_name: str, general_parameters: Box) -> Box:
+    '''
+    Gives the formats (with the same structure as
+    files.dataframe_outputs) that a table is saved to by
+    extra_end_outputs. These are the formats of the first pattern of
+    interim_files.tables.formats that the table name matches, or
+    files.dataframe_outputs if it matches none.
+    '''
+    dataframe_outputs: Box = general_parameters.files.dataframe_outputs
+    for (
+        table_pattern,
+        pattern_formats,
+    ) in general_parameters.interim_files.tables.formats.items():
+        if fnmatch.fnmatchcase(table_name, table_pattern):
+            return Box(
+                {
+                    file_type: file_type in pattern_formats
+                    for file_type in dataframe_outputs
+                }
+            )
+    return dataframe_outputs
+
+
+def save_pickle_file_to_other_formats(
+    output_pickle_file: str,
+    output_folder: str,
+    groupfile_name: str,
+    dataframe_outputs: Box,
+    dataset_target: Box | None = None,
+    general_parameters: Box | None = None,
+    store_target: Box | None = None,
+    store_queue: ty.Any = None,
+) -> None:
+    '''
+    Loads a pickle file of the output folder and saves it to other formats
+    (and to the columnar dataset if a dataset target is given, see
+    columnar_outputs.get_dataset_target, and to the results store
+    if a store target is given, see results_store.get_store_target).
+    Only this table is loaded, so that converting one file at a time
+    only needs the memory of that table.
+    '''
+    table_to_save: pd.DataFrame = pd.DataFrame(  # Because some are Series
+        pd.read_pickle(f'{output_folder}/{output_pickle_file}')
+    )
+    output_table_name: str = output_pickle_file.split('.')[0]
+    if any(dataframe_outputs.values()):
+        cook.save_dataframe(
+            table_to_save,
+            output_table_name,
+            groupfile_name,
+            output_folder,
+            dataframe_outputs,
+        )
+    if dataset_target is not None:
+        columnar_outputs.write_table_to_dataset(
+            table_to_save, dataset_target, general_parameters
+        )
+    if store_target is not None:
+        results_store.put_table_in_store(
+            table_to_save, store_target, store_queue
+        )
+    del table_to_save
+
 
 @cook.function_timer
 def extra_end_outputs(case_name: str, general_parameters: Box) -> None:
     '''
-    Saves the pickle files to other formats
+    Saves the pickle files to other formats (only the tables in the
+    tables manifest, to the formats set for them, see
+    get_table_output_formats, to the columnar dataset, see
+    columnar_outputs, and to the results store, see results_store).
+    The files are streamed:
+    each conversion loads, saves and frees one table, either one after
+    the other or in parallel processes (which receive the file names, not
+    the tables). In parallel, the amount of processes is bounded, and
+    so is the memory of the tables being converted at the same time
+    (estimated with the pickle file sizes) if a memory budget is given.
     '''
     output_root: str = general_parameters.files.output_root
     output_folder: str = f'{output_root}/{case_name}'
     groupfile_root: str = general_parameters.files.groupfile_root
     groupfile_name: str = f'{groupfile_root}_{case_name}'
     output_files: list[str] = os.listdir(output_folder)
-    output_pickle_files: list[str] = [
-        output_file
-        for output_file in output_files
-        if output_file.split('.')[1] == 'pkl'
-    ]
-    tables_to_save: list[pd.DataFrame] = [
-        pd.DataFrame(  # Because some of these are Series
-            pd.read_pickle(f'{output_root}/{case_name}/{output_pickle_file}')
+    scenario_names: list[str] = []
+    if general_parameters.columnar_outputs.save:
+        # We check this before any conversion starts (otherwise, this
+        # would only fail in the processes that save the tables)
+        if not columnar_outputs.PYARROW_AVAILABLE:
+            raise ModuleNotFoundError(
+                'Saving columnar outputs needs pyarrow '
+                '(pip install ChaProEV[parquet])'
+            )
+        scenario_names = columnar_outputs.get_case_scenario_names(case_name)
+    scenario_locations: dict[str, list[str]] = {}
+    if general_parameters.results_store.save:
+        scenario_locations = results_store.get_case_scenario_locations(
+            case_name
         )
-        for output_pickle_file in output_pickle_files
-    ]
-
-    output_table_names: list[str] = [
-        output_pickle_file.split('.')[0]
-        for output_pickle_file in output_pickle_files
-    ]
+    # We only save the tables in the manifest, to the formats
+    # set for them (if any), to the columnar dataset and to the
+    # results store (if they go there)
+    output_pickle_files: list[str] = []
+    output_tables_formats: list[Box] = []
+    output_dataset_targets: list[Box | None] = []
+    output_store_targets: list[Box | None] = []
+    for output_file in output_files:
+        if output_file.split('.')[1] == 'pkl':
+            output_table_name: str = output_file.split('.')[0]
+            if is_table_in_manifest(output_table_name, general_parameters):
+                output_table_formats: Box = get_table_output_formats(
+                    output_table_name, general_parameters
+                )
+                dataset_target: Box | None = (
+                    columnar_outputs.get_dataset_target(
+                        output_table_name,
+                        case_name,
+                        scenario_names,
+                        general_parameters,
+                    )
+                )
+                store_target: Box | None = results_store.get_store_target(
+                    output_table_name, scenario_locations, general_parameters
+                )
+                # The results store replaces the groupfile database
+                # for the tables it stores
+                if store_target is not None and output_table_formats.sql:
+                    output_table_formats = Box(output_table_formats)
+                    output_table_formats.sql = False
+                if (
+                    any(output_table_formats.values())
+                    or dataset_target is not None
+                    or store_target is not None
+                ):
+                    output_pickle_files.append(output_file)
+                    output_tables_formats.append(output_table_formats)
+                    output_dataset_targets.append(dataset_target)
+                    output_store_targets.append(store_target)
 
+    parallel_processing_parameters: Box = (
+        general_parameters.parallel_processing
+    )
     do_parallel_processing_for_pickle_saves: bool = (
-        general_parameters.parallel_processing.do_parallel_processing_for_pickle_saves  # noqa: E501
+        parallel_processing_parameters.do_parallel_processing_for_pickle_saves
     )
 
-    if do_parallel_processing_for_pickle_saves:
-        set_amount_of_processes: bool = (
-            general_parameters.parallel_processing.set_amount_of_processes
-        )
-        if set_amount_of_processes:
-            number_of_parallel_processes: int | None = (
-                general_parameters.parallel_processing.amount_for_pickle_saves
-            )
+    progress_bars_parameters: Box = general_parameters.progress_bars
+    display_saving_pool_run: bool = (
+        progress_bars_parameters.display_saving_pool_run
+    )
+    saving_pool_run_description: str = (
+        progress_bars_parameters.saving_pool_run_description
+    )
 
-        else:
-            number_of_parallel_processes = None
-
-        saving_pool_inputs: (
-            ty.Iterator[tuple[pd.DataFrame, str, str, str, Box]] | ty.Any
-        ) = zip(
-            tables_to_save,
-            output_table_names,
-            repeat(groupfile_name),
-            repeat(output_folder),
-            repeat(general_parameters.files.dataframe_outputs),
-        )
-        # the ty.Any alternative is there because transforming it with the
-        # progress bar makes mypy think it change is type
-        progress_bars_parameters: Box = general_parameters.progress_bars
-        display_saving_pool_run: bool = (
-            progress_bars_parameters.display_saving_pool_run
+    # The tables that go to the results store are sent to its
+    # (single) writer process
+    store_writer_parts: tuple | None = None
+    store_queue: ty.Any = None
+    if any(store_target is not None for store_target in output_store_targets):
+        store_writer_parts = results_store.start_store_writer(
+            case_name, general_parameters
         )
-        saving_pool_run_description: str = (
-            progress_bars_parameters.saving_pool_run_description
-        )
-        if display_saving_pool_run:
-            saving_pool_inputs = tqdm(
-                saving_pool_inputs,
-                desc=saving_pool_run_description,
-                total=len(tables_to_save),
+        store_queue = store_writer_parts[1]
+    try:
+        if do_parallel_processing_for_pickle_saves:
+            set_amount_of_processes: bool = (
+                parallel_processing_parameters.set_amount_of_processes
             )
-        with Pool(number_of_parallel_processes) as saving_pool:
-            saving_pool.starmap(cook.save_dataframe, saving_pool_inputs)
-    else:
-        for table_to_save, output_table_name in zip(
-            tables_to_save, output_table_names
-        ):
-            cook.save_dataframe(
-                table_to_save,
-                output_table_name,
-                groupfile_name,
-                output_folder,
-                general_parameters.files.dataframe_outputs,
+            if set_amount_of_processes:
+                number_of_parallel_processes: int = (
+                    parallel_processing_parameters.amount_for_pickle_saves
+                )
+
+            else:
+                number_of_parallel_processes = os.cpu_count() or 1
+            # The budget is in MB, zero means that there is no budget
+            memory_budget: float = (
+                parallel_processing_parameters.memory_budget_for_pickle_saves
+                * BYTES_PER_MEGABYTE
             )
 
+            saving_progress_bar: tqdm | None = None
+            if display_saving_pool_run:
+                saving_progress_bar = tqdm(
+                    desc=saving_pool_run_description,
+                    total=len(output_pickle_files),
+                )
+            with Pool(number_of_parallel_processes) as saving_pool:
+                pending_saves: list[tuple[AsyncResult, float]] = []
+                for (
+                    output_pickle_file,
+                    output_table_formats,
+                    dataset_target,
+                    store_target,
+                ) in zip(
+                    output_pickle_files,
+                    output_tables_formats,
+                    output_dataset_targets,
+                    output_store_targets,
+                ):
+                    table_memory: float = os.path.getsize(
+                        f'{output_folder}/{output_pickle_file}'
+                    )
+                    # We wait for running conversions to finish if there are
+                    # as many as processes or if the table does not fit
+                    # in the budget (a table that is larger than the
+                    # budget is converted on its own)
+                    while pending_saves and (
+                        len(pending_saves) >= number_of_parallel_processes
+                        or (
+                            memory_budget > 0
+                            and sum(
+                                pending_memory
+                                for _, pending_memory in pending_saves
+                            )
+                            + table_memory
+                            > memory_budget
+                        )
+                    ):
+                        pending_saves = wait_for_pending_saves(
+                            pending_saves, saving_progress_bar
+                        )
+                    pending_saves.append(
+                        (
+                            saving_pool.apply_async(
+                                save_pickle_file_to_other_formats,
+                                (
+                                    output_pickle_file,
+                                    output_folder,
+                                    groupfile_name,
+                                    output_table_formats,
+                                    dataset_target,
+                                    general_parameters,
+                                    store_target,
+                                    store_queue,
+                                ),
+                            ),
+                            table_memory,
+                        )
+                    )
+                while pending_saves:
+                    pending_saves = wait_for_pending_saves(
+                        pending_saves, saving_progress_bar
+                    )
+            if saving_progress_bar is not None:
+                saving_progress_bar.close()
+        else:
+            for (
+                output_pickle_file,
+                output_table_formats,
+                dataset_target,
+                store_target,
+            ) in zip(
+                output_pickle_files,
+                output_tables_formats,
+                output_dataset_targets,
+                output_store_targets,
+            ):
+                save_pickle_file_to_other_formats(
+                    output_pickle_file,
+                    output_folder,
+                    groupfile_name,
+                    output_table_formats,
+                    dataset_target,
+                    general_parameters,
+                    store_target,
+                    store_queue,
+                )
+    finally:
+        if store_writer_parts is not None:
+            results_store.stop_store_writer(*store_writer_parts)
+
+
+def wait_for_pending_saves(
+    pending_saves: list[tuple[AsyncResult, float]],
+    saving_progress_bar: tqdm | None,
+) -> list[tuple[AsyncResult, float]]:
+    '''
+    Waits until at least one of the pending (parallel) pickle saves is
+    done and returns the ones that are still pending. Errors in the
+    saves are raised here.
+    '''
+    pending_saves[0][0].wait(SAVE_POLLING_INTERVAL)
+    still_pending_saves: list[tuple[AsyncResult, float]] = []
+    for pending_save, pending_memory in pending_saves:
+        if pending_save.ready():
+            pending_save.get()
+            if saving_progress_bar is not None:
+                saving_progress_bar.update(1)
+        else:
+            still_pending_saves.append((pending_save, pending_memory))
+    return still_pending_saves
+
 
 def write_scenario_parameters(
     scenario: Box, case_name: str, general_parameters: Box
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+import battery_space_arrays
+from histograms import BatterySpaceHistogram
+
+
+def test_battery_space_arrays(tmp_path) -> None:
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01 05:00', periods=48, freq='h', name='Time Tag'
+    )
+    battery_spaces: BatterySpaceHistogram = BatterySpaceHistogram(
+        time_tags, initial_capacity=1
+    )
+    # The spaces are added out of order
+    for row in range(len(time_tags)):
+        battery_spaces.set(row, float(0), 0.5)
+        battery_spaces.add(row, 12.5, row / 100)
+        battery_spaces.add(row, 3.25, 1 / 3)
+    run_hour_numbers: list[int] = list(range(5, 53))
+    file_root: str = f'{tmp_path}/XX_car_home_battery_spaces'
+
+    battery_space_arrays.write_battery_space_array(
+        battery_spaces, run_hour_numbers, file_root
+    )
+    battery_space_array, sidecar = (
+        battery_space_arrays.load_battery_space_array(file_root)
+    )
+    assert isinstance(battery_space_array, np.memmap)
+    assert battery_space_array.dtype == np.float32
+    assert sidecar.battery_spaces == [0.0, 3.25, 12.5]
+
+    # As the battery spaces DataFrames written by the charging module
+    expected_battery_spaces: pd.DataFrame = battery_spaces.to_dataframe()
+    expected_battery_spaces.columns = expected_battery_spaces.columns.astype(
+        str
+    )
+    expected_battery_spaces.index = pd.MultiIndex.from_arrays(
+        [
+            time_tags,
+            run_hour_numbers,
+            [f't{hour_number:04}' for hour_number in run_hour_numbers],
+        ],
+        names=['Time Tag', 'Hour Number', 'SPINE_Hour_Number'],
+    )
+    read_battery_spaces: pd.DataFrame = (
+        battery_space_arrays.read_battery_spaces(file_root)
+    )
+    assert read_battery_spaces.index.equals(expected_battery_spaces.index)
+    assert list(read_battery_spaces.columns) == ['0.0', '3.25', '12.5']
+    assert np.allclose(
+        read_battery_spaces.values, expected_battery_spaces.values
+    )
+
+    day_battery_spaces: pd.DataFrame = (
+        battery_space_arrays.read_battery_spaces(
+            file_root,
+            start='2020-01-02 05:00',
+            end='2020-01-02 11:00',
+            battery_spaces=[12.5, 0.0],
+        )
+    )
+    assert day_battery_spaces.shape == (6, 2)
+    assert list(day_battery_spaces.columns) == ['12.5', '0.0']
+    assert np.allclose(day_battery_spaces['12.5'], np.arange(24, 30) / 100)
+    assert day_battery_spaces.index[0][1] == 29
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        test_battery_space_arrays(temporary_folder)
@@ -0,0 +1,139 @@
+import box
+import numpy as np
+import pandas as pd
+
+import columnar_outputs
+
+
+def get_test_general_parameters(dataset_root: str) -> box.Box:
+    return box.Box(
+        {
+            'columnar_outputs': {
+                'save': True,
+                'folder': 'columnar',
+                'tables': ['*_profile', '*_battery_spaces'],
+                'compression': 'zstd',
+                'row_group_size': 24,
+                'downcast_to_float32': True,
+                'float32_relative_tolerance': 1e-6,
+            },
+            'files': {'output_root': dataset_root},
+        }
+    )
+
+
+def test_dataset_targets() -> None:
+    general_parameters: box.Box = get_test_general_parameters('output')
+    scenario_names: list[str] = ['XX_car', 'XX_car_2030']
+
+    dataset_target: box.Box | None = columnar_outputs.get_dataset_target(
+        'XX_car_2030_home_battery_spaces',
+        'Mopo',
+        scenario_names,
+        general_parameters,
+    )
+    assert dataset_target == {
+        'folder': 'output/columnar',
+        'case': 'Mopo',
+        'scenario': 'XX_car_2030',
+        'table': 'home_battery_spaces',
+    }
+    assert (
+        columnar_outputs.get_dataset_target(
+            'XX_car_connectivity', 'Mopo', scenario_names, general_parameters
+        )
+        is None
+    )
+    assert (
+        columnar_outputs.get_dataset_target(
+            'XX_van_profile', 'Mopo', scenario_names, general_parameters
+        )
+        is None
+    )
+
+
+def test_float32_downcasting() -> None:
+    table: pd.DataFrame = pd.DataFrame(
+        {
+            'exact': [0.5, np.nan, 2.0],
+            'precise': [1 / 3, 2 / 3, 1.0],
+            'large': [1e40, 0.0, 1.0],
+            'text': ['a', 'b', 'c'],
+        }
+    )
+
+    downcast_table: pd.DataFrame = columnar_outputs.downcast_float_columns(
+        table, 1e-6
+    )
+    assert downcast_table.dtypes.to_dict() == {
+        'exact': np.float32,
+        'precise': np.float32,
+        'large': np.float64,
+        'text': table['text'].dtype,
+    }
+    assert (
+        columnar_outputs.downcast_float_columns(table, 0)['precise'].dtype
+        == np.float64
+    )
+    assert table['precise'].dtype == np.float64
+
+
+def test_dataset_round_trip(tmp_path) -> None:
+    if not columnar_outputs.PYARROW_AVAILABLE:
+        return
+    general_parameters: box.Box = get_test_general_parameters(str(tmp_path))
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01', periods=96, freq='h', name='Time Tag'
+    )
+    scenario_names: list[str] = ['XX_car', 'XX_van']
+    for scenario_index, scenario_name in enumerate(scenario_names):
+        profile: pd.DataFrame = pd.DataFrame(
+            {
+                'Charge drawn (kWh)': np.arange(96) + scenario_index,
+                'Connectivity': np.linspace(0, 1, 96),
+            },
+            index=time_tags,
+        )
+        dataset_target: box.Box | None = columnar_outputs.get_dataset_target(
+            f'{scenario_name}_profile',
+            'Mopo',
+            scenario_names,
+            general_parameters,
+        )
+        assert dataset_target is not None
+        columnar_outputs.write_table_to_dataset(
+            profile, dataset_target, general_parameters
+        )
+
+    dataset_folder: str = f'{tmp_path}/columnar'
+    assert columnar_outputs.list_dataset_partitions(
+        dataset_folder
+    ).values.tolist() == [
+        ['Mopo', 'XX_car', 'profile'],
+        ['Mopo', 'XX_van', 'profile'],
+    ]
+    read_profile: pd.DataFrame = columnar_outputs.read_dataset_table(
+        dataset_folder,
+        'Mopo',
+        'XX_van',
+        'profile',
+        columns=['Charge drawn (kWh)'],
+        start='2020-01-02',
+        end='2020-01-03',
+    )
+    assert list(read_profile.columns) == ['Charge drawn (kWh)']
+    assert read_profile.index.equals(time_tags[24:48])
+    assert read_profile['Charge drawn (kWh)'].tolist() == list(range(25, 49))
+
+    both_profiles: pd.DataFrame = columnar_outputs.read_dataset_scenarios(
+        dataset_folder, 'Mopo', scenario_names, 'profile', ['Connectivity']
+    )
+    assert both_profiles.shape == (192, 1)
+    assert np.allclose(
+        both_profiles.loc['XX_car', 'Connectivity'], np.linspace(0, 1, 96)
+    )
+
+
+if __name__ == '__main__':
+    test_dataset_targets()
+    test_float32_downcasting()
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from day_patterns import DayPatternSeries
+
+
+def test_day_patterns() -> None:
+
+    day_start_hour: int = 5
+    run_range: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01 05:00', periods=24 * 3, freq='h'
+    )
+    first_day_table: pd.DataFrame = pd.DataFrame(
+        {'home': np.linspace(1, 0, 24), 'work': np.linspace(0, 1, 24)}
+    )
+    second_day_table: pd.DataFrame = pd.DataFrame({'home': np.ones(24)})
+
+    repeated: DayPatternSeries = DayPatternSeries.from_day_table(
+        first_day_table, run_range, day_start_hour
+    )
+    repeated_dataframe: pd.DataFrame = repeated.to_dataframe()
+    assert repeated.patterns.shape == (1, 24, 2)
+    assert repeated_dataframe.loc[run_range[0], 'home'] == 1
+    assert repeated_dataframe.loc[run_range[24], 'home'] == 1
+    assert repeated_dataframe.loc[run_range[23], 'work'] == 1
+
+    # The third day uses the same weights as the first one
+    run_weights: np.ndarray = np.repeat(
+        np.array([[0.25, 0.75], [1, 0], [0.25, 0.75]]), 24, axis=0
+    )
+    weighted_sum: DayPatternSeries = DayPatternSeries.weighted_sum(
+        [first_day_table, second_day_table],
+        run_weights,
+        ['home', 'work'],
+        run_range,
+        day_start_hour,
+    )
+    assert weighted_sum.patterns.shape == (2, 24, 2)
+    assert list(weighted_sum.day_codes) == [0, 1, 0]
+    expected_values: np.ndarray = np.zeros((len(run_range), 2))
+    for hour_index in range(len(run_range)):
+        expected_values[hour_index] = (
+            first_day_table.values[hour_index % 24]
+            * run_weights[hour_index, 0]
+        )
+        expected_values[hour_index, 0] += run_weights[hour_index, 1]
+    assert np.allclose(weighted_sum.get_values(), expected_values)
+
+    difference: DayPatternSeries = 1 - (weighted_sum - repeated) * 2
+    assert np.allclose(
+        difference.to_dataframe().values,
+        1 - (expected_values - repeated_dataframe.values) * 2,
+    )
+    # Several quantities (with the same amount of columns)
+    # can be summed at once
+    doubled_sum, work_sum = DayPatternSeries.weighted_sums(
+        [
+            [first_day_table * 2, second_day_table * 2],
+            [
+                first_day_table[['work']].set_axis(['Total'], axis=1),
+                second_day_table.set_axis(['Total'], axis=1),
+            ],
+        ],
+        run_weights,
+        [['home', 'work'], ['Total', 'Other']],
+        run_range,
+        day_start_hour,
+    )
+    assert np.allclose(doubled_sum.get_values(), 2 * expected_values)
+    assert np.allclose(
+        work_sum.patterns[:, :, 0],
+        [
+            0.25 * first_day_table['work'].values + 0.75,
+            first_day_table['work'].values,
+        ],
+    )
+    assert np.all(work_sum.to_dataframe()['Other'] == 0)
+
+    totals: pd.DataFrame = weighted_sum.sum_columns('Total').to_dataframe()
+    assert list(totals.columns) == ['Total']
+    assert np.allclose(totals['Total'].values, expected_values.sum(axis=1))
+
+
+if __name__ == '__main__':
+    test_day_patterns()
@@ -0,0 +1,132 @@
+import box
+import numpy as np
+import pandas as pd
+
+import charging
+import kernels
+from histograms import BatterySpaceHistogram
+
+
+def get_test_histograms() -> (
+    tuple[dict[str, BatterySpaceHistogram], BatterySpaceHistogram]
+):
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01', periods=2, freq='h'
+    )
+    battery_spaces: dict[str, BatterySpaceHistogram] = {
+        'home': BatterySpaceHistogram(time_tags),
+        'work': BatterySpaceHistogram(time_tags),
+    }
+    battery_spaces['home'].set(1, float(0), 0.15)
+    battery_spaces['home'].add(1, 2.5, 0.3)
+    battery_spaces['home'].add(1, 7.25, 0.25)
+    battery_spaces['home'].add(1, 1.5, 0.1)
+    battery_spaces['work'].set(1, float(0), 0.2)
+    travelling_battery_spaces: BatterySpaceHistogram = BatterySpaceHistogram(
+        pd.MultiIndex.from_tuples(
+            [('home', 'work'), ('work', 'home')],
+            names=['Origin', 'Destination'],
+        )
+    )
+    travelling_battery_spaces.add(1, 3.0, 0.05)
+    travelling_battery_spaces.add(1, 9.5, 0.1)
+    travelling_battery_spaces.add(1, 4.75, 0.02)
+
+    return battery_spaces, travelling_battery_spaces
+
+
+def test_engines() -> None:
+    scenario: box.Box = box.Box(
+        {'vehicle': {'base_consumption_per_km': {'electricity_kWh': 0.2}}}
+    )
+    zero_threshold: float = 1e-12
+    time_tag: pd.Timestamp = pd.Timestamp('2020-01-01 01:00')
+    impacts: np.ndarray = np.array([[0.0, 0.42], [0.0, 0.13]])
+    leg_distances: np.ndarray = np.array([[0.0, 12.0], [0.0, 12.0]])
+
+    engine_results: list[list[pd.DataFrame]] = []
+    for use_numba in [False, True]:
+        battery_spaces, travelling_battery_spaces = get_test_histograms()
+        (
+            battery_spaces,
+            travelling_battery_spaces,
+            arrivals_gap,
+        ) = charging.impact_of_arrivals(
+            time_tag,
+            1,
+            battery_spaces,
+            'work',
+            'home',
+            impacts,
+            travelling_battery_spaces,
+            zero_threshold,
+            use_numba,
+        )
+        (
+            battery_spaces,
+            travelling_battery_spaces,
+            departures_gap,
+        ) = charging.impact_of_departures(
+            scenario,
+            time_tag,
+            1,
+            battery_spaces,
+            'home',
+            'work',
+            impacts,
+            travelling_battery_spaces,
+            zero_threshold,
+            leg_distances,
+            use_numba,
+        )
+        assert arrivals_gap == 0.0
+        assert departures_gap == 0.0
+        engine_results.append(
+            [
+                battery_spaces['home'].to_dataframe(),
+                battery_spaces['work'].to_dataframe(),
+                travelling_battery_spaces.to_dataframe(),
+            ]
+        )
+
+    for pandas_result, numba_result in zip(*engine_results):
+        pd.testing.assert_frame_equal(pandas_result, numba_result)
+
+
+def test_charge_deficit_rollover() -> None:
+    available_charges: np.ndarray = np.array([1.0, 0.5, 0.25, 2.0, 1.0, 0.5])
+    target_charges: np.ndarray = np.array([2.0, 0.75, 0.0, 0.5, 0.25, 1.5])
+
+    # The previous approach: moving all deficits to the next session
+    # until there are none left
+    iterated_targets: np.ndarray = target_charges.copy()
+    charge_deficits: np.ndarray = np.maximum(
+        iterated_targets - available_charges, 0
+    )
+    while charge_deficits.sum() > 0:
+        iterated_targets = (
+            iterated_targets - charge_deficits + np.roll(charge_deficits, 1)
+        )
+        charge_deficits = np.maximum(iterated_targets - available_charges, 0)
+
+    charges, remaining_charge_deficit = kernels.roll_over_charge_deficits(
+        target_charges, available_charges
+    )
+    assert np.allclose(charges, iterated_targets)
+    # The last session's deficit goes to the first sessions
+    assert charges[0] == 1.0
+    assert charges[1] == 0.5
+    assert remaining_charge_deficit == 0.0
+    assert np.isclose(charges.sum(), target_charges.sum())
+
+    # Deficits that can not be absorbed remain
+    charges, remaining_charge_deficit = kernels.roll_over_charge_deficits(
+        np.array([2.0, 1.0]), np.array([1.0, 1.0])
+    )
+    assert list(charges) == [1.0, 1.0]
+    assert remaining_charge_deficit == 1.0
+
+
+if __name__ == '__main__':
+    test_engines()
+    test_charge_deficit_rollover()
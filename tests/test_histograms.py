@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from histograms import BatterySpaceHistogram
+
+
+def test_histograms() -> None:
+
+    index: pd.Index = pd.date_range('2020-01-01', periods=3, freq='h')
+    battery_spaces: BatterySpaceHistogram = BatterySpaceHistogram(
+        index, initial_capacity=1
+    )
+    battery_spaces.set(0, float(0), 0.5)
+    battery_spaces.add(0, 12.5, 0.3)
+    battery_spaces.add(0, 3.25, 0.2)
+    battery_spaces.add(1, 12.5, 0.1)
+
+    assert list(battery_spaces.spaces) == [0.0, 3.25, 12.5]
+    assert np.isclose(battery_spaces.row_sum(0), 1)
+    assert np.isclose(battery_spaces.weighted_row_sum(0), 0.3 * 12.5 + 0.65)
+    assert np.allclose(
+        battery_spaces.weighted_sums(), [0.3 * 12.5 + 0.65, 1.25, 0]
+    )
+    assert np.allclose(battery_spaces.sums(), [1, 0.1, 0])
+    assert battery_spaces.get(2, 7.0) == 0
+    assert 7.0 not in battery_spaces
+
+    battery_spaces.move(0, np.array([12.5]), np.array([5.0]), np.array([0.1]))
+    assert np.isclose(battery_spaces.get(0, 12.5), 0.2)
+    assert np.isclose(battery_spaces.get(0, 5.0), 0.1)
+    assert np.isclose(battery_spaces.row_sum(0), 1)
+    battery_spaces.move(0, np.array([5.0]), np.array([12.5]), np.array([0.1]))
+
+    battery_spaces.drop(float(0))
+    assert list(battery_spaces.spaces) == [3.25, 5.0, 12.5]
+    assert np.isclose(battery_spaces.get(0, 12.5), 0.3)
+
+    battery_spaces_dataframe: pd.DataFrame = battery_spaces.to_dataframe()
+    assert list(battery_spaces_dataframe.columns) == [3.25, 5.0, 12.5]
+    assert battery_spaces_dataframe.loc[index[1], 12.5] == 0.1
+
+
+def test_histogram_resolution() -> None:
+
+    index: pd.Index = pd.RangeIndex(2)
+    battery_spaces: BatterySpaceHistogram = BatterySpaceHistogram(
+        index, resolution=0.5
+    )
+    battery_spaces.add(0, 1.2, 0.4)
+    battery_spaces.add(0, 3.0, 0.1)
+    battery_spaces.add(1, 0.1 + 0.2 + 0.2, 0.2)
+
+    assert list(battery_spaces.spaces) == [0.0, 0.5, 1.0, 1.5, 3.0]
+    # Both the amounts and the battery space (energy) are conserved
+    assert np.isclose(battery_spaces.row_sum(0), 0.5)
+    assert np.isclose(battery_spaces.weighted_row_sum(0), 0.4 * 1.2 + 0.3)
+    assert battery_spaces.get(1, 0.5) == 0.2
+
+
+if __name__ == '__main__':
+    test_histograms()
+    test_histogram_resolution()
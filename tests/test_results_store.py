@@ -0,0 +1,114 @@
+import queue
+
+import box
+import numpy as np
+import pandas as pd
+
+import results_store
+
+
+def test_results_store(tmp_path) -> None:
+    general_parameters: box.Box = box.Box(
+        {
+            'results_store': {
+                'save': True,
+                'tables': ['*_charge_drawn_*', '*_battery_spaces'],
+                'batch_size': 5,
+            }
+        }
+    )
+    scenario_locations: dict[str, list[str]] = {
+        'XX_car': ['home', 'work'],
+        'XX_car_2030': ['home'],
+    }
+    assert (
+        results_store.get_store_target(
+            'XX_car_connectivity', scenario_locations, general_parameters
+        )
+        is None
+    )
+    store_target: box.Box | None = results_store.get_store_target(
+        'XX_car_charge_drawn_by_vehicles',
+        scenario_locations,
+        general_parameters,
+    )
+    assert store_target is not None
+    assert store_target.table == 'charge_drawn_by_vehicles'
+
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01', periods=4, freq='h'
+    )
+    charge_drawn: pd.DataFrame = pd.DataFrame(
+        {'home': [1.0, 2.0, 3.0, 4.0], 'work': [0.0, 0.5, np.nan, 1.0]},
+        index=pd.MultiIndex.from_arrays(
+            [time_tags, range(4)], names=['Time Tag', 'Hour number']
+        ),
+    )
+    table_chunks: list[list[tuple]] = list(
+        results_store.get_table_chunks(charge_drawn, store_target)
+    )
+    # Two table rows (with two values each) fit in a batch
+    assert [len(table_chunk) for table_chunk in table_chunks] == [4, 4]
+    assert table_chunks[0][1] == (
+        'XX_car',
+        'charge_drawn_by_vehicles',
+        '2020-01-01 00:00:00',
+        None,
+        'work',
+        'work',
+        0.0,
+    )
+
+    battery_spaces_target: box.Box | None = results_store.get_store_target(
+        'XX_car_2030_home_battery_spaces',
+        scenario_locations,
+        general_parameters,
+    )
+    assert battery_spaces_target is not None
+    battery_spaces: pd.DataFrame = pd.DataFrame(
+        {'0.0': [0.25, 0.5], '1.5': [0.75, 0.5], 'Label': ['a', 'b']},
+        index=['first', 'second'],
+    )
+
+    # The writer reads any queue, so we can run it in this process
+    database_path: str = f'{tmp_path}/results.sqlite3'
+    for run_number in range(2):
+        store_queue: queue.Queue = queue.Queue()
+        results_store.put_table_in_store(
+            charge_drawn, store_target, store_queue
+        )
+        results_store.put_table_in_store(
+            battery_spaces, battery_spaces_target, store_queue
+        )
+        store_queue.put(None)
+        results_store.run_store_writer(database_path, store_queue, 5)
+
+    # Values of a second run replace those of the first
+    assert len(results_store.read_results(database_path)) == 12
+    home_charge_drawn: pd.DataFrame = results_store.read_results(
+        database_path,
+        scenario_names=['XX_car'],
+        locations=['home'],
+        start='2020-01-01 01:00',
+        end='2020-01-01 03:00',
+    )
+    assert home_charge_drawn['value'].tolist() == [2.0, 3.0]
+    assert home_charge_drawn['time_tag'].tolist() == list(time_tags[1:3])
+    stored_battery_spaces: pd.DataFrame = results_store.read_results(
+        database_path, table_name='home_battery_spaces'
+    )
+    assert stored_battery_spaces['location'].unique().tolist() == ['home']
+    assert stored_battery_spaces['row_label'].tolist() == [
+        'first',
+        'first',
+        'second',
+        'second',
+    ]
+    assert stored_battery_spaces['quantity'].tolist() == ['0.0', '1.5'] * 2
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        test_results_store(temporary_folder)
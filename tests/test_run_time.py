@@ -0,0 +1,122 @@
+import datetime
+
+import box
+import pandas as pd
+
+import run_time
+
+
+def get_test_calendar_parameters() -> tuple[box.Box, box.Box]:
+    scenario: box.Box = box.Box(
+        {
+            'mobility_module': {
+                'holiday_weeks': [1, 8, 30, 31, 52, 53],
+                'holiday_departures_in_weekend_week_numbers': [7, 29, 30],
+                'holiday_returns_in_weekend_week_numbers': [8, 30, 31],
+            }
+        }
+    )
+    general_parameters: box.Box = box.Box(
+        {'time': {'weekend_day_numbers': [6, 7]}}
+    )
+    return scenario, general_parameters
+
+
+def test_day_types() -> None:
+    scenario, general_parameters = get_test_calendar_parameters()
+    # This range has an ISO week 53 and a year change within a week
+    time_tags: pd.DatetimeIndex = pd.date_range(
+        '2020-01-01 05:00', '2021-01-10 04:00', freq='h'
+    )
+
+    day_types: pd.Categorical = run_time.get_day_types(
+        time_tags, scenario, general_parameters
+    )
+    assert day_types.tolist() == [
+        run_time.get_day_type(time_tag, scenario, general_parameters)
+        for time_tag in time_tags
+    ]
+    assert set(day_types.tolist()) == set(run_time.DAY_TYPE_NAMES)
+
+    # Changes to the returned day types do not affect the memoised ones
+    day_types[0] = 'holiday_overlap_weekend'
+    assert run_time.get_day_types(
+        time_tags, scenario, general_parameters
+    ).tolist()[0] == run_time.get_day_type(
+        time_tags[0], scenario, general_parameters
+    )
+
+    # Other calendar parameters do not use the memoised day types
+    scenario.mobility_module.holiday_weeks = []
+    assert (
+        'weekday_in_holiday_week'
+        not in run_time.get_day_types(
+            time_tags, scenario, general_parameters
+        ).tolist()
+    )
+
+
+def test_time_range() -> None:
+    scenario: box.Box = box.Box(
+        {
+            'run': {
+                'start': {
+                    'year': 2019,
+                    'month': 12,
+                    'day': 30,
+                    'hour': 2,
+                    'minute': 0,
+                },
+                'end': {
+                    'year': 2021,
+                    'month': 1,
+                    'day': 2,
+                    'hour': 0,
+                    'minute': 0,
+                },
+                'frequency': {'size': 1, 'type': 'h'},
+                'display_frequency': {'size': 1, 'type': 'h'},
+            },
+            'mobility_module': {
+                'day_start_hour': 5,
+                'compute_start_location_split': True,
+            },
+        }
+    )
+    scenario.run.display_start = scenario.run.start.copy()
+    scenario.run.display_end = scenario.run.end.copy()
+    general_parameters: box.Box = box.Box(
+        {'time': {'SECONDS_PER_HOUR': 3600, 'first_hour_number': 0}}
+    )
+
+    run_range, run_hour_numbers, display_range = run_time.get_time_range(
+        scenario, general_parameters
+    )
+    # The run is extended to the prior day start
+    assert run_range[0] == datetime.datetime(2019, 12, 29, 5)
+    assert display_range[0] == datetime.datetime(2019, 12, 30, 2)
+    assert run_hour_numbers == [
+        int(
+            (time_tag - datetime.datetime(time_tag.year, 1, 1)).total_seconds()
+            / 3600
+        )
+        for time_tag in run_range
+    ]
+
+    # Consumers share the same ranges, but get their own hour numbers
+    run_hour_numbers[0] = -1
+    shared_run_range, shared_run_hour_numbers, _ = run_time.get_time_range(
+        scenario, general_parameters
+    )
+    assert shared_run_range is run_range
+    assert shared_run_hour_numbers[0] == 8693
+
+    scenario.run.end.year = 2020
+    assert len(run_time.get_time_range(scenario, general_parameters)[0]) < (
+        len(run_range)
+    )
+
+
+if __name__ == '__main__':
+    test_day_types()
+    test_time_range()
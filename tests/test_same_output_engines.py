@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+import pandas as pd
+from box import Box
+from ETS_CookBook import ETS_CookBook as cook
+
+import kernels
+import scenarios_module
+
+
+def run_with_engine(
+    engine: str, output_root: str, case_name: str, scenario_names: list[str]
+) -> None:
+    general_parameters: Box = Box(cook.parameters_from_TOML('ChaProEV.toml'))
+    general_parameters.files.output_root = output_root
+    cook.check_if_folder_exists(f'{output_root}/{case_name}')
+    for scenario in scenarios_module.load_scenarios(case_name):
+        if scenario.name not in scenario_names:
+            continue
+        # A shorter run keeps the test fast
+        scenario.run.end.month = 2
+        scenario.run.end.day = 1
+        scenario.run.display_end.month = 2
+        scenario.run.display_end.day = 1
+        scenario.charging.engine = engine
+        scenarios_module.run_scenario(scenario, case_name, general_parameters)
+
+
+def test_same_output_engines() -> None:
+
+    case_name: str = 'Mopo'
+    scenario_names: list[str] = ['XX_car', 'XX_truck']
+
+    # Without Numba, the numba engine uses the pandas loop, so we make
+    # it use the (pure Python) kernels, which are what Numba compiles
+    numba_available: bool = kernels.NUMBA_AVAILABLE
+    kernels.NUMBA_AVAILABLE = True
+    try:
+        with tempfile.TemporaryDirectory() as output_root:
+            reference_folder: str = f'{output_root}/pandas/{case_name}'
+            folder_to_test: str = f'{output_root}/numba/{case_name}'
+            run_with_engine(
+                'pandas', f'{output_root}/pandas', case_name, scenario_names
+            )
+            run_with_engine(
+                'numba', f'{output_root}/numba', case_name, scenario_names
+            )
+
+            test_quantities: list[str] = [
+                test_file.split('.')[0]
+                for test_file in os.listdir(folder_to_test)
+                if test_file.split('.')[1] == 'pkl'
+            ]
+            assert test_quantities
+            assert sorted(os.listdir(folder_to_test)) == sorted(
+                os.listdir(reference_folder)
+            )
+
+            for test_quantity in test_quantities:
+                test_file: str = f'{folder_to_test}/{test_quantity}.pkl'
+                reference_file: str = f'{reference_folder}/{test_quantity}.pkl'
+                test_table: pd.DataFrame = pd.DataFrame(
+                    pd.read_pickle(test_file)
+                )
+                reference_table: pd.DataFrame = pd.DataFrame(
+                    pd.read_pickle(reference_file)
+                )
+
+                pd.testing.assert_frame_equal(test_table, reference_table)
+    finally:
+        kernels.NUMBA_AVAILABLE = numba_available
+
+
+if __name__ == '__main__':
+    test_same_output_engines()
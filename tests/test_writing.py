@@ -0,0 +1,183 @@
+import os
+import pickle
+
+import box
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar_outputs
+import writing
+
+
+def get_test_general_parameters() -> box.Box:
+    return box.Box(
+        {
+            'interim_files': {
+                'pickle': True,
+                'tables': {
+                    'include': ['*_car_*', '*_profile'],
+                    'exclude': ['*_run_*'],
+                    'formats': {
+                        '*_profile': ['csv', 'parquet'],
+                        '*_mobility_matrix': [],
+                    },
+                },
+            },
+            'files': {
+                'dataframe_outputs': {
+                    'csv': True,
+                    'json': False,
+                    'parquet': False,
+                    'stata': True,
+                }
+            },
+        }
+    )
+
+
+def test_tables_manifest() -> None:
+    general_parameters: box.Box = get_test_general_parameters()
+
+    assert writing.is_table_in_manifest(
+        'XX_car_weekday_mobility_matrix', general_parameters
+    )
+    assert writing.is_table_in_manifest('XX_van_profile', general_parameters)
+    assert not writing.is_table_in_manifest(
+        'XX_car_weekday_run_mobility_matrix', general_parameters
+    )
+    assert not writing.is_table_in_manifest(
+        'XX_van_weekday_mobility_matrix', general_parameters
+    )
+    general_parameters.interim_files.pickle = False
+    assert not writing.is_interim_table_requested(
+        'XX_car_weekday_mobility_matrix', general_parameters
+    )
+
+    assert writing.get_table_output_formats(
+        'XX_car_profile', general_parameters
+    ) == {'csv': True, 'json': False, 'parquet': True, 'stata': False}
+    assert not any(
+        writing.get_table_output_formats(
+            'XX_car_weekday_mobility_matrix', general_parameters
+        ).values()
+    )
+    assert (
+        writing.get_table_output_formats(
+            'XX_car_weekday_connectivity', general_parameters
+        )
+        == general_parameters.files.dataframe_outputs
+    )
+
+
+def get_streaming_general_parameters(
+    output_root: str, do_parallel_processing: bool
+) -> box.Box:
+    dataframe_outputs: dict[str, bool] = {
+        file_type: file_type == 'csv'
+        for file_type in [
+            'csv',
+            'json',
+            'html',
+            'latex',
+            'xml',
+            'clipboard',
+            'excel',
+            'hdf',
+            'feather',
+            'parquet',
+            'stata',
+            'pickle',
+            'sql',
+        ]
+    }
+    return box.Box(
+        {
+            'interim_files': {
+                'pickle': True,
+                'tables': {'include': ['*'], 'exclude': [], 'formats': {}},
+            },
+            'files': {
+                'output_root': output_root,
+                'groupfile_root': 'ChaProEV',
+                'dataframe_outputs': dataframe_outputs,
+            },
+            'columnar_outputs': {'save': False},
+            'results_store': {'save': False},
+            'parallel_processing': {
+                'do_parallel_processing_for_pickle_saves': (
+                    do_parallel_processing
+                ),
+                'set_amount_of_processes': True,
+                'amount_for_pickle_saves': 2,
+                # This budget (in MB) is smaller than any of the tables,
+                # so they are converted one at a time
+                'memory_budget_for_pickle_saves': 1e-4,
+            },
+            'progress_bars': {
+                'display_saving_pool_run': False,
+                'saving_pool_run_description': 'Saving',
+            },
+        }
+    )
+
+
+@pytest.mark.parametrize('do_parallel_processing', [False, True])
+def test_extra_end_outputs(tmp_path, do_parallel_processing: bool) -> None:
+    case_name: str = 'test_case'
+    output_folder: str = f'{tmp_path}/{case_name}'
+    os.makedirs(output_folder)
+    general_parameters: box.Box = get_streaming_general_parameters(
+        str(tmp_path), do_parallel_processing
+    )
+    tables: dict[str, pd.DataFrame] = {
+        f'XX_car_table_{table_index}': pd.DataFrame(
+            np.arange(200, dtype=float).reshape(50, 4) * table_index,
+            columns=['a', 'b', 'c', 'd'],
+        )
+        for table_index in range(5)
+    }
+    for table_name, table in tables.items():
+        table.to_pickle(f'{output_folder}/{table_name}.pkl')
+
+    writing.extra_end_outputs(case_name, general_parameters)
+    for table_name, table in tables.items():
+        pd.testing.assert_frame_equal(
+            pd.read_csv(f'{output_folder}/{table_name}.csv', index_col=0),
+            table,
+        )
+
+    # Errors in the conversions (in the parallel processes or not)
+    # come back to the caller
+    with open(f'{output_folder}/XX_car_broken.pkl', 'wb') as broken_file:
+        broken_file.write(b'not a pickle')
+    with pytest.raises(pickle.UnpicklingError):
+        writing.extra_end_outputs(case_name, general_parameters)
+
+
+def test_extra_end_outputs_without_pyarrow(tmp_path, monkeypatch) -> None:
+    case_name: str = 'test_case'
+    output_folder: str = f'{tmp_path}/{case_name}'
+    os.makedirs(output_folder)
+    general_parameters: box.Box = get_streaming_general_parameters(
+        str(tmp_path), True
+    )
+    general_parameters.columnar_outputs.save = True
+    pd.DataFrame({'a': [1.0, 2.0]}).to_pickle(
+        f'{output_folder}/XX_car_table.pkl'
+    )
+    monkeypatch.setattr(columnar_outputs, 'PYARROW_AVAILABLE', False)
+
+    # This fails before any conversion starts
+    with pytest.raises(ModuleNotFoundError):
+        writing.extra_end_outputs(case_name, general_parameters)
+    assert os.listdir(output_folder) == ['XX_car_table.pkl']
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    test_tables_manifest()
+    for do_parallel_processing in [False, True]:
+        with tempfile.TemporaryDirectory() as temporary_folder:
+            test_extra_end_outputs(temporary_folder, do_parallel_processing)